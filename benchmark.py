@@ -0,0 +1,465 @@
+#!/usr/bin/env python3
+"""
+MOIRAGUARD Benchmark Script
+Measures memory used to hold collected devices in ScanData and to export them,
+times every stage of the query-to-export pipeline against the local API
+stand-in (no network, key or credits), and compares the blocking and async
+API clients over the stand-in's local HTTP server
+"""
+
+import argparse
+import asyncio
+import concurrent.futures
+import contextlib
+import csv
+import gc
+import io
+import json
+import math
+import os
+import platform
+import random
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import warnings
+
+import moiraguard_iot_scanner as scanner
+
+COUNTRIES = ['Morocco', 'France', 'Germany', 'United States', 'China', 'Brazil', 'Spain', 'Italy']
+CITIES = ['Casablanca', 'Paris', 'Berlin', 'New York', 'Shanghai', 'Sao Paulo', 'Madrid', 'Rome', None]
+PRODUCTS = ['Hikvision IP Camera', 'mosquitto', 'Siemens S7', 'Schneider Modicon', 'lighttpd', 'nginx', None]
+PORTS = [80, 443, 554, 502, 1883, 8080, 47808]
+
+COMPONENT_SIZES = [1000, 10000, 100000]
+PIPELINE_SIZES = [10, 1000, 100000, 1000000]
+
+def synthetic_pages(count, seed=1):
+    """Yield api.search-style pages (decoded from JSON, like real responses)
+    holding count matches in total"""
+    rng = random.Random(seed)
+    orgs = [f"Telecom Operator {i}" for i in range(200)]
+    for start in range(0, count, scanner.SEARCH_PAGE_SIZE):
+        matches = []
+        for _ in range(min(scanner.SEARCH_PAGE_SIZE, count - start)):
+            match = {
+                'ip_str': f"{rng.randint(1, 223)}.{rng.randint(0, 255)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}",
+                'port': rng.choice(PORTS),
+                'org': rng.choice(orgs),
+                'isp': rng.choice(orgs),
+                'timestamp': f"2026-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T{rng.randint(0, 23):02d}:00:00.000000",
+                'location': {'country_name': rng.choice(COUNTRIES), 'city': rng.choice(CITIES)},
+            }
+            product = rng.choice(PRODUCTS)
+            if product:
+                match['product'] = product
+                match['version'] = f"{rng.randint(1, 5)}.{rng.randint(0, 9)}"
+            matches.append(match)
+        yield json.loads(json.dumps({'total': count, 'matches': matches}))
+
+def build_dict_devices(count, category):
+    """Previous layout: one 9-key dict per device"""
+    devices = []
+    for page in synthetic_pages(count):
+        for match in page['matches']:
+            devices.append(category.device_info(match))
+    return devices
+
+def build_scan_data(count, category):
+    """Current layout: ScanData backed by a DeviceStore"""
+    scan_data = scanner.ScanData('MA', 'Morocco')
+    scan_data.add_category(category.name, count)
+    for page in synthetic_pages(count):
+        for match in page['matches']:
+            scan_data.add_device(category.name, category.device_info(match))
+    return scan_data
+
+def measure(builder, count, category):
+    """Return (retained bytes, peak bytes, seconds) for building count devices"""
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = builder(count, category)
+    elapsed = time.perf_counter() - started
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return current, peak, elapsed
+
+def run_device_memory(sizes):
+    """Compare per-device memory of list-of-dicts vs DeviceStore"""
+    category = scanner.get_category('IoT Cameras')
+    rows = []
+    print(f"{'Devices':>10}  {'dicts (MB)':>11}  {'store (MB)':>11}  {'B/dev dict':>11}  {'B/dev store':>11}  {'saved':>6}")
+    for count in sizes:
+        dict_bytes, dict_peak, dict_time = measure(build_dict_devices, count, category)
+        store_bytes, store_peak, store_time = measure(build_scan_data, count, category)
+        saved = 1 - store_bytes / dict_bytes if dict_bytes else 0
+        rows.append({
+            'devices': count,
+            'dict_bytes': dict_bytes, 'dict_peak_bytes': dict_peak, 'dict_seconds': round(dict_time, 4),
+            'store_bytes': store_bytes, 'store_peak_bytes': store_peak, 'store_seconds': round(store_time, 4),
+            'saved_ratio': round(saved, 4),
+        })
+        print(f"{count:>10,}  {dict_bytes / 1e6:>11.2f}  {store_bytes / 1e6:>11.2f}  "
+              f"{dict_bytes / count:>11.0f}  {store_bytes / count:>11.0f}  {saved:>6.0%}")
+    return rows
+
+def _peak_while(fn):
+    """Return (peak traced bytes, seconds) while running fn()"""
+    tracemalloc.start()
+    started = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak, elapsed
+
+def run_json_export(sizes):
+    """Compare peak memory of one-shot json.dump(to_dict()) vs the streaming writer"""
+    category = scanner.get_category('IoT Cameras')
+    rows = []
+    print(f"\n{'Devices':>10}  {'dump peak (MB)':>15}  {'stream peak (MB)':>17}  {'dump s':>8}  {'stream s':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'export.json')
+
+        def one_shot():
+            with open(path, 'w') as f:
+                json.dump(scan_data.to_dict(), f, indent=2)
+
+        def streaming():
+            with open(path, 'w') as f:
+                scanner.write_json_stream(f, scan_data, verbose=True)
+
+        for count in sizes:
+            scan_data = build_scan_data(count, category)
+            dump_peak, dump_time = _peak_while(one_shot)
+            stream_peak, stream_time = _peak_while(streaming)
+            rows.append({
+                'devices': count,
+                'dump_peak_bytes': dump_peak, 'dump_seconds': round(dump_time, 4),
+                'stream_peak_bytes': stream_peak, 'stream_seconds': round(stream_time, 4),
+            })
+            print(f"{count:>10,}  {dump_peak / 1e6:>15.2f}  {stream_peak / 1e6:>17.2f}  "
+                  f"{dump_time:>8.2f}  {stream_time:>9.2f}")
+    return rows
+
+def run_columnar_export(sizes):
+    """Compare the device table as CSV vs Parquet: file size and load time"""
+    if not scanner.PYARROW_AVAILABLE:
+        print("\nColumnar export: skipped (pyarrow not installed)")
+        return []
+    category = scanner.get_category('IoT Cameras')
+    rows = []
+    print(f"\n{'Devices':>10}  {'CSV (MB)':>9}  {'Parquet (MB)':>13}  {'CSV load s':>11}  {'Parquet load s':>15}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for count in sizes:
+            scan_data = build_scan_data(count, category)
+            sink = scanner.CsvSink(os.path.join(tmp, f"bench_{count}"))
+            for device in scan_data.categories[category.name]['devices']:
+                sink.write_device(category.name, device)
+            with contextlib.redirect_stdout(io.StringIO()):
+                sink.close()
+                parquet_path = scanner.export_columnar(scan_data, True, 'parquet', output_dir=tmp)
+
+            started = time.perf_counter()
+            with open(sink.devices_path, newline='') as f:
+                loaded = [[row[0], row[1], int(row[2])] + row[3:] for row in list(csv.reader(f))[1:]]
+            csv_load = time.perf_counter() - started
+            del loaded
+            started = time.perf_counter()
+            scanner.pq.read_table(str(parquet_path))
+            parquet_load = time.perf_counter() - started
+
+            csv_size = os.path.getsize(sink.devices_path)
+            parquet_size = os.path.getsize(parquet_path)
+            rows.append({
+                'devices': count,
+                'csv_bytes': csv_size, 'csv_load_seconds': round(csv_load, 4),
+                'parquet_bytes': parquet_size, 'parquet_load_seconds': round(parquet_load, 4),
+            })
+            print(f"{count:>10,}  {csv_size / 1e6:>9.2f}  {parquet_size / 1e6:>13.2f}  "
+                  f"{csv_load:>11.3f}  {parquet_load:>15.3f}")
+    return rows
+
+def build_report_scan(count):
+    """ScanData with count devices spread over every registry category"""
+    scan_data = scanner.ScanData('MA', 'Morocco')
+    categories = scanner.CATEGORY_REGISTRY
+    for category in categories:
+        scan_data.add_category(category.name, count // len(categories))
+    pages = synthetic_pages(count)
+    for i, match in enumerate(match for page in pages for match in page['matches']):
+        category = categories[i % len(categories)]
+        scan_data.add_device(category.name, category.device_info(match))
+    return scan_data
+
+def run_report_export(count):
+    """Time the long-PNG report: native Pillow composition vs html2image/Chromium"""
+    rows = []
+    print(f"\n{'Report engine':<22}  {'seconds':>8}  {'MB':>6}")
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)  # exports land in ./Moiraguard-Eye-O-Tea-Exports
+        try:
+            engines = [('native', 'native (cold charts)'), ('native', 'native (warm charts)')]
+            if scanner.HTML2IMAGE_AVAILABLE:
+                engines.append(('browser', 'html2image'))
+            scan_data = build_report_scan(count)
+            for engine, label in engines:
+                if label.endswith('(cold charts)'):
+                    scan_data.chart_cache = None
+                started = time.perf_counter()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    path = scanner.export_html_as_png(scan_data, verbose=True, engine=engine)
+                elapsed = time.perf_counter() - started
+                size = os.path.getsize(path) if path else 0
+                rows.append({'engine': label, 'devices': count, 'seconds': round(elapsed, 4),
+                             'bytes': size, 'ok': bool(path)})
+                print(f"{label:<22}  {elapsed:>8.2f}  {size / 1e6:>6.2f}" + ('' if path else '  (failed)'))
+        finally:
+            os.chdir(cwd)
+        if not scanner.HTML2IMAGE_AVAILABLE:
+            print(f"{'html2image':<22}  skipped (html2image not installed)")
+    return rows
+
+# ── Pipeline suite ───────────────────────────────────────────────────────
+# Every stage from the category queries to the verification scheduler,
+# each timed and memory-profiled on its own. Chart rendering runs in worker
+# processes, so chart stages report main-process memory only.
+
+def profile_stage(fn):
+    """Run fn() under tracemalloc; returns (result, seconds, peak bytes)"""
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = fn()
+    elapsed = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+def run_category_queries(count, latency=0.0):
+    """Deep verbose Query Mode collection of about count devices from the
+    local API stand-in. Returns (ScanData, API calls)."""
+    categories = scanner.CATEGORY_REGISTRY
+    pages = max(1, math.ceil(count / scanner.SEARCH_PAGE_SIZE / len(categories)))
+    # Smallest synthetic total with a country filter is 50 * scale / 4
+    api = scanner.LocalShodanAPI(latency=latency, scale=pages * 8)
+    scan_data = scanner.ScanData('MA', 'Morocco')
+    scanner.run_query_engine(api, 'MA', scan_data, verbose=True, pages=pages)
+    return scan_data, sum(api.calls.values())
+
+def _stub_probe(ip, port):
+    """Verification stand-in: no network, alternating verdicts"""
+    return port % 2 == 0, 'benchmark stub'
+
+def stub_probers():
+    """The registry's category → prober map with every probe stubbed out"""
+    return {name: (label, _stub_probe, port)
+            for name, (label, _, port) in scanner._category_probers().items()}
+
+def _size_of(paths):
+    """Total bytes of an exporter's returned path or list of paths"""
+    if not paths:
+        return 0
+    if isinstance(paths, (str, os.PathLike)):
+        paths = [paths]
+    return sum(os.path.getsize(path) for path in paths)
+
+def run_pipeline(sizes, latency=0.0, verify_limit=1000):
+    """Time and memory-profile each pipeline stage at each size"""
+    rows = []
+    print(f"\n{'Stage':<26}{'Devices':>10}{'seconds':>10}{'peak MB':>10}{'output MB':>11}  notes")
+    cwd = os.getcwd()
+    scanner.set_animations(False)
+    warnings.filterwarnings('ignore', message='Glyph .* missing from font')
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)  # exports, checkpoints and caches land in the temp dir
+        try:
+            for count in sizes:
+                def record(stage, seconds, peak, output=0, devices=count, **extra):
+                    row = {'stage': stage, 'devices': devices, 'seconds': round(seconds, 4),
+                           'peak_bytes': peak, 'output_bytes': output}
+                    row.update(extra)
+                    rows.append(row)
+                    notes = ', '.join(f"{key}={value}" for key, value in extra.items())
+                    print(f"{stage:<26}{devices:>10,}{seconds:>10.3f}{peak / 1e6:>10.2f}{output / 1e6:>11.2f}  {notes}")
+
+                (queried, calls), seconds, peak = profile_stage(lambda: run_category_queries(count, latency))
+                collected = sum(len(data['devices']) for data in queried.categories.values())
+                # Collection works in whole pages per category, so small sizes fetch more than
+                # requested: key the row on what was actually collected
+                record('category_queries', seconds, peak, devices=collected, api_calls=calls, requested=count)
+                del queried
+
+                scan_data, seconds, peak = profile_stage(lambda: build_report_scan(count))
+                record('scan_data_build', seconds, peak)
+
+                path, seconds, peak = profile_stage(lambda: scanner.export_json(scan_data, verbose=True))
+                record('export_json', seconds, peak, _size_of(path))
+                path, seconds, peak = profile_stage(lambda: scanner.export_csv(scan_data, verbose=True))
+                record('export_csv', seconds, peak, _size_of(path))
+
+                # Cold charts for both chart stages
+                scan_data.chart_cache = None
+                path, seconds, peak = profile_stage(lambda: scanner.export_html_with_charts(scan_data, verbose=True))
+                record('export_html_with_charts', seconds, peak, _size_of(path))
+                scan_data.chart_cache = None
+                paths, seconds, peak = profile_stage(lambda: scanner.export_png_charts(scan_data))
+                record('export_png_charts', seconds, peak, _size_of(paths))
+
+                outcome, seconds, peak = profile_stage(
+                    lambda: scanner.run_verification(scan_data, verify_limit, stub_probers()))
+                record('verification', seconds, peak, probed=outcome['probed'], unique=outcome['unique'])
+
+                del scan_data
+                for export in os.listdir(scanner.create_output_directory()):
+                    os.remove(os.path.join(scanner.create_output_directory(), export))
+        finally:
+            os.chdir(cwd)
+    return rows
+
+# ── Async client suite ───────────────────────────────────────────────────
+# The same batch of count queries (every category × several countries, with
+# Metrics Mode facets) sent through the local HTTP stand-in three ways: the
+# blocking shodan.Shodan client one call at a time, the blocking client on
+# a thread pool, and AsyncShodanAPI on one event loop. Rate limiting is
+# off on both sides so only the client transport is compared.
+
+ASYNC_COUNTRIES = ['MA', 'FR', 'DE', 'US', 'CN', 'BR', 'ES', 'IT']
+ASYNC_LATENCY = 0.1                   # default simulated server time per call
+
+def async_queries(count):
+    """count category × country queries, cycling through both lists"""
+    queries = [category.build_query(country)
+               for country in ASYNC_COUNTRIES for category in scanner.CATEGORY_REGISTRY]
+    return [queries[i % len(queries)] for i in range(count)]
+
+def run_async_client(calls=64, latency=ASYNC_LATENCY, concurrency=scanner.ASYNC_POOL_SIZE):
+    """Throughput of the blocking and async clients against the local HTTP stand-in"""
+    queries = async_queries(calls)
+    server = scanner.LocalShodanHTTPServer(scanner.LocalShodanAPI(latency=latency)).start()
+    rows = []
+    print(f"\n{'Client':<26}{'Calls':>7}{'seconds':>10}{'calls/s':>10}{'conns':>7}{'speedup':>9}")
+
+    def record(client, seconds, connections):
+        row = {'client': client, 'calls': calls, 'seconds': round(seconds, 4),
+               'calls_per_second': round(calls / seconds, 2), 'connections': connections}
+        row['speedup'] = round(rows[0]['seconds'] / seconds, 2) if rows else 1.0
+        rows.append(row)
+        print(f"{client:<26}{calls:>7}{seconds:>10.3f}{row['calls_per_second']:>10.1f}"
+              f"{connections:>7}{row['speedup']:>8.1f}x")
+
+    def blocking_client():
+        api = scanner.shodan.Shodan('benchmark')
+        api.base_url = server.url
+        api.api_rate_limit = 0        # the stand-in isn't rate limited either
+        return api
+
+    def timed(fn):
+        before = server.connections
+        started = time.perf_counter()
+        fn()
+        return time.perf_counter() - started, server.connections - before
+
+    try:
+        api = blocking_client()
+        record('blocking (sequential)', *timed(
+            lambda: [api.count(query, facets=scanner.COUNT_FACETS) for query in queries]))
+
+        local = threading.local()
+        def pooled_count(query):
+            if not hasattr(local, 'api'):
+                local.api = blocking_client()   # one keep-alive session per thread
+            return local.api.count(query, facets=scanner.COUNT_FACETS)
+        with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as pool:
+            record(f"blocking ({concurrency} threads)", *timed(lambda: list(pool.map(pooled_count, queries))))
+
+        async def gather():
+            async with scanner.AsyncShodanAPI('benchmark', base_url=server.url, pool_size=concurrency,
+                                              limiter=scanner.AdaptiveRateLimiter(None),
+                                              recorder=scanner.PerfRecorder()) as api:
+                results = await scanner.gather_counts(api, queries, facets=scanner.COUNT_FACETS)
+            failed = [query for query, result in results.items() if isinstance(result, Exception)]
+            if failed:
+                raise RuntimeError(f"{len(failed)} async calls failed: {results[failed[0]]}")
+        record(f"async ({concurrency} connections)", *timed(lambda: asyncio.run(gather())))
+    finally:
+        server.stop()
+    return rows
+
+def compare_results(rows, baseline_path, tolerance):
+    """Print each stage's time against a previous results file; returns the
+    number of stages slower than the baseline by more than tolerance"""
+    with open(baseline_path) as f:
+        baseline = {(row['stage'], row['devices']): row for row in json.load(f).get('pipeline', [])}
+    regressions = 0
+    print(f"\n{'Stage':<26}{'Devices':>10}{'baseline s':>12}{'current s':>11}{'change':>9}")
+    for row in rows:
+        base = baseline.get((row['stage'], row['devices']))
+        if base is None or not base['seconds']:
+            continue
+        change = row['seconds'] / base['seconds'] - 1
+        slower = change > tolerance
+        regressions += slower
+        print(f"{row['stage']:<26}{row['devices']:>10,}{base['seconds']:>12.3f}{row['seconds']:>11.3f}"
+              f"{change:>+9.0%}" + ('  REGRESSION' if slower else ''))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description='MOIRAGUARD performance benchmarks')
+    parser.add_argument('--suite', choices=('components', 'pipeline', 'async', 'all'), default='all',
+                        help='components: memory/export layout comparisons; pipeline: every stage from '
+                             'queries to verification against the local API stand-in; async: blocking vs '
+                             'async client throughput over local HTTP (default: all)')
+    parser.add_argument('--sizes',
+                        help='comma-separated device counts (default: 1000,10000,100000 for components, '
+                             '10,1000,100000,1000000 for the pipeline)')
+    parser.add_argument('--latency', type=float, metavar='SEC',
+                        help=f'simulated API latency per call (default: 0 for the pipeline, '
+                             f'{ASYNC_LATENCY} for the async suite)')
+    parser.add_argument('--calls', type=int, default=64, metavar='N',
+                        help='async: count queries per client (default: 64)')
+    parser.add_argument('--concurrency', type=int, default=scanner.ASYNC_POOL_SIZE, metavar='N',
+                        help=f'async: threads / pooled connections (default: {scanner.ASYNC_POOL_SIZE})')
+    parser.add_argument('--verify-limit', type=int, default=1000, metavar='N',
+                        help='pipeline: IPs per category passed to the verification scheduler (default: 1000)')
+    parser.add_argument('--json', metavar='PATH', help='also write results to a JSON file')
+    parser.add_argument('--compare', metavar='PATH',
+                        help='compare pipeline timings with an earlier --json file; exit 1 on regressions')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='--compare: allowed slowdown per stage (default: 0.25 = 25%%)')
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(',') if size.strip()] if args.sizes else None
+    results = {
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+    if args.suite in ('components', 'all'):
+        component_sizes = sizes or COMPONENT_SIZES
+        results['device_memory'] = run_device_memory(component_sizes)
+        results['json_export'] = run_json_export(component_sizes)
+        results['columnar_export'] = run_columnar_export(component_sizes)
+        results['report_export'] = run_report_export(min(component_sizes))
+    if args.suite in ('pipeline', 'all'):
+        results['pipeline'] = run_pipeline(sizes or PIPELINE_SIZES, args.latency or 0.0, args.verify_limit)
+    if args.suite in ('async', 'all'):
+        latency = ASYNC_LATENCY if args.latency is None else args.latency
+        results['async_client'] = run_async_client(args.calls, latency, args.concurrency)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.json}")
+    if args.compare and 'pipeline' in results:
+        if compare_results(results['pipeline'], args.compare, args.tolerance):
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
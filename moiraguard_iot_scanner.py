@@ -35,14 +35,36 @@ import json
 import csv
 from pathlib import Path
 import base64
+import io
 import socket
 import ssl
+import argparse
+import asyncio
+import atexit
 import concurrent.futures
+import contextlib
+import functools
+import threading
+import sqlite3
+import hashlib
+import gzip
+import random
+import zlib
+import re
+import ipaddress
+from array import array
+from html import escape
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from string import Template
+from urllib.parse import parse_qs, urlencode, urlsplit
+import urllib.request
 import matplotlib
 matplotlib.use('Agg')  # Non-interactive backend
 import matplotlib.pyplot as plt
 import matplotlib.patches as mpatches
 from matplotlib.offsetbox import OffsetImage, AnnotationBbox
+from matplotlib import font_manager
+from PIL import Image, ImageDraw, ImageFont  # installed with matplotlib
 
 # HTML to PNG conversion (optional - will check if available)
 try:
@@ -51,6 +73,16 @@ try:
 except ImportError:
     HTML2IMAGE_AVAILABLE = False
 
+# Parquet / Arrow IPC export (optional - will check if available)
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.ipc as pa_ipc
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
 # ╔═══════════════════════════════════════════════════════════════════╗
 # ║                         COLOR SCHEMES                             ║
 # ╚═══════════════════════════════════════════════════════════════════╝
@@ -76,12 +108,30 @@ class Colors:
 # ║                      UTILITY FUNCTIONS                            ║
 # ╚═══════════════════════════════════════════════════════════════════╝
 
+# Cosmetic delays (typewriter, spinners, pauses); off with --no-animation or when not on a TTY
+ANIMATIONS_ENABLED = True
+
+def set_animations(enabled):
+    """Globally enable/disable cosmetic delays"""
+    global ANIMATIONS_ENABLED
+    ANIMATIONS_ENABLED = enabled
+
+def pause(seconds):
+    """Cosmetic pause — skipped when animations are disabled"""
+    if ANIMATIONS_ENABLED:
+        with perf_span('animation', 'pause'):
+            time.sleep(seconds)
+
 def typewriter_print(text, delay=0.03):
     """Print text with typewriter effect"""
-    for char in text:
-        sys.stdout.write(char)
-        sys.stdout.flush()
-        time.sleep(delay)
+    if not ANIMATIONS_ENABLED:
+        print(text)
+        return
+    with perf_span('animation', 'typewriter'):
+        for char in text:
+            sys.stdout.write(char)
+            sys.stdout.flush()
+            time.sleep(delay)
     print()
 
 def print_separator(char='═', length=70, color=Colors.CYAN):
@@ -90,16 +140,19 @@ def print_separator(char='═', length=70, color=Colors.CYAN):
 
 def loading_animation(text="Initializing", duration=2):
     """Show loading animation"""
+    if not ANIMATIONS_ENABLED:
+        return
     chars = "⣾⣽⣻⢿⡿⣟⣯⣷"
-    end_time = time.time() + duration
-    i = 0
-    while time.time() < end_time:
-        sys.stdout.write(f'\r{Colors.CYAN}{chars[i % len(chars)]} {text}...{Colors.END}')
+    with perf_span('animation', text):
+        end_time = time.time() + duration
+        i = 0
+        while time.time() < end_time:
+            sys.stdout.write(f'\r{Colors.CYAN}{chars[i % len(chars)]} {text}...{Colors.END}')
+            sys.stdout.flush()
+            time.sleep(0.1)
+            i += 1
+        sys.stdout.write('\r' + ' ' * 50 + '\r')
         sys.stdout.flush()
-        time.sleep(0.1)
-        i += 1
-    sys.stdout.write('\r' + ' ' * 50 + '\r')
-    sys.stdout.flush()
 
 def print_status(status_type, message):
     """Print formatted status message"""
@@ -115,13 +168,182 @@ def print_status(status_type, message):
     icon = icons.get(status_type, f'{Colors.WHITE}[•]{Colors.END}')
     print(f"{icon} {message}")
 
+# ╔═══════════════════════════════════════════════════════════════════╗
+# ║                    PERFORMANCE TRACING                            ║
+# ╚═══════════════════════════════════════════════════════════════════╝
+
+class PerfSpan:
+    """One timed operation. Code inside the span may add bytes, credits
+    and retries; errors are recorded when an exception escapes."""
+    __slots__ = ('stage', 'name', 'start', 'duration', 'thread', 'bytes', 'credits',
+                 'retries', 'error', 'attrs')
+
+    def __init__(self, stage, name, attrs):
+        self.stage = stage
+        self.name = name
+        self.start = 0.0
+        self.duration = 0.0
+        self.thread = threading.get_ident()
+        self.bytes = 0
+        self.credits = 0
+        self.retries = 0
+        self.error = None
+        self.attrs = attrs
+
+class PerfRecorder:
+    """Thread-safe collector of PerfSpans: API calls, categories, exporters,
+    chart rendering, probe batches and cosmetic animations"""
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self.spans = []
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def span(self, stage, name='', **attrs):
+        """Time the body as one span of the given stage"""
+        span = PerfSpan(stage, name, attrs)
+        started = time.perf_counter()
+        try:
+            yield span
+        except BaseException as e:
+            span.error = type(e).__name__
+            raise
+        finally:
+            self.add(span, started)
+
+    def add(self, span, started):
+        """Close a span timed by the caller (started: perf_counter value)"""
+        span.start = started - self.origin
+        span.duration = time.perf_counter() - started
+        with self._lock:
+            self.spans.append(span)
+
+    def summary(self):
+        """{stage: {'calls', 'seconds', 'max_seconds', 'bytes', 'credits',
+        'retries', 'errors'}} in first-seen order"""
+        stages = {}
+        with self._lock:
+            spans = list(self.spans)
+        for span in sorted(spans, key=lambda s: s.start):
+            row = stages.setdefault(span.stage, {'calls': 0, 'seconds': 0.0, 'max_seconds': 0.0, 'bytes': 0,
+                                                 'credits': 0, 'retries': 0, 'errors': 0})
+            row['calls'] += 1
+            row['seconds'] += span.duration
+            row['max_seconds'] = max(row['max_seconds'], span.duration)
+            row['bytes'] += span.bytes
+            row['credits'] += span.credits
+            row['retries'] += span.retries
+            row['errors'] += span.error is not None
+        return stages
+
+    def wall_seconds(self):
+        """Time from the first span's start to the last span's end"""
+        with self._lock:
+            if not self.spans:
+                return 0.0
+            return (max(s.start + s.duration for s in self.spans) - min(s.start for s in self.spans))
+
+    def write_trace(self, path):
+        """Write a Chrome trace-event JSON file (chrome://tracing, Perfetto)
+        with the per-stage summary under otherData"""
+        with self._lock:
+            spans = list(self.spans)
+        threads = {}
+        events = []
+        for span in spans:
+            args = dict(span.attrs, bytes=span.bytes, credits=span.credits, retries=span.retries)
+            if span.error:
+                args['error'] = span.error
+            events.append({'name': f"{span.stage} {span.name}".strip(), 'cat': span.stage.split('.')[0],
+                           'ph': 'X', 'ts': round(span.start * 1e6), 'dur': round(span.duration * 1e6),
+                           'pid': os.getpid(), 'tid': threads.setdefault(span.thread, len(threads) + 1),
+                           'args': args})
+        trace = {'traceEvents': events, 'displayTimeUnit': 'ms',
+                 'otherData': {'wall_seconds': round(self.wall_seconds(), 6), 'stages': self.summary()}}
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(trace, f, default=str)
+        return path
+
+PERF = PerfRecorder()
+_trace_path = None
+
+def set_trace_path(path):
+    """Write the run's spans as a JSON trace file at exit (None to disable)"""
+    global _trace_path
+    _trace_path = path
+
+def perf_span(stage, name='', **attrs):
+    """Span on the process-wide recorder"""
+    return PERF.span(stage, name, **attrs)
+
+def traced_export(fmt):
+    """Decorator: record an exporter as an export.<fmt> span with the size
+    of the file(s) it returns"""
+    def wrap(export):
+        @functools.wraps(export)
+        def traced(*args, **kwargs):
+            with perf_span(f"export.{fmt}") as span:
+                result = export(*args, **kwargs)
+                paths = result if isinstance(result, (list, tuple)) else [result] if result else []
+                for path in paths:
+                    try:
+                        span.bytes += os.path.getsize(path)
+                    except (OSError, TypeError):
+                        pass
+                return result
+        return traced
+    return wrap
+
+def _format_bytes(count):
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if count < 1024 or unit == 'GB':
+            return f"{count:,.0f} {unit}" if unit == 'B' else f"{count:,.1f} {unit}"
+        count /= 1024
+
+def print_perf_report(recorder=None):
+    """Print the per-stage timing table for this run"""
+    recorder = recorder or PERF
+    stages = recorder.summary()
+    if not stages:
+        return
+    print_separator('═', 100, Colors.CYAN)
+    print(f"{Colors.BOLD}{Colors.CYAN}PERFORMANCE REPORT{Colors.END}")
+    print_separator('─', 100, Colors.DIM)
+    print(f"{Colors.BOLD}{'Stage':<22}{'Calls':>7}{'Total s':>10}{'Mean ms':>10}{'Max ms':>10}"
+          f"{'Bytes':>13}{'Credits':>9}{'Retries':>9}{'Errors':>8}{Colors.END}")
+    for stage, row in stages.items():
+        mean = row['seconds'] / row['calls'] * 1000
+        errors = f"{Colors.RED}{row['errors']:>8}{Colors.END}" if row['errors'] else f"{0:>8}"
+        print(f"{stage[:21]:<22}{row['calls']:>7,}{row['seconds']:>10.3f}{mean:>10.1f}{row['max_seconds'] * 1000:>10.1f}"
+              f"{_format_bytes(row['bytes']) if row['bytes'] else '-':>13}{row['credits']:>9,}{row['retries']:>9,}{errors}")
+    print_separator('─', 100, Colors.DIM)
+    print(f"{Colors.DIM}Wall time {recorder.wall_seconds():.2f}s · api.* spans run concurrently, so stage "
+          f"totals can exceed wall time · ratelimit.* is pacing, not API latency · "
+          f"bytes: received (api) / written (export){Colors.END}")
+    print_separator('═', 100, Colors.CYAN)
+
+def finish_perf_report():
+    """Print the performance table and write the trace file (run at exit)"""
+    if not PERF.spans:
+        return
+    print_perf_report()
+    if _trace_path:
+        try:
+            PERF.write_trace(_trace_path)
+            print_status('success', f"Trace written to {Colors.CYAN}{_trace_path}{Colors.END}")
+        except OSError as e:
+            print_status('error', f"Could not write trace: {e}")
+
 # ╔═══════════════════════════════════════════════════════════════════╗
 # ║                      API KEY MANAGEMENT                           ║
 # ╚═══════════════════════════════════════════════════════════════════╝
 
-def load_api_key():
+def load_api_key(key_file='shodan_api.key'):
     """Load API key from file"""
-    key_file = 'shodan_api.key'
+
+    if _api_backend != 'shodan':
+        print_status('info', f"API backend: {Colors.YELLOW}{_api_backend}{Colors.END} - no API key needed")
+        return None
 
     loading_animation("Loading API credentials", 1.5)
 
@@ -147,8 +369,9 @@ def load_api_key():
         print_status('error', f"Error reading API key: {Colors.RED}{e}{Colors.END}")
         sys.exit(1)
 
-def check_requirements(api_key):
-    """Check all requirements before starting scan to avoid wasting credits"""
+def check_requirements(api_key, confirm=True, credits_needed=6):
+    """Check all requirements before starting scan to avoid wasting credits.
+    With confirm=False the Y/n prompt is skipped (headless runs)."""
     print_separator('═', 70, Colors.CYAN)
     print(f"{Colors.BOLD}{Colors.CYAN}PRE-SCAN REQUIREMENTS CHECK{Colors.END}")
     print_separator('─', 70, Colors.CYAN)
@@ -156,7 +379,7 @@ def check_requirements(api_key):
     try:
         # Test API connection
         loading_animation("Testing Shodan API connection", 1.5)
-        api = shodan.Shodan(api_key)
+        api = open_shodan_api(api_key)
 
         # Get account information
         loading_animation("Retrieving account information", 1)
@@ -188,13 +411,13 @@ def check_requirements(api_key):
 
         # Show scan cost info
         print(f"\n{Colors.BOLD}{Colors.CYAN}Scan Information:{Colors.END}")
-        print(f"  • This scan will use: {Colors.YELLOW}6 query credits{Colors.END}")
-        print(f"  • Credits after scan: {Colors.CYAN}{max(0, query_credits - 6)}{Colors.END}")
+        print(f"  • This scan will use: {Colors.YELLOW}{credits_needed} query credits{Colors.END} {Colors.DIM}(Verbose mode — Metrics Only uses none){Colors.END}")
+        print(f"  • Credits after scan: {Colors.CYAN}{max(0, query_credits - credits_needed)}{Colors.END}")
 
         # Warning if low credits
-        if query_credits < 6:
+        if query_credits < credits_needed:
             print(f"\n{Colors.RED}⚠️  INSUFFICIENT CREDITS{Colors.END}")
-            print(f"{Colors.RED}You need at least 6 query credits to run this scan.{Colors.END}")
+            print(f"{Colors.RED}You need at least {credits_needed} query credits to run this scan.{Colors.END}")
             print(f"{Colors.YELLOW}Get more credits at: https://account.shodan.io/{Colors.END}")
             return False
         elif query_credits < 10:
@@ -204,6 +427,10 @@ def check_requirements(api_key):
 
         print_separator('─', 70, Colors.CYAN)
 
+        if not confirm:
+            print_status('success', "Requirements verified - proceeding with scan")
+            return True
+
         # Ask for confirmation
         while True:
             try:
@@ -230,6 +457,1072 @@ def check_requirements(api_key):
         print_status('error', f"Unexpected error: {Colors.RED}{e}{Colors.END}")
         return False
 
+# ╔═══════════════════════════════════════════════════════════════════╗
+# ║                      API BACKENDS                                 ║
+# ╚═══════════════════════════════════════════════════════════════════╝
+
+# 'shodan' talks to api.shodan.io; 'fake' serves recorded or synthetic
+# responses locally (no key, network or credits) for benchmarks and CI
+API_BACKENDS = ('shodan', 'fake')
+_api_backend = 'shodan'
+_backend_options = {}
+_local_api = None                     # shared LocalShodanAPI for the process
+_recorder = None                      # RecordingShodanAPI when recording fixtures
+_rate_limiter = None                  # AdaptiveRateLimiter shared by every client
+_local_http = None                    # LocalShodanHTTPServer serving _local_api to async clients
+_async_api = None                     # AsyncShodanAPI shared by queries, batches and scan polling
+_api_loop = None                      # event loop those async calls overlap on (see api_event_loop)
+_api_loop_lock = threading.Lock()
+
+RATE_LIMIT_ERROR = ("Request rate limit reached (1 request/ second). "
+                    "Please wait a second before trying again and slow down your API calls.")
+
+def set_api_backend(name, **options):
+    """Choose the API backend. Options are passed to LocalShodanAPI (fake)
+    or, with record_fixtures=PATH, record real responses as fixtures."""
+    global _api_backend, _backend_options, _local_api, _recorder, _rate_limiter, _local_http, _async_api
+    close_async_api()
+    if _local_http is not None:
+        _local_http.stop()
+    _api_backend = name
+    _backend_options = options
+    _local_api = None
+    _recorder = None
+    _rate_limiter = None
+    _local_http = None
+    _async_api = None
+
+def backend_path(path):
+    """State file for the current backend: the fake backend keeps its own
+    query cache and history so synthetic data never mixes with real scans"""
+    path = Path(path)
+    if _api_backend == 'shodan':
+        return path
+    return path.with_name(f"{path.stem}_{_api_backend}{path.suffix}")
+
+def backend_cache_path(path):
+    """Query cache file for the current backend. Fake responses depend on
+    the seed, scale and fixture file, so each combination gets its own
+    cache instead of serving another configuration's data."""
+    path = backend_path(path)
+    if _api_backend != 'fake':
+        return path
+    fixtures = _backend_options.get('fixtures')
+    if fixtures:
+        try:
+            fixtures = f"{Path(fixtures).resolve()}@{os.path.getmtime(fixtures)}"
+        except OSError:
+            pass
+    options = json.dumps([_backend_options.get('seed', 0), _backend_options.get('scale', 1.0), fixtures])
+    return path.with_name(f"{path.stem}_{hashlib.sha1(options.encode()).hexdigest()[:8]}{path.suffix}")
+
+def _local_backend():
+    """The process's LocalShodanAPI, created on first use"""
+    global _local_api
+    if _local_api is None:
+        _local_api = LocalShodanAPI(**{k: v for k, v in _backend_options.items() if k != 'record_fixtures'})
+    return _local_api
+
+class ShodanClient(shodan.Shodan):
+    """shodan.Shodan whose APIErrors carry the HTTP status of the response
+    they came from (status None: no response arrived), taken from a
+    requests response hook, so failures are classified by status rather
+    than by message text. The hook also counts the bytes received for
+    InstrumentedAPI. Pacing is left to RateLimitedAPI."""
+    def __init__(self, key, proxies=None):
+        super().__init__(key, proxies)
+        self.api_rate_limit = 0           # RateLimitedAPI is the only pacer
+        self._last = threading.local()    # per calling thread
+        self._session.hooks['response'].append(self._on_response)
+
+    def _on_response(self, response, *args, **kwargs):
+        self._last.status = response.status_code
+        # Content-Length is the size on the wire (before gzip decoding)
+        self._last.received = int(response.headers.get('Content-Length') or len(response.content))
+
+    def last_response_bytes(self):
+        """Bytes received by this thread's last call (0 if no response arrived)"""
+        return getattr(self._last, 'received', 0)
+
+    def _request(self, *args, **kwargs):
+        self._last.status = None
+        self._last.received = 0
+        try:
+            return super()._request(*args, **kwargs)
+        except shodan.APIError as e:
+            e.status = self._last.status
+            raise
+
+def open_shodan_api(api_key):
+    """API client for the configured backend (same interface as shodan.Shodan)"""
+    global _recorder, _rate_limiter
+    if _api_backend == 'fake':
+        api = _local_backend()
+    else:
+        api = ShodanClient(api_key)
+        if _backend_options.get('record_fixtures'):
+            if _recorder is None:
+                _recorder = RecordingShodanAPI(api, _backend_options['record_fixtures'])
+            else:
+                _recorder.api = api
+            api = _recorder
+    if _rate_limiter is None:
+        _rate_limiter = _make_rate_limiter(api)
+    # Instrumentation sits below the limiter: api.* spans time each attempt, not the pacing
+    return RateLimitedAPI(InstrumentedAPI(api), _rate_limiter)
+
+def finish_api_backend():
+    """Save recorded fixtures and report limiter and local backend traffic (run at exit)"""
+    print_rate_limit_report(_rate_limiter)
+    close_async_api()
+    if _local_http is not None:
+        _local_http.stop()
+    if _recorder is not None and _recorder.calls:
+        _recorder.save()
+        print_status('success', f"Recorded {_recorder.calls} API responses to "
+                                f"{Colors.CYAN}{_recorder.path}{Colors.END}")
+    if _local_api is not None and _local_api.calls:
+        calls = ', '.join(f"{name} {count}" for name, count in sorted(_local_api.calls.items()))
+        print_status('info', f"Local API backend: {sum(_local_api.calls.values())} calls ({calls}), "
+                             f"{_local_api.errors} simulated rate-limit errors")
+
+# ── Fixtures ─────────────────────────────────────────────────────────────
+# Fixture files are JSON: {"search": {query: {page: response}},
+# "count": {query: {facets: response}}, "info": {...}, "ports": [...],
+# "protocols": {...}}. Queries are stored normalized.
+
+def _fixture_facets(facets):
+    return facets if isinstance(facets, str) else ','.join(facets or ())
+
+class RecordingShodanAPI:
+    """Wraps a shodan.Shodan client and keeps every search/count/info/
+    ports/protocols response, so a real session can be replayed offline"""
+    RECORDED = ('info', 'ports', 'protocols')
+
+    def __init__(self, api, path):
+        self.api = api
+        self.path = Path(path)
+        self.calls = 0
+        self._lock = threading.Lock()
+        self.fixtures = {'search': {}, 'count': {}}
+        if self.path.exists():
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.fixtures.update(json.load(f))
+
+    def search(self, query, page=1, **kwargs):
+        response = self.api.search(query, page=page, **kwargs)
+        with self._lock:
+            self.fixtures['search'].setdefault(normalize_query(query), {})[str(page)] = response
+            self.calls += 1
+        return response
+
+    def count(self, query, facets=None):
+        response = self.api.count(query, facets=facets)
+        with self._lock:
+            self.fixtures['count'].setdefault(normalize_query(query), {})[_fixture_facets(facets)] = response
+            self.calls += 1
+        return response
+
+    def __getattr__(self, name):
+        method = getattr(self.api, name)
+        if name not in self.RECORDED:
+            return method
+        def _recorded(*args, **kwargs):
+            response = method(*args, **kwargs)
+            with self._lock:
+                self.fixtures[name] = response
+                self.calls += 1
+            return response
+        return _recorded
+
+    def save(self):
+        """Write the fixture file"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock, open(self.path, 'w', encoding='utf-8') as f:
+            json.dump(self.fixtures, f)
+
+class InstrumentedAPI:
+    """Records every API call as an api.<method> span: wall time, bytes
+    received (as counted by the client's transport; none for the
+    in-process stand-in), query/scan credits charged and errors. Other
+    attributes pass through to the wrapped client."""
+    TRACED = ('search', 'count', 'info', 'ports', 'protocols', 'scan', 'scan_status',
+              'alerts', 'alert_info', 'create_alert', 'delete_alert')
+
+    def __init__(self, api, recorder=None):
+        self.api = api
+        self.recorder = recorder or PERF
+
+    def __getattr__(self, name):
+        method = getattr(self.api, name)
+        if name not in self.TRACED:
+            return method
+        def _traced(*args, **kwargs):
+            with self.recorder.span(f"api.{name}", str(args[0]) if args and name != 'scan' else '') as span:
+                response = method(*args, **kwargs)
+                received = getattr(self.api, 'last_response_bytes', None)
+                if received is not None:
+                    span.bytes = received()
+                if name == 'search':
+                    span.credits = search_credit_cost(args[0], kwargs.get('page', args[1] if len(args) > 1 else 1))
+                elif name == 'scan' and isinstance(response, dict):
+                    span.attrs['scan_credits'] = response.get('count', 0)
+                return response
+        return _traced
+
+# ── Rate limiting ────────────────────────────────────────────────────────
+# Every backend client sits behind one shared RateLimitedAPI: a token
+# bucket paces calls from all threads and modes, rate-limit and transient
+# errors are retried with exponential backoff and full jitter, and the
+# rate adapts (AIMD) — halved on every rate-limit error, nudged back up
+# after a run of successes, never above the plan's ceiling.
+SHODAN_RATE_LIMIT = 1.0               # requests/second on standard plans
+STANDARD_PLANS = ('oss', 'dev', 'edu', 'basic', 'plus', 'freelancer', 'small business', 'membership')
+RATE_PROBE_CEILING = 10.0             # other plans probe upward to at most this
+RATE_FLOOR = 0.25                     # never back off below this fraction of the ceiling
+RATE_INCREASE_AFTER = 5               # consecutive successes before raising the rate
+RATE_INCREASE_STEP = 0.1              # fraction of the ceiling added each time
+RETRY_ATTEMPTS = 5
+RETRY_MAX_DELAY = 30.0
+TRANSIENT_HTTP_STATUSES = (429, 502, 503, 504)
+# What shodan.Shodan raises when no response arrived (connection error or timeout)
+NO_RESPONSE_ERROR = 'Unable to connect to Shodan'
+# Calls that change state on Shodan. After a lost connection the request may
+# already have been applied, so only rate-limit rejections are retried.
+STATEFUL_CALLS = ('scan', 'create_alert', 'delete_alert')
+
+def api_error(message, status=None):
+    """shodan.APIError carrying the HTTP status it came with (None: no response)"""
+    error = shodan.APIError(message)
+    error.status = status
+    return error
+
+def is_rate_limit_error(error):
+    if getattr(error, 'status', None) == 429:
+        return True
+    return isinstance(error, shodan.APIError) and 'rate limit' in str(error).lower()
+
+def is_transient_error(error):
+    """Errors worth retrying, judged by exception type and HTTP status:
+    rate limiting, no response at all, and gateway errors (not bad keys,
+    bad queries or exhausted credits)"""
+    if isinstance(error, (ConnectionError, TimeoutError, socket.timeout, asyncio.TimeoutError)):
+        return True
+    if is_rate_limit_error(error):
+        return True
+    status = getattr(error, 'status', None)
+    if status is not None:
+        return status in TRANSIENT_HTTP_STATUSES
+    return isinstance(error, shodan.APIError) and str(error) == NO_RESPONSE_ERROR
+
+def is_retryable(method, error):
+    """Whether a failed api.<method> call may be sent again"""
+    if method in STATEFUL_CALLS:
+        return is_rate_limit_error(error)
+    return is_transient_error(error)
+
+class AdaptiveRateLimiter:
+    """Thread-safe token bucket whose rate adapts to rate-limit errors.
+    rate=None means unlimited (backoff still applies); plan_aware lets
+    api.info responses raise the ceiling."""
+    def __init__(self, rate=SHODAN_RATE_LIMIT, max_rate=None, burst=1, plan_aware=False):
+        self.rate = rate
+        self.max_rate = max_rate if max_rate is not None else rate
+        self.burst = burst
+        self.plan_aware = plan_aware
+        self.tokens = burst
+        self.throttled = 0                # rate-limit errors seen
+        self.waited = 0.0                 # seconds spent waiting for tokens
+        self._successes = 0
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        if self.rate:
+            self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _reserve(self):
+        """Take a token and return how long to wait before using it. Tokens
+        are reserved ahead (the bucket goes negative), so waiters are
+        served in order without busy-waiting."""
+        if not self.rate:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.tokens -= 1
+            delay = -self.tokens / self.rate if self.tokens < 0 else 0.0
+            self.waited += delay
+        return delay
+
+    def acquire(self):
+        """Take a token, sleeping until one is available"""
+        delay = self._reserve()
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+    async def acquire_async(self):
+        """Take a token without blocking the event loop"""
+        delay = self._reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return delay
+
+    def backoff_base(self):
+        """First retry delay: one request interval (at least 100 ms)"""
+        return max(1.0 / self.rate, 0.1) if self.rate else 0.1
+
+    def on_success(self):
+        with self._lock:
+            self._successes += 1
+            if self.rate and self.rate < self.max_rate and self._successes >= RATE_INCREASE_AFTER:
+                self.rate = min(self.max_rate, self.rate + self.max_rate * RATE_INCREASE_STEP)
+                self._successes = 0
+
+    def on_rate_limited(self):
+        """Halve the rate and empty the bucket so every caller pauses"""
+        with self._lock:
+            self.throttled += 1
+            self._successes = 0
+            if self.rate:
+                self.rate = max(self.max_rate * RATE_FLOOR, self.rate / 2)
+                self._refill(time.monotonic())
+                self.tokens = min(self.tokens, 0)
+
+    def configure_for_plan(self, plan):
+        """Set the ceiling from the account plan (from api.info)"""
+        with self._lock:
+            if (plan or '').lower() in STANDARD_PLANS:
+                self.max_rate = SHODAN_RATE_LIMIT
+                self.rate = min(self.rate or SHODAN_RATE_LIMIT, SHODAN_RATE_LIMIT)
+            else:
+                self.max_rate = RATE_PROBE_CEILING
+
+class RateLimitedAPI:
+    """Paces every call through an AdaptiveRateLimiter and retries
+    transient failures (up to RETRY_ATTEMPTS; only rate-limit rejections
+    for STATEFUL_CALLS) with exponential backoff and full jitter; the
+    final error is raised, never swallowed. Token waits
+    and backoff sleeps are recorded as ratelimit.wait / ratelimit.backoff
+    spans, so the api.* spans of the wrapped client time only the calls."""
+    def __init__(self, api, limiter, attempts=RETRY_ATTEMPTS, recorder=None):
+        self.api = api
+        self.limiter = limiter
+        self.attempts = attempts
+        self.recorder = recorder or PERF
+        self._rng = random.Random()
+
+    def __getattr__(self, name):
+        method = getattr(self.api, name)
+        if name not in InstrumentedAPI.TRACED:
+            return method
+        def _limited(*args, **kwargs):
+            for attempt in range(self.attempts + 1):
+                started = time.perf_counter()
+                if self.limiter.acquire() > 0:
+                    self.recorder.add(PerfSpan('ratelimit.wait', name, {}), started)
+                try:
+                    response = method(*args, **kwargs)
+                except Exception as e:
+                    if attempt == self.attempts or not is_retryable(name, e):
+                        raise
+                    if is_rate_limit_error(e):
+                        self.limiter.on_rate_limited()
+                    span = PerfSpan('ratelimit.backoff', name, {'attempt': attempt + 1, 'cause': str(e)[:80]})
+                    span.retries = 1
+                    started = time.perf_counter()
+                    time.sleep(self._rng.uniform(0, min(RETRY_MAX_DELAY, self.limiter.backoff_base() * 2 ** attempt)))
+                    self.recorder.add(span, started)
+                    continue
+                self.limiter.on_success()
+                if name == 'info' and self.limiter.plan_aware and isinstance(response, dict):
+                    self.limiter.configure_for_plan(response.get('plan'))
+                return response
+        return _limited
+
+def _make_rate_limiter(api):
+    """Limiter for a backend client: its declared request_interval (the
+    local stand-in) or Shodan's standard 1 request/second"""
+    interval = getattr(api, 'request_interval', None)
+    if interval is None:
+        return AdaptiveRateLimiter(SHODAN_RATE_LIMIT, plan_aware=True)
+    return AdaptiveRateLimiter(1.0 / interval if interval else None)
+
+def print_rate_limit_report(limiter):
+    """Print limiter statistics (only if throttling or retries happened)"""
+    if limiter is None or not (limiter.throttled or limiter.waited >= 1):
+        return
+    rate = f"{limiter.rate:.2f} req/s" if limiter.rate else "unlimited"
+    print_status('info', f"Rate limiter: {rate} (ceiling {limiter.max_rate or 'none'}), "
+                         f"{limiter.throttled} rate-limit errors absorbed, {limiter.waited:.1f}s paced")
+
+# ── Local stand-in ───────────────────────────────────────────────────────
+
+FAKE_COUNTRIES = (('MA', 'Morocco'), ('FR', 'France'), ('DE', 'Germany'), ('US', 'United States'),
+                  ('CN', 'China'), ('BR', 'Brazil'), ('ES', 'Spain'), ('IT', 'Italy'))
+FAKE_CITIES = ('Casablanca', 'Rabat', 'Paris', 'Berlin', 'New York', 'Shanghai', 'Sao Paulo', 'Madrid', None)
+FAKE_PRODUCTS = ('Hikvision IP Camera', 'mosquitto', 'Siemens S7', 'Schneider Modicon', 'lighttpd', 'nginx', None)
+FAKE_PORTS = (21, 22, 23, 80, 102, 443, 502, 554, 1883, 2404, 8080, 8443, 20000, 44818, 47808)
+FAKE_PROTOCOLS = {
+    'http': 'Simple HTTP request to the root of the website',
+    'https': 'HTTPS banner grabber',
+    'modbus': 'Modbus device information (unit ID 0)',
+    'mqtt': 'MQTT broker connection and topic listing',
+    'rtsp': 'RTSP OPTIONS request',
+    'bacnet': 'BACnet device identification',
+    'telnet': 'Telnet banner grabber',
+    's7': 'Siemens S7 PLC identification',
+}
+FAKE_HOST_POOL = 1 << 16              # distinct synthetic hosts, so categories share IPs
+FAKE_SCAN_STATES = ('SUBMITTING', 'QUEUE', 'PROCESSING', 'DONE')
+
+_QUERY_FILTER = re.compile(r'(\w+):("[^"]*"|\S+)')
+_QUERY_PHRASE = re.compile(r'"([^"]+)"')
+
+class LocalShodanAPI:
+    """In-process stand-in for shodan.Shodan: search, count, info, ports,
+    protocols, scan/scan_status and alerts. Responses come from a fixture
+    file when it has them, otherwise they are synthesized deterministically
+    from the query (honouring country:, port: and net: filters). latency
+    adds a per-call delay (± jitter), rate_limit (requests/second) rejects
+    calls that arrive too fast, and error_rate makes a seeded fraction of
+    calls fail with the API's rate-limit error. scale multiplies synthetic
+    result totals, for paging through large result sets."""
+    def __init__(self, fixtures=None, latency=0.0, jitter=0.0, rate_limit=0.0, error_rate=0.0,
+                 seed=0, query_credits=100000, scan_credits=1000, scan_seconds=1.0, scale=1.0):
+        self.latency = latency
+        self.scale = scale
+        self.jitter = jitter
+        self.rate_limit = rate_limit
+        self.error_rate = error_rate
+        self.seed = seed
+        self.query_credits = query_credits
+        self.scan_credits = scan_credits
+        self.scan_seconds = scan_seconds
+        self.request_interval = 1.0 / rate_limit if rate_limit else 0.0
+        self.calls = defaultdict(int)
+        self.errors = 0
+        self.fixtures = {}
+        if fixtures:
+            with open(fixtures, 'r', encoding='utf-8') as f:
+                self.fixtures = json.load(f)
+        self._lock = threading.Lock()
+        self._rng = random.Random(seed)
+        self._last_call = None
+        self._scans = {}
+        self._alerts = {}
+
+    # ── transport simulation ──
+    def _request(self, method):
+        """Count the call, apply latency and raise simulated rate-limit errors"""
+        with self._lock:
+            self.calls[method] += 1
+            now = time.monotonic()
+            # 10 ms of grace for timer jitter in well-behaved clients
+            too_fast = (self.rate_limit and self._last_call is not None
+                        and now - self._last_call < 1.0 / self.rate_limit - 0.01)
+            if not too_fast:
+                self._last_call = now
+            failed = too_fast or (self.error_rate and self._rng.random() < self.error_rate)
+            delay = self.latency * (1 + self.jitter * (2 * self._rng.random() - 1)) if self.latency else 0
+        if delay > 0:
+            time.sleep(delay)
+        if failed:
+            with self._lock:
+                self.errors += 1
+            raise api_error(RATE_LIMIT_ERROR, 429)
+
+    def _fixture(self, method, query, key):
+        entries = self.fixtures.get(method, {}).get(normalize_query(query))
+        return None if entries is None else entries.get(key)
+
+    # ── synthetic data ──
+    def _query_seed(self, query):
+        return zlib.crc32(f"{self.seed}|{normalize_query(query)}".encode())
+
+    def _total(self, query):
+        """Deterministic result count for a query"""
+        seed = self._query_seed(query)
+        filters = dict(_QUERY_FILTER.findall(query))
+        total = int((50 + seed % 5000) * self.scale)
+        if 'net' in filters:
+            try:
+                total = min(total % 64 + 1, ipaddress.ip_network(filters['net'], strict=False).num_addresses)
+            except ValueError:
+                total = 0
+        elif 'country' in filters:
+            total //= 4
+        return total
+
+    def _match(self, query, filters, phrases, i):
+        """The i-th synthetic match for a query"""
+        rng = random.Random(self._query_seed(query) + i * 7919)
+        if 'net' in filters:
+            net = ipaddress.ip_network(filters['net'], strict=False)
+            ip = str(net[i % net.num_addresses])
+        else:
+            host = rng.randrange(FAKE_HOST_POOL)
+            ip = f"{10 + host % 200}.{(host >> 8) % 256}.{host % 256}.{1 + (host * 7) % 254}"
+        if 'country' in filters:
+            code = filters['country'].upper()
+            country = country_name_for_code(code)
+        else:
+            code, country = rng.choice(FAKE_COUNTRIES)
+        ports = [int(p) for p in filters.get('port', '').split(',') if p.isdigit()]
+        match = {
+            'ip_str': ip,
+            'port': rng.choice(ports or FAKE_PORTS),
+            'org': f"Operator {rng.randrange(40)}",
+            'isp': f"ISP {rng.randrange(12)}",
+            'timestamp': f"2026-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T{rng.randint(0, 23):02d}:00:00.000000",
+            'location': {'country_code': code, 'country_name': country, 'city': rng.choice(FAKE_CITIES)},
+        }
+        product = rng.choice(phrases) if phrases else rng.choice(FAKE_PRODUCTS)
+        if product:
+            match['product'] = product
+            match['version'] = f"{rng.randint(1, 5)}.{rng.randint(0, 9)}"
+        return match
+
+    def _matches(self, query, start, stop):
+        filters = {name: value.strip('"') for name, value in _QUERY_FILTER.findall(query)}
+        phrases = [p for p in _QUERY_PHRASE.findall(_QUERY_FILTER.sub('', query)) if p]
+        return [self._match(query, filters, phrases, i) for i in range(start, stop)]
+
+    def _facets(self, query, facets):
+        """Facet buckets from a sample of the synthetic matches, scaled to the total"""
+        total = self._total(query)
+        sample = self._matches(query, 0, min(total, 500))
+        scale = total / len(sample) if sample else 0
+        result = {}
+        for spec in _fixture_facets(facets).split(','):
+            name, _, size = spec.partition(':')
+            if not name:
+                continue
+            counts = defaultdict(int)
+            for match in sample:
+                if name == 'country':
+                    value = match['location']['country_code']
+                elif name == 'city':
+                    value = match['location']['city']
+                else:
+                    value = match.get(name)
+                if value is not None:
+                    counts[value] += 1
+            top = sorted(counts.items(), key=lambda item: -item[1])[:int(size) if size.isdigit() else 5]
+            result[name] = [{'value': value, 'count': round(count * scale)} for value, count in top]
+        return result
+
+    # ── shodan.Shodan interface ──
+    def search(self, query, page=1, limit=None, offset=None, facets=None, minify=True, fields=None):
+        self._request('search')
+        response = self._fixture('search', query, str(page))
+        if response is None:
+            total = self._total(query)
+            start = offset if offset is not None else (page - 1) * SEARCH_PAGE_SIZE
+            stop = min(total, start + (limit or SEARCH_PAGE_SIZE))
+            response = {'total': total, 'matches': self._matches(query, start, max(start, stop))}
+            if facets:
+                response['facets'] = self._facets(query, facets)
+        cost = search_credit_cost(query, page)
+        with self._lock:
+            if cost > self.query_credits:
+                raise shodan.APIError('Insufficient query credits, please upgrade your API plan or wait for the monthly limit to reset')
+            self.query_credits -= cost
+        return response
+
+    def count(self, query, facets=None):
+        self._request('count')
+        response = self._fixture('count', query, _fixture_facets(facets))
+        if response is None:
+            response = {'total': self._total(query), 'matches': [], 'facets': self._facets(query, facets)}
+        return response
+
+    def info(self):
+        self._request('info')
+        info = dict(self.fixtures.get('info') or {'plan': 'local', 'unlocked': True, 'https': False, 'telnet': False})
+        info.update(query_credits=self.query_credits, scan_credits=self.scan_credits)
+        return info
+
+    def ports(self):
+        self._request('ports')
+        return list(self.fixtures.get('ports') or FAKE_PORTS)
+
+    def protocols(self):
+        self._request('protocols')
+        return dict(self.fixtures.get('protocols') or FAKE_PROTOCOLS)
+
+    def scan(self, ips, force=False):
+        self._request('scan')
+        if isinstance(ips, str):
+            ips = [ips]
+        try:
+            count = sum(ipaddress.ip_network(ip.strip(), strict=False).num_addresses for ip in ips)
+        except ValueError as e:
+            raise shodan.APIError(f"Invalid IP or network: {e}")
+        with self._lock:
+            if count > self.scan_credits:
+                raise shodan.APIError('Insufficient scan credits, please upgrade your API plan')
+            self.scan_credits -= count
+            scan_id = hashlib.sha1(f"{self.seed}|{len(self._scans)}|{ips}".encode()).hexdigest()[:16].upper()
+            self._scans[scan_id] = {'started': time.monotonic(), 'count': count}
+        return {'id': scan_id, 'count': count, 'credits_left': self.scan_credits}
+
+    def scan_status(self, scan_id):
+        self._request('scan_status')
+        scan = self._scans.get(scan_id)
+        if scan is None:
+            raise shodan.APIError('Scan not found')
+        elapsed = time.monotonic() - scan['started']
+        step = int(elapsed / self.scan_seconds * (len(FAKE_SCAN_STATES) - 1)) if self.scan_seconds else len(FAKE_SCAN_STATES)
+        status = FAKE_SCAN_STATES[min(step, len(FAKE_SCAN_STATES) - 1)]
+        return {'id': scan_id, 'count': scan['count'], 'status': status,
+                'created': datetime.now().isoformat()}
+
+    def create_alert(self, name, ip, expires=0):
+        self._request('create_alert')
+        if isinstance(ip, dict):
+            ip = ip.get('ip')
+        ips = [ip] if isinstance(ip, str) else list(ip or [])
+        with self._lock:
+            alert_id = hashlib.sha1(f"{self.seed}|{len(self._alerts)}|{name}".encode()).hexdigest()[:16].upper()
+            self._alerts[alert_id] = {'id': alert_id, 'name': name, 'filters': {'ip': ','.join(ips)},
+                                      'created': datetime.now().isoformat(), 'expires': expires}
+        return dict(self._alerts[alert_id])
+
+    def alerts(self, aid=None, include_expired=True):
+        self._request('alerts')
+        if aid:
+            return self._alert(aid)
+        return [dict(alert) for alert in self._alerts.values()]
+
+    def _alert(self, aid):
+        alert = self._alerts.get(aid)
+        if alert is None:
+            raise shodan.APIError('Alert not found')
+        return dict(alert)
+
+    def alert_info(self, aid):
+        """Alert details plus the synthetic hosts matched in its range"""
+        self._request('alert_info')
+        alert = self._alert(aid)
+        matches = []
+        for net in alert['filters']['ip'].split(','):
+            if net:
+                query = f"net:{net}"
+                matches.extend(self._matches(query, 0, self._total(query)))
+        alert.update(matches=matches, size=len(matches))
+        return alert
+
+    def delete_alert(self, aid):
+        self._request('delete_alert')
+        with self._lock:
+            if self._alerts.pop(aid, None) is None:
+                raise shodan.APIError('Alert not found')
+        return {'success': True}
+
+# ── Local HTTP stand-in ──────────────────────────────────────────────────
+# The same stand-in behind real sockets: api.shodan.io's REST routes over
+# HTTP/1.1 with keep-alive, so HTTP clients (AsyncShodanAPI, or
+# shodan.Shodan with base_url pointed here) can be exercised and
+# benchmarked without the network.
+
+class _LocalShodanHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'     # keep connections open between requests
+    _ALERT_INFO = re.compile(r'^/shodan/alert/(\w+)/info$')
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self._dispatch('GET')
+
+    def do_POST(self):
+        self._dispatch('POST')
+
+    def _params(self, method):
+        url = urlsplit(self.path)
+        params = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        if method == 'POST':
+            length = int(self.headers.get('Content-Length') or 0)
+            form = parse_qs(self.rfile.read(length).decode('utf-8'))
+            params.update({name: values[-1] for name, values in form.items()})
+        return url.path, params
+
+    def _route(self, method, path, params):
+        api = self.server.api
+        if path == '/api-info':
+            return api.info()
+        if path == '/shodan/host/search':
+            return api.search(params.get('query', ''), page=int(params.get('page', 1)), facets=params.get('facets'))
+        if path == '/shodan/host/count':
+            return api.count(params.get('query', ''), facets=params.get('facets'))
+        if path == '/shodan/ports':
+            return api.ports()
+        if path == '/shodan/protocols':
+            return api.protocols()
+        if path == '/shodan/scan' and method == 'POST':
+            ips = params.get('ips', '')
+            ips = list(json.loads(ips)) if ips.startswith('{') else ips.split(',')
+            return api.scan(ips, force=params.get('force') == 'True')
+        if path.startswith('/shodan/scan/'):
+            return api.scan_status(path.rsplit('/', 1)[1])
+        if path == '/shodan/alert/info':
+            return api.alerts()
+        alert = self._ALERT_INFO.match(path)
+        if alert:
+            return api.alerts(aid=alert.group(1))
+        return None
+
+    def _dispatch(self, method):
+        path, params = self._params(method)
+        status = 200
+        try:
+            body = self._route(method, path, params)
+            if body is None:
+                status, body = 404, {'error': 'No information available for that endpoint'}
+        except shodan.APIError as e:
+            status = getattr(e, 'status', None) or (429 if is_rate_limit_error(e) else 400)
+            body = {'error': str(e)}
+        payload = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+class LocalShodanHTTPServer(ThreadingHTTPServer):
+    """Serves a LocalShodanAPI on 127.0.0.1 (an ephemeral port by default)
+    from a background thread; connections counts accepted sockets"""
+    daemon_threads = True
+
+    def __init__(self, api, host='127.0.0.1', port=0):
+        super().__init__((host, port), _LocalShodanHandler)
+        self.api = api
+        self.connections = 0
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, name='local-shodan-http', daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+# ╔═══════════════════════════════════════════════════════════════════╗
+# ║                      ASYNC API CLIENT                             ║
+# ╚═══════════════════════════════════════════════════════════════════╝
+# Coroutine versions of the API calls the tool makes, on asyncio streams
+# with a pool of keep-alive connections: many queries overlap on one event
+# loop instead of a thread each. Calls share the process-wide rate
+# limiter, retry like RateLimitedAPI and are traced as api.<method> spans.
+
+SHODAN_API_URL = 'https://api.shodan.io'
+ASYNC_POOL_SIZE = 8                   # keep-alive connections per client
+ASYNC_TIMEOUT = 30.0                  # seconds per request (connect + response)
+
+def shodan_facet_string(facets):
+    """'country:10,org' from a facet string or a list of names / (name, size) pairs"""
+    if isinstance(facets, str):
+        return facets
+    return ','.join(facet if isinstance(facet, str) else f"{facet[0]}:{facet[1]}" for facet in facets)
+
+class AsyncConnectionPool:
+    """HTTP/1.1 keep-alive connections to one host. At most size requests
+    are in flight; idle connections are reused, and a reused connection
+    the server has closed in the meantime is replaced once."""
+    def __init__(self, base_url, size=ASYNC_POOL_SIZE, timeout=ASYNC_TIMEOUT):
+        url = urlsplit(base_url)
+        self.host = url.hostname
+        self.port = url.port or (443 if url.scheme == 'https' else 80)
+        self.ssl = ssl.create_default_context() if url.scheme == 'https' else None
+        self.prefix = url.path.rstrip('/')
+        self.size = size
+        self.timeout = timeout
+        self.opened = 0                   # connections opened so far
+        self.requests = 0
+        self._idle = []
+        self._slots = None                # created on first use, inside the running loop
+
+    async def _connect(self):
+        connection = await asyncio.open_connection(self.host, self.port, ssl=self.ssl)
+        self.opened += 1
+        return connection
+
+    async def request(self, method, target, body=None, headers=None):
+        """Send one request; returns (status, lowercase headers, body bytes)"""
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.size)
+        async with self._slots:
+            for attempt in (0, 1):
+                reused = bool(self._idle)
+                connection = self._idle.pop() if reused else await asyncio.wait_for(self._connect(), self.timeout)
+                try:
+                    status, response_headers, payload = await asyncio.wait_for(
+                        self._exchange(connection, method, target, body, headers), self.timeout)
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    connection[1].close()
+                    if reused and attempt == 0:
+                        continue          # stale keep-alive connection: retry on a fresh one
+                    raise
+                except BaseException:
+                    connection[1].close()
+                    raise
+                if response_headers.get('connection', '').lower() == 'close':
+                    connection[1].close()
+                else:
+                    self._idle.append(connection)
+                self.requests += 1
+                return status, response_headers, payload
+
+    async def _exchange(self, connection, method, target, body, headers):
+        reader, writer = connection
+        body = body or b''
+        lines = [f"{method} {self.prefix}{target} HTTP/1.1", f"Host: {self.host}", "Connection: keep-alive",
+                 "Accept: application/json", "Accept-Encoding: gzip", f"Content-Length: {len(body)}"]
+        lines += [f"{name}: {value}" for name, value in (headers or {}).items()]
+        writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + body)
+        await writer.drain()
+
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionResetError('connection closed by server')
+        status = int(status_line.split()[1])
+        response_headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            response_headers[name.strip().lower()] = value.strip()
+
+        if response_headers.get('transfer-encoding', '').lower() == 'chunked':
+            chunks = []
+            while True:
+                size = int((await reader.readline()).split(b';')[0], 16)
+                if not size:
+                    break
+                chunks.append(await reader.readexactly(size))
+                await reader.readexactly(2)
+            while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+                pass                      # trailers
+            payload = b''.join(chunks)
+        elif 'content-length' in response_headers:
+            payload = await reader.readexactly(int(response_headers['content-length']))
+        else:
+            payload = await reader.read()  # body runs to the end of the connection
+            response_headers['connection'] = 'close'
+        return status, response_headers, payload
+
+    async def close(self):
+        idle, self._idle = self._idle, []
+        for _, writer in idle:
+            writer.close()
+        for _, writer in idle:
+            with contextlib.suppress(Exception):
+                await writer.wait_closed()
+
+class AsyncShodanAPI:
+    """Coroutine counterpart of shodan.Shodan for search, count, info,
+    ports, protocols, scan, scan_status and alerts. Errors are raised as
+    shodan.APIError with the API's messages, like the blocking client.
+    Use as `async with AsyncShodanAPI(key) as api:` or await close()."""
+    def __init__(self, api_key, base_url=None, pool_size=ASYNC_POOL_SIZE, timeout=ASYNC_TIMEOUT,
+                 limiter=None, attempts=RETRY_ATTEMPTS, recorder=None):
+        self.api_key = api_key
+        self.base_url = base_url or os.environ.get('SHODAN_API_URL') or SHODAN_API_URL
+        self.pool = AsyncConnectionPool(self.base_url, pool_size, timeout)
+        self.limiter = limiter or AdaptiveRateLimiter(SHODAN_RATE_LIMIT, plan_aware=True)
+        self.attempts = attempts
+        self.recorder = recorder or PERF
+        self._rng = random.Random()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self):
+        await self.pool.close()
+
+    async def _send(self, method, path, params):
+        """One HTTP round trip; returns (decoded JSON, bytes received)"""
+        query = dict(params, key=self.api_key)
+        if method == 'POST':
+            target, body = path, urlencode(query).encode('utf-8')
+            headers = {'Content-Type': 'application/x-www-form-urlencoded'}
+        else:
+            target, body, headers = f"{path}?{urlencode(query)}", None, None
+        try:
+            status, response_headers, payload = await self.pool.request(method, target, body, headers)
+        except (OSError, EOFError, asyncio.TimeoutError):
+            raise api_error(NO_RESPONSE_ERROR)
+        if 300 <= status < 400:
+            raise api_error(f"Unexpected redirect ({status}) to {response_headers.get('location', '?')}", status)
+        if status == 403:
+            raise api_error('Access denied (403 Forbidden)', status)
+        if status == 502:
+            raise api_error('Bad Gateway (502)', status)
+        try:
+            if response_headers.get('content-encoding', '').lower() == 'gzip':
+                data = json.loads(gzip.decompress(payload))
+            else:
+                data = json.loads(payload)
+        except (ValueError, OSError, EOFError):
+            if status == 401:
+                raise api_error('Invalid API key', status)
+            raise api_error('Unable to parse JSON response', status)
+        if isinstance(data, dict) and 'error' in data:
+            raise api_error(data['error'], status)
+        return data, len(payload)
+
+    async def _request(self, name, path, params=None, method='GET', label='', credits=0):
+        """Rate-limited, retried and traced call: each attempt is an api.<name>
+        span; token waits and backoff sleeps get ratelimit.* spans"""
+        for attempt in range(self.attempts + 1):
+            started = time.perf_counter()
+            if await self.limiter.acquire_async() > 0:
+                self.recorder.add(PerfSpan('ratelimit.wait', name, {}), started)
+            span = PerfSpan(f"api.{name}", label, {})
+            started = time.perf_counter()
+            try:
+                data, span.bytes = await self._send(method, path, params or {})
+            except Exception as e:
+                span.error = type(e).__name__
+                self.recorder.add(span, started)
+                if attempt == self.attempts or not is_retryable(name, e):
+                    raise
+                if is_rate_limit_error(e):
+                    self.limiter.on_rate_limited()
+                backoff = PerfSpan('ratelimit.backoff', name, {'attempt': attempt + 1, 'cause': str(e)[:80]})
+                backoff.retries = 1
+                started = time.perf_counter()
+                await asyncio.sleep(self._rng.uniform(0, min(RETRY_MAX_DELAY, self.limiter.backoff_base() * 2 ** attempt)))
+                self.recorder.add(backoff, started)
+                continue
+            except BaseException as e:
+                span.error = type(e).__name__
+                self.recorder.add(span, started)
+                raise
+            span.credits = credits
+            self.recorder.add(span, started)
+            self.limiter.on_success()
+            return data
+
+    async def search(self, query, page=1, facets=None, minify=True):
+        params = {'query': query, 'page': page, 'minify': minify}
+        if facets:
+            params['facets'] = shodan_facet_string(facets)
+        return await self._request('search', '/shodan/host/search', params, label=query,
+                                   credits=search_credit_cost(query, page))
+
+    async def count(self, query, facets=None):
+        params = {'query': query}
+        if facets:
+            params['facets'] = shodan_facet_string(facets)
+        return await self._request('count', '/shodan/host/count', params, label=query)
+
+    async def info(self):
+        info = await self._request('info', '/api-info')
+        if self.limiter.plan_aware and isinstance(info, dict):
+            self.limiter.configure_for_plan(info.get('plan'))
+        return info
+
+    async def ports(self):
+        return await self._request('ports', '/shodan/ports')
+
+    async def protocols(self):
+        return await self._request('protocols', '/shodan/protocols')
+
+    async def scan(self, ips, force=False):
+        if isinstance(ips, str):
+            ips = [ips]
+        networks = json.dumps(ips) if isinstance(ips, dict) else ','.join(ips)
+        return await self._request('scan', '/shodan/scan', {'ips': networks, 'force': force}, method='POST')
+
+    async def scan_status(self, scan_id):
+        return await self._request('scan_status', f"/shodan/scan/{scan_id}", label=scan_id)
+
+    async def alerts(self, aid=None, include_expired=True):
+        path = f"/shodan/alert/{aid}/info" if aid else '/shodan/alert/info'
+        return await self._request('alerts', path, {'include_expired': include_expired}, label=aid or '')
+
+def api_event_loop():
+    """The process's API event loop, running on one background thread:
+    category queries, batch queries and scan polling all overlap on it"""
+    global _api_loop
+    with _api_loop_lock:
+        if _api_loop is None:
+            _api_loop = asyncio.new_event_loop()
+            threading.Thread(target=_api_loop.run_forever, name='shodan-async', daemon=True).start()
+    return _api_loop
+
+def run_on_api_loop(coroutine):
+    """Schedule a coroutine on the API event loop; returns a
+    concurrent.futures.Future (result(), cancel(), as_completed all work)"""
+    return asyncio.run_coroutine_threadsafe(coroutine, api_event_loop())
+
+def uses_proxy(url):
+    """True if requests (and so shodan.Shodan) would reach url through an
+    HTTP(S) proxy from the environment"""
+    parts = urlsplit(url)
+    return bool(urllib.request.getproxies().get(parts.scheme)) and not urllib.request.proxy_bypass(parts.hostname)
+
+def open_async_api(api_key, pool_size=ASYNC_POOL_SIZE):
+    """The process's AsyncShodanAPI for the configured backend, sharing the
+    process-wide rate limiter; use it on api_event_loop(). The fake
+    backend is served over local HTTP so the async client runs over real
+    connections. Returns None when the API is behind an HTTP(S) proxy,
+    which AsyncShodanAPI can't tunnel through: callers then fall back to
+    the blocking client."""
+    global _local_http, _rate_limiter, _async_api
+    if _async_api is not None and _async_api.api_key == api_key:
+        return _async_api
+    base_url = None
+    local = None
+    if _api_backend == 'fake':
+        local = _local_backend()
+        if _local_http is None:
+            _local_http = LocalShodanHTTPServer(local).start()
+        base_url = _local_http.url
+    elif uses_proxy(os.environ.get('SHODAN_API_URL') or SHODAN_API_URL):
+        return None
+    if _rate_limiter is None:
+        _rate_limiter = _make_rate_limiter(local)
+    close_async_api()
+    _async_api = AsyncShodanAPI(api_key, base_url=base_url, pool_size=pool_size, limiter=_rate_limiter)
+    return _async_api
+
+def close_async_api():
+    """Close the shared async client's connections (run at exit)"""
+    global _async_api
+    if _async_api is not None and _api_loop is not None:
+        with contextlib.suppress(Exception):
+            run_on_api_loop(_async_api.close()).result(timeout=5)
+    _async_api = None
+
+async def gather_counts(api, queries, facets=None):
+    """Run count queries concurrently; {query: response, or the APIError it raised}"""
+    responses = await asyncio.gather(*(api.count(query, facets=facets) for query in queries),
+                                     return_exceptions=True)
+    for response in responses:
+        if isinstance(response, BaseException) and not isinstance(response, Exception):
+            raise response
+    return dict(zip(queries, responses))
+
 # ╔═══════════════════════════════════════════════════════════════════╗
 # ║                   COUNTRY SELECTION                               ║
 # ╚═══════════════════════════════════════════════════════════════════╝
@@ -263,6 +1556,20 @@ def load_countries():
         print_status('error', f"Error loading config: {Colors.RED}{e}{Colors.END}")
         sys.exit(1)
 
+_COUNTRY_NAMES = {}
+
+def country_name_for_code(code):
+    """Map a 2-letter country code (as returned by Shodan facets) to the
+    display name from countries.json, falling back to the code itself"""
+    if not _COUNTRY_NAMES:
+        try:
+            with open('countries.json', 'r') as f:
+                countries = json.load(f).get('countries', {})
+            _COUNTRY_NAMES.update({c: name for name, c in countries.items()})
+        except Exception:
+            _COUNTRY_NAMES['MA'] = 'Morocco'
+    return _COUNTRY_NAMES.get(code, code)
+
 def display_country_menu(countries):
     """Display country selection menu"""
     print(f"\n{Colors.BOLD}{Colors.CYAN}╔═══════════════════════════════════════════════════════════╗{Colors.END}")
@@ -364,7 +1671,7 @@ def print_banner():
     print(f"{Colors.DIM}• This tool performs PASSIVE reconnaissance only{Colors.END}")
     print(f"{Colors.DIM}• Use RESPONSIBLY and ETHICALLY{Colors.END}\n")
     
-    time.sleep(1)
+    pause(1)
     
     print(f"{Colors.CYAN}[{datetime.now().strftime('%H:%M:%S')}]{Colors.END} {Colors.GREEN}System initialized{Colors.END}")
     print(f"{Colors.CYAN}[{datetime.now().strftime('%H:%M:%S')}]{Colors.END} {Colors.GREEN}Reconnaissance mode: {Colors.YELLOW}PASSIVE{Colors.END}")
@@ -378,6 +1685,244 @@ def print_banner():
 # ║                    SCAN DATA STORAGE                              ║
 # ╚═══════════════════════════════════════════════════════════════════╝
 
+# Fields of one device record, in export order
+DEVICE_FIELDS = ('ip', 'port', 'product', 'version', 'country', 'city', 'org', 'isp', 'timestamp')
+
+# Low-cardinality fields stored as integer codes into a shared value table
+_ENCODED_FIELDS = ('port', 'product', 'version', 'country', 'city', 'org', 'isp')
+
+class ValueTable:
+    """Dictionary encoding for one column: each distinct value is stored
+    once and rows hold its integer code"""
+    __slots__ = ('values', '_codes')
+
+    def __init__(self):
+        self.values = []
+        self._codes = {}
+
+    def encode(self, value):
+        """Code for value, adding it to the table on first use"""
+        key = (type(value), value)       # keep 443 and '443' distinct
+        code = self._codes.get(key)
+        if code is None:
+            code = self._codes[key] = len(self.values)
+            self.values.append(value)
+        return code
+
+class DeviceRecord:
+    """Read-only view of one row in a DeviceStore. Behaves like the old
+    per-device dict for readers: record['ip'], record.get('org', 'N/A')."""
+    __slots__ = ('_store', '_row')
+
+    def __init__(self, store, row):
+        self._store = store
+        self._row = row
+
+    def get(self, key, default=None):
+        value = self._store.value(self._row, key)
+        return default if value is None else value
+
+    def __getitem__(self, key):
+        if key not in DEVICE_FIELDS:
+            raise KeyError(key)
+        return self._store.value(self._row, key)
+
+    def __contains__(self, key):
+        return key in DEVICE_FIELDS
+
+    def keys(self):
+        return DEVICE_FIELDS
+
+    def items(self):
+        return [(key, self[key]) for key in DEVICE_FIELDS]
+
+    def to_dict(self):
+        """Plain dict copy of this record"""
+        return dict(self.items())
+
+    def __repr__(self):
+        return f"DeviceRecord({self.to_dict()!r})"
+
+class DeviceStore:
+    """Column-oriented device list for one category. IPv4 addresses are
+    packed into 4-byte ints, repeated strings (country, org, product...)
+    are dictionary-encoded, and rows are only materialized as
+    DeviceRecord views on access. Supports len(), iteration, indexing and
+    slicing like the list of dicts it replaces."""
+    def __init__(self, tables=None):
+        self.tables = tables if tables is not None else {field: ValueTable() for field in _ENCODED_FIELDS}
+        self._ips = array('I')
+        self._ip_other = {}              # row → IPv6 / unparsable address
+        self._codes = {field: array('I') for field in _ENCODED_FIELDS}
+        self._timestamps = []
+
+    def append(self, device):
+        """Add a device (any mapping with .get, e.g. a dict or DeviceRecord)"""
+        ip = device.get('ip')
+        try:
+            packed = int(ipaddress.IPv4Address(ip))
+        except (ipaddress.AddressValueError, ValueError, TypeError):
+            packed = 0
+            self._ip_other[len(self._ips)] = ip
+        self._ips.append(packed)
+        for field in _ENCODED_FIELDS:
+            self._codes[field].append(self.tables[field].encode(device.get(field)))
+        self._timestamps.append(device.get('timestamp'))
+
+    def extend(self, devices):
+        for device in devices:
+            self.append(device)
+
+    def value(self, row, field):
+        """Decoded value of one field in one row"""
+        if field == 'ip':
+            if row in self._ip_other:
+                return self._ip_other[row]
+            return str(ipaddress.IPv4Address(self._ips[row]))
+        if field == 'timestamp':
+            return self._timestamps[row]
+        return self.tables[field].values[self._codes[field][row]]
+
+    def column(self, field):
+        """Decoded values of one field for every row"""
+        if field == 'ip':
+            return [self.value(row, 'ip') for row in range(len(self._ips))]
+        if field == 'timestamp':
+            return list(self._timestamps)
+        values = self.tables[field].values
+        return [values[code] for code in self._codes[field]]
+
+    def codes(self, field):
+        """Dictionary codes of an encoded field (array('I'), one per row)"""
+        return self._codes[field]
+
+    def packed_ips(self):
+        """IP column with IPv4 addresses as ints and any others as strings"""
+        ips = self._ips.tolist()
+        for row, ip in self._ip_other.items():
+            ips[row] = ip
+        return ips
+
+    def timestamps(self):
+        """Timestamp column (raw strings as reported by Shodan)"""
+        return self._timestamps
+
+    def to_list(self):
+        """Materialize as a list of plain dicts (for JSON export)"""
+        return [record.to_dict() for record in self]
+
+    def __len__(self):
+        return len(self._ips)
+
+    def __bool__(self):
+        return len(self._ips) > 0
+
+    def __iter__(self):
+        for row in range(len(self._ips)):
+            yield DeviceRecord(self, row)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [DeviceRecord(self, row) for row in range(*index.indices(len(self._ips)))]
+        if index < 0:
+            index += len(self._ips)
+        if not 0 <= index < len(self._ips):
+            raise IndexError('device index out of range')
+        return DeviceRecord(self, index)
+
+class HostRecord:
+    """One IP merged across every category and port it was seen on"""
+    __slots__ = ('ip', 'categories', 'ports', 'services', 'org', 'isp', 'country', 'city')
+
+    def __init__(self, ip):
+        self.ip = ip
+        self.categories = []             # in first-seen order
+        self.ports = set()
+        self.services = []               # (category, port, product, version)
+        self.org = self.isp = self.country = self.city = None
+
+    def to_dict(self):
+        return {
+            'ip': self.ip,
+            'categories': list(self.categories),
+            'ports': sorted(self.ports, key=str),
+            'products': sorted({service[2] for service in self.services if service[2]}),
+            'org': self.org, 'isp': self.isp, 'country': self.country, 'city': self.city,
+        }
+
+class HostIndex:
+    """Device rows merged by IP: the same host matched by several
+    categories (e.g. a Siemens PLC on port 502 in both Industrial IoT and
+    SCADA/ICS) becomes one HostRecord, so counts, exports and active
+    probing work on unique hosts."""
+    def __init__(self):
+        self.hosts = {}                  # ip → HostRecord
+        self.rows = 0
+
+    @classmethod
+    def from_scan_data(cls, scan_data):
+        index = cls()
+        for category, data in scan_data.categories.items():
+            for device in data['devices']:
+                index.add(category, device)
+        return index
+
+    def add(self, category, device):
+        """Merge one device row"""
+        self.rows += 1
+        ip = device.get('ip')
+        if not ip:
+            return None
+        host = self.hosts.get(ip)
+        if host is None:
+            host = self.hosts[ip] = HostRecord(ip)
+        if category not in host.categories:
+            host.categories.append(category)
+        port = device.get('port')
+        if port is not None:
+            host.ports.add(port)
+        service = (category, port, device.get('product'), device.get('version'))
+        if service not in host.services:
+            host.services.append(service)
+        for field in ('org', 'isp', 'country', 'city'):
+            if getattr(host, field) is None:
+                setattr(host, field, device.get(field))
+        return host
+
+    def get(self, ip):
+        return self.hosts.get(ip)
+
+    def __len__(self):
+        return len(self.hosts)
+
+    def __iter__(self):
+        return iter(self.hosts.values())
+
+    def __contains__(self, ip):
+        return ip in self.hosts
+
+    def multi_category(self):
+        """Hosts matched by more than one category"""
+        return [host for host in self.hosts.values() if len(host.categories) > 1]
+
+    def overlaps(self):
+        """{(category a, category b): hosts in both}, most shared first"""
+        pairs = defaultdict(int)
+        for host in self.multi_category():
+            names = host.categories
+            for i, a in enumerate(names):
+                for b in names[i + 1:]:
+                    pairs[tuple(sorted((a, b)))] += 1
+        return dict(sorted(pairs.items(), key=lambda item: -item[1]))
+
+    def unique_per_category(self):
+        """{category: distinct IPs}"""
+        counts = defaultdict(int)
+        for host in self.hosts.values():
+            for category in host.categories:
+                counts[category] += 1
+        return dict(counts)
+
 class ScanData:
     """Store detailed scan results"""
     def __init__(self, country_code=None, country_name=None):
@@ -385,380 +1930,1373 @@ class ScanData:
         self.country_code = country_code
         self.country_name = country_name if country_name else "Global"
         self.categories = {}
+        self.facets = {}
         self.detailed_results = []
+        self.sink = None                 # optional scan-time writer (e.g. CsvSink)
+        self.chart_cache = None          # (ChartModel key, rendered charts), see get_rendered_charts
+        # Value tables shared by every category's DeviceStore
+        self._tables = {field: ValueTable() for field in _ENCODED_FIELDS}
+        self._host_index = None          # (device rows indexed, HostIndex), see host_index
 
     def add_category(self, category_name, total_count):
         """Add category statistics"""
         self.categories[category_name] = {
             'count': total_count,
-            'devices': []
+            'devices': DeviceStore(self._tables)
         }
 
     def add_device(self, category_name, device_info):
         """Add detailed device information"""
         if category_name in self.categories:
             self.categories[category_name]['devices'].append(device_info)
-
-    def to_dict(self):
-        """Convert to dictionary for export"""
+            if self.sink is not None:
+                self.sink.write_device(category_name, device_info)
+
+    def is_complete(self, category_name):
+        """True when every match Shodan reported for the category was stored
+        (not just the first page or the device_limit sample)"""
+        data = self.categories[category_name]
+        return len(data['devices']) >= data['count']
+
+    def attach_sink(self, sink):
+        """Send every stored device to sink as well (write_device/category_done)"""
+        self.sink = sink
+
+    def finish_category(self, category_name):
+        """Mark a category as fully collected"""
+        if self.sink is not None:
+            self.sink.category_done(self, category_name)
+
+    def host_index(self):
+        """HostIndex over every collected device, rebuilt only after new devices arrive"""
+        rows = sum(len(data['devices']) for data in self.categories.values())
+        if self._host_index is None or self._host_index[0] != rows:
+            self._host_index = (rows, HostIndex.from_scan_data(self))
+        return self._host_index[1]
+
+    def add_facets(self, category_name, facets):
+        """Store server-side facet aggregates ({facet: [{'value', 'count'}, ...]})"""
+        if facets:
+            self.facets[category_name] = facets
+
+    def header(self):
+        """Scan-level metadata (the export fields that precede categories)"""
         return {
             'scan_timestamp': self.timestamp.isoformat(),
             'scan_date': self.timestamp.strftime('%Y-%m-%d'),
             'scan_time': self.timestamp.strftime('%H:%M:%S'),
             'target_country': self.country_name,
             'country_code': self.country_code,
-            'total_devices': sum(cat['count'] for cat in self.categories.values()),
-            'categories': self.categories
+            'total_devices': sum(cat['count'] for cat in self.categories.values())
         }
 
+    def to_dict(self):
+        """Convert to dictionary for export"""
+        data = self.header()
+        data['categories'] = {name: dict(cat, devices=cat['devices'].to_list())
+                              for name, cat in self.categories.items()}
+        data['facets'] = self.facets
+        return data
+
 # ╔═══════════════════════════════════════════════════════════════════╗
-# ║                      SCAN FUNCTIONS                               ║
+# ║                    CATEGORY REGISTRY                              ║
 # ╚═══════════════════════════════════════════════════════════════════╝
 
+# Display style for each risk level: (header label, accent color)
+_RISK_STYLES = {
+    'CRITICAL': ('CRITICAL ⚠️⚠️⚠️', Colors.RED),
+    'HIGH':     ('HIGH ⚠️⚠️', Colors.ORANGE),
+    'MEDIUM':   ('MEDIUM ⚠️', Colors.YELLOW),
+}
+
+def build_query(base_query, country_code=None):
+    """Append the country filter to a base query"""
+    if country_code:
+        return f'{base_query} country:{country_code}'
+    return base_query
+
 def scan_header(scan_num, total, title, risk_level, risk_color):
     """Print scan header"""
     print_separator('─', 70, Colors.DIM)
     print(f"\n{Colors.BOLD}{Colors.WHITE}[SCAN {scan_num}/{total}]{Colors.END} {Colors.CYAN}►{Colors.END} {Colors.BOLD}{risk_color}{title}{Colors.END}")
     print(f"{Colors.YELLOW}Risk Level: {risk_color}{risk_level}{Colors.END}\n")
 
-def scan_smart_home_devices(api, country_code=None, scan_data=None, verbose=False):
-    """Scan for smart home appliances"""
-    scan_header(1, 6, "SMART HOME APPLIANCES & CONSUMER IoT", "HIGH ⚠️⚠️", Colors.ORANGE)
-
-    query = '"smart home" port:80,8080,443'
-    if country_code:
-        query += f' country:{country_code}'
-    print_status('scan', f"Query: {Colors.CYAN}{query}{Colors.END}")
-    loading_animation("Querying Shodan database", 1.5)
-
-    try:
-        results = api.search(query)
-        total = results['total']
+class ScanCategory:
+    """Declarative description of one Query Mode category.
+
+    Everything that differs between categories lives here — the query,
+    default port, risk level, verification prober and display renderer —
+    so a single executor can run, batch and parallelize all of them."""
+    def __init__(self, name, title, query, risk_level, renderer=None,
+                 port=None, product_fallback='Unknown', prober=None,
+                 device_limit=3, found_text=None, risk_note=('Risk', 'Exposed management interfaces'),
+                 count_color=None, loading_text='Querying Shodan database', loading_time=1.5,
+                 sample_title=None, sample_label='[{i}]', sample_target='{ip}:{port}',
+                 sample_fields=None, sectors=None):
+        self.name = name
+        self.title = title
+        self.query = query
+        self.risk_level = risk_level if risk_level in _RISK_STYLES else 'MEDIUM'
+        self.risk_label, self.risk_color = _RISK_STYLES[self.risk_level]
+        self.renderer = renderer or render_exposures
+        self.port = port                      # None → use the port reported by Shodan
+        self.product_fallback = product_fallback
+        self.prober = prober                  # protocol label in _PROTOCOL_PROBERS, or None
+        self.device_limit = device_limit      # matches stored per category in verbose mode
+        self.found_text = found_text or f"Found {{total}} exposed {name} systems"
+        self.risk_note = risk_note
+        self.count_color = count_color or self.risk_color
+        self.loading_text = loading_text
+        self.loading_time = loading_time
+        self.sample_title = sample_title or f"{name} Exposures"
+        self.sample_label = sample_label
+        self.sample_target = sample_target
+        self.sample_fields = sample_fields or [('Organization', 'org', Colors.CYAN),
+                                               ('Country', 'country', Colors.YELLOW)]
+        self.sectors = sectors or []
+
+    def build_query(self, country_code=None):
+        """Full Shodan query for this category"""
+        return build_query(self.query, country_code)
+
+    def device_info(self, result):
+        """Normalize a Shodan match into the ScanData device record"""
+        location = result.get('location', {})
+        return {
+            'ip': result['ip_str'],
+            'port': self.port if self.port is not None else result.get('port', 'N/A'),
+            'product': result.get('product', self.product_fallback),
+            'version': result.get('version', 'Unknown'),
+            'country': location.get('country_name', 'Unknown'),
+            'city': location.get('city', 'Unknown'),
+            'org': result.get('org', 'Unknown'),
+            'isp': result.get('isp', 'Unknown'),
+            'timestamp': result.get('timestamp', 'Unknown')
+        }
 
-        print_status('found', f"Discovered {Colors.BOLD}{Colors.GREEN}{total:,}{Colors.END} exposed smart home devices globally")
-        print_status('warning', f"Risk: {Colors.RED}Unsecured management interfaces{Colors.END}")
+# ── Renderers ────────────────────────────────────────────────────────────
+# Each renderer prints the category-specific body after the common headline.
+# Results come either from api.search (with 'matches') or, in count-only
+# mode, from api.count (no matches, server-side 'facets' instead).
 
-        # Store in scan_data if provided
-        if scan_data:
-            scan_data.add_category("Smart Home Devices", total)
+def _facet_counts(results, facet, label=None):
+    """Return {value: count} for a facet in the results, or None if absent"""
+    buckets = results.get('facets', {}).get(facet)
+    if buckets is None:
+        return None
+    counts = defaultdict(int)
+    for bucket in buckets:
+        value = label(bucket['value']) if label else bucket['value']
+        counts[str(value)] += bucket['count']
+    return counts
+
+def _bar(count, scale, width):
+    """Distribution bar; scale is characters per unit"""
+    return '█' * min(int(count * scale), width)
+
+def render_exposures(category, results):
+    """Print the first three matches as an exposure tree (or the top
+    organizations when only facets are available)"""
+    matches = results.get('matches', [])
+    orgs = _facet_counts(results, 'org')
+    if not matches and orgs is not None:
+        print(f"\n{Colors.BOLD}{Colors.MAGENTA}Top Exposed Organizations:{Colors.END}")
+        for org, count in sorted(orgs.items(), key=lambda x: x[1], reverse=True)[:5]:
+            print(f"  {category.risk_color}►{Colors.END} {org[:40]:40s} {Colors.CYAN}{count:,}{Colors.END}")
+        return
 
-        # Count countries - INCREASED SAMPLE SIZE
+    print(f"\n{Colors.BOLD}{Colors.MAGENTA}{category.sample_title}:{Colors.END}")
+    for i, result in enumerate(matches[:3], 1):
+        device = category.device_info(result)
+        label = category.sample_label.format(i=i)
+        target = category.sample_target.format(ip=device['ip'], port=device['port'])
+        print(f"  {category.risk_color}{label}{Colors.END} {Colors.WHITE}{target}{Colors.END}")
+        for j, field in enumerate(category.sample_fields):
+            caption, key, color = field[:3]
+            value = field[3] if len(field) > 3 else device.get(key, 'Unknown')
+            branch = '└─' if j == len(category.sample_fields) - 1 else '├─'
+            print(f"      {branch} {caption}: {color}{value}{Colors.END}")
+
+def render_geo_distribution(category, results):
+    """Print geographic distribution (server-side facet, or the first 100
+    matches) plus a compact sample list"""
+    matches = results.get('matches', [])
+    countries = _facet_counts(results, 'country', label=country_name_for_code)
+    scale = 2
+    if countries is None:
         countries = defaultdict(int)
-        for result in results['matches'][:100]:
-            country = result.get('location', {}).get('country_name', 'Unknown')
-            countries[country] += 1
-
-            # Store detailed info if verbose mode
-            if scan_data and verbose:
-                device_info = {
-                    'ip': result['ip_str'],
-                    'port': result.get('port', 'N/A'),
-                    'product': result.get('product', 'Smart Home Device'),
-                    'version': result.get('version', 'Unknown'),
-                    'country': country,
-                    'city': result.get('location', {}).get('city', 'Unknown'),
-                    'org': result.get('org', 'Unknown'),
-                    'isp': result.get('isp', 'Unknown'),
-                    'timestamp': result.get('timestamp', 'Unknown')
-                }
-                scan_data.add_device("Smart Home Devices", device_info)
-
-        # Show geographic distribution (keep existing display logic)
-        morocco_count = countries.get('Morocco', 0)
-        print(f"\n{Colors.BOLD}{Colors.CYAN}Geographic Distribution:{Colors.END}")
-
-        if morocco_count > 0:
-            print(f"  {Colors.YELLOW}►{Colors.END} {'Morocco (Local)':20s} {Colors.YELLOW}{'█' * min(morocco_count * 2, 40)}{Colors.END} {morocco_count}")
-            other_countries = {k: v for k, v in countries.items() if k != 'Morocco'}
-            for country, count in sorted(other_countries.items(), key=lambda x: x[1], reverse=True)[:4]:
-                bar = '█' * min(count * 2, 40)
-                print(f"  {Colors.GREEN}►{Colors.END} {country:20s} {Colors.YELLOW}{bar}{Colors.END} {count}")
-        else:
-            for country, count in sorted(countries.items(), key=lambda x: x[1], reverse=True)[:5]:
-                bar = '█' * min(count * 2, 40)
-                print(f"  {Colors.GREEN}►{Colors.END} {country:20s} {Colors.YELLOW}{bar}{Colors.END} {count}")
-
-        print(f"\n{Colors.BOLD}{Colors.MAGENTA}Sample Devices:{Colors.END}")
-        for i, result in enumerate(results['matches'][:3], 1):
-            ip = result['ip_str']
-            product = result.get('product', 'Smart Home Device')
-            country = result.get('location', {}).get('country_name', 'Unknown')
-            print(f"  {Colors.YELLOW}[{i}]{Colors.END} {Colors.WHITE}{ip:15s}{Colors.END} │ {product:25s} │ {Colors.CYAN}{country}{Colors.END}")
-
-        return total
-    except Exception as e:
-        print_status('error', f"Scan failed: {e}")
-        return 0
+        for result in matches[:100]:
+            countries[result.get('location', {}).get('country_name', 'Unknown')] += 1
+    elif countries:
+        scale = 40 / max(countries.values())
+
+    morocco_count = countries.get('Morocco', 0)
+    print(f"\n{Colors.BOLD}{Colors.CYAN}Geographic Distribution:{Colors.END}")
+
+    if morocco_count > 0:
+        print(f"  {Colors.YELLOW}►{Colors.END} {'Morocco (Local)':20s} {Colors.YELLOW}{_bar(morocco_count, scale, 40)}{Colors.END} {morocco_count}")
+        other_countries = {k: v for k, v in countries.items() if k != 'Morocco'}
+        for country, count in sorted(other_countries.items(), key=lambda x: x[1], reverse=True)[:4]:
+            print(f"  {Colors.GREEN}►{Colors.END} {country:20s} {Colors.YELLOW}{_bar(count, scale, 40)}{Colors.END} {count}")
+    else:
+        for country, count in sorted(countries.items(), key=lambda x: x[1], reverse=True)[:5]:
+            print(f"  {Colors.GREEN}►{Colors.END} {country:20s} {Colors.YELLOW}{_bar(count, scale, 40)}{Colors.END} {count}")
 
-def scan_iot_cameras(api, country_code=None, scan_data=None, verbose=False):
-    """Scan for IoT cameras"""
-    scan_header(2, 6, "IoT CAMERAS & SURVEILLANCE SYSTEMS (RTSP)", "CRITICAL ⚠️⚠️⚠️", Colors.RED)
+    if not matches:
+        render_exposures(category, results)
+        return
 
-    query = 'port:554 "RTSP/1.0"'
-    if country_code:
-        query += f' country:{country_code}'
-    print_status('scan', f"Query: {Colors.CYAN}{query}{Colors.END}")
-    loading_animation("Scanning for RTSP streams", 1.5)
+    print(f"\n{Colors.BOLD}{Colors.MAGENTA}{category.sample_title}:{Colors.END}")
+    for i, result in enumerate(matches[:3], 1):
+        device = category.device_info(result)
+        print(f"  {Colors.YELLOW}[{i}]{Colors.END} {Colors.WHITE}{device['ip']:15s}{Colors.END} │ {device['product']:25s} │ {Colors.CYAN}{device['country']}{Colors.END}")
+
+def render_sector_exposures(category, results):
+    """Print the affected sectors, then the exposure tree"""
+    print(f"\n{Colors.BOLD}{Colors.RED}Potential Sectors Affected:{Colors.END}")
+    for sector, icon in category.sectors:
+        print(f"  {Colors.YELLOW}{icon}{Colors.END}  {sector}")
+    render_exposures(category, results)
+
+def _vendor_for_product(product):
+    """Bucket a Shodan product string into a known ICS vendor"""
+    product = (product or '').lower()
+    if 'siemens' in product:
+        return 'Siemens'
+    elif 'rockwell' in product or 'allen bradley' in product:
+        return 'Rockwell/Allen Bradley'
+    elif 'schneider' in product:
+        return 'Schneider Electric'
+    return 'Other'
+
+def render_vendor_exposures(category, results):
+    """Print vendor distribution (server-side product facet, or the first
+    20 matches), then the exposure tree"""
+    vendors = defaultdict(int)
+    products = _facet_counts(results, 'product')
+    scale = 2
+    if products is None:
+        for result in results.get('matches', [])[:20]:
+            vendors[_vendor_for_product(result.get('product', ''))] += 1
+    else:
+        for product, count in products.items():
+            vendors[_vendor_for_product(product)] += count
+        if vendors:
+            scale = 20 / max(vendors.values())
+
+    print(f"\n{Colors.BOLD}{Colors.CYAN}Vendor Distribution:{Colors.END}")
+    for vendor, count in sorted(vendors.items(), key=lambda x: x[1], reverse=True):
+        if count > 0:
+            print(f"  {Colors.GREEN}►{Colors.END} {vendor:30s} {Colors.YELLOW}{_bar(count, scale, 20)}{Colors.END} {count}")
+    render_exposures(category, results)
+
+# ── Registry ─────────────────────────────────────────────────────────────
+# Order here is the Query Mode scan/render order.
+
+CATEGORY_REGISTRY = [
+    ScanCategory(
+        'Smart Home Devices', "SMART HOME APPLIANCES & CONSUMER IoT",
+        '"smart home" port:80,8080,443', 'HIGH',
+        renderer=render_geo_distribution, product_fallback='Smart Home Device',
+        prober='HTTP', device_limit=100, count_color=Colors.GREEN,
+        found_text="Discovered {total} exposed smart home devices globally",
+        risk_note=('Risk', 'Unsecured management interfaces'),
+        sample_title='Sample Devices'),
+    ScanCategory(
+        'IoT Cameras', "IoT CAMERAS & SURVEILLANCE SYSTEMS (RTSP)",
+        'port:554 "RTSP/1.0"', 'CRITICAL',
+        port=554, product_fallback='RTSP Camera', prober='RTSP',
+        found_text="Found {total} exposed camera streams",
+        risk_note=('Risk', 'Unprotected video surveillance'),
+        loading_text="Scanning for RTSP streams",
+        sample_title='Live Stream Exposures', sample_target='rtsp://{ip}:{port}',
+        sample_fields=[('Organization', 'org', Colors.CYAN), ('Location', 'country', Colors.YELLOW)]),
+    ScanCategory(
+        'SCADA/ICS', "SCADA / INDUSTRIAL CONTROL SYSTEMS",
+        'port:502 "Modbus"', 'CRITICAL',
+        renderer=render_sector_exposures, port=502, product_fallback='Modbus SCADA', prober='Modbus',
+        found_text="Discovered {total} SCADA/ICS systems exposed",
+        risk_note=('Impact', 'Critical infrastructure'),
+        loading_text="Discovering critical infrastructure", loading_time=2,
+        sample_title='Critical Infrastructure Exposures', sample_label='[CRITICAL-{i}]',
+        sample_fields=[('Organization', 'org', Colors.CYAN), ('Country', 'country', Colors.YELLOW),
+                       ('Protocol', None, Colors.RED, 'Modbus (Industrial)')],
+        sectors=[("Manufacturing & Production", "⚙️"),
+                 ("Water Treatment Facilities", "💧"),
+                 ("Power Generation/Distribution", "⚡"),
+                 ("Building Automation Systems", "🏭")]),
+    ScanCategory(
+        'Building Automation', "BUILDING AUTOMATION SYSTEMS (BACnet)",
+        'port:47808 "BACnet"', 'HIGH',
+        port=47808, product_fallback='BACnet System', prober='BACnet',
+        found_text="Located {total} building automation systems",
+        risk_note=('Controls', 'HVAC, lighting, security'),
+        loading_text="Analyzing building automation protocols",
+        sample_title='Building System Exposures'),
+    ScanCategory(
+        'MQTT Brokers', "IoT MQTT MESSAGING BROKERS",
+        'port:1883 "mosquitto"', 'HIGH',
+        port=1883, product_fallback='MQTT Broker', prober='MQTT',
+        found_text="Found {total} exposed MQTT brokers",
+        risk_note=('Risk', 'IoT device communication interception'),
+        loading_text="Discovering IoT messaging infrastructure",
+        sample_title='MQTT Broker Exposures',
+        sample_fields=[('Version', 'product', Colors.CYAN), ('Country', 'country', Colors.YELLOW)]),
+    ScanCategory(
+        'Industrial IoT', "INDUSTRIAL IoT GATEWAYS & AUTOMATION",
+        '"Industrial IoT" OR "IIoT Gateway" OR "Siemens" OR "Allen Bradley"', 'CRITICAL',
+        renderer=render_vendor_exposures, product_fallback='Industrial System', prober='HTTP',
+        found_text="Identified {total} Industrial IoT systems",
+        risk_note=('Risk', 'Production line control'),
+        loading_text="Scanning industrial automation systems", loading_time=2,
+        sample_title='IIoT System Exposures', sample_label='[IIoT-{i}]', sample_target='{ip}',
+        sample_fields=[('System', 'product', Colors.CYAN), ('Country', 'country', Colors.YELLOW)]),
+]
+
+def get_category(name):
+    """Return the registered ScanCategory with this name, or None"""
+    for category in CATEGORY_REGISTRY:
+        if category.name == name:
+            return category
+    return None
+
+def get_category_risk(name):
+    """Risk level for a category name (MEDIUM if unregistered)"""
+    category = get_category(name)
+    return category.risk_level if category else 'MEDIUM'
+
+def register_category(category):
+    """Add a category to the registry, replacing any with the same name"""
+    for i, existing in enumerate(CATEGORY_REGISTRY):
+        if existing.name == category.name:
+            CATEGORY_REGISTRY[i] = category
+            return category
+    CATEGORY_REGISTRY.append(category)
+    return category
+
+def load_custom_categories(config_file='targets.json', keys=None):
+    """Build ScanCategory entries from the 'custom_queries' section of the
+    targets config. Pass keys to load a subset. Returns a list (not registered)."""
+    if not os.path.exists(config_file):
+        print_status('warning', f"Config file not found: {Colors.YELLOW}{config_file}{Colors.END}")
+        return []
 
     try:
-        results = api.search(query)
-        total = results['total']
+        with open(config_file, 'r') as f:
+            custom_queries = json.load(f).get('custom_queries', {})
+    except Exception as e:
+        print_status('error', f"Error loading custom queries: {Colors.RED}{e}{Colors.END}")
+        return []
 
-        print_status('critical', f"Found {Colors.BOLD}{Colors.RED}{total:,}{Colors.END} exposed camera streams")
-        print_status('warning', f"Risk: {Colors.RED}Unprotected video surveillance{Colors.END}")
+    categories = []
+    for key, entry in custom_queries.items():
+        if keys and key not in keys:
+            continue
+        if 'query' not in entry:
+            print_status('warning', f"Custom query {Colors.YELLOW}{key}{Colors.END} has no 'query' — skipped")
+            continue
+        name = entry.get('name', key)
+        categories.append(ScanCategory(
+            name, name.upper(), entry['query'], entry.get('risk_level', 'MEDIUM').upper(),
+            port=entry.get('port'), prober=entry.get('prober'),
+            product_fallback=entry.get('product_fallback', 'Unknown'),
+            risk_note=('Risk', entry.get('description', 'Exposed devices')),
+            sample_target='{ip}:{port}'))
+    return categories
 
-        if scan_data:
-            scan_data.add_category("IoT Cameras", total)
-
-        print(f"\n{Colors.BOLD}{Colors.MAGENTA}Live Stream Exposures:{Colors.END}")
-        for i, result in enumerate(results['matches'][:3], 1):
-            ip = result['ip_str']
-            org = result.get('org', 'Unknown')
-            country = result.get('location', {}).get('country_name', 'Unknown')
-            print(f"  {Colors.RED}[{i}]{Colors.END} {Colors.WHITE}rtsp://{ip}:554{Colors.END}")
-            print(f"      ├─ Organization: {Colors.CYAN}{org}{Colors.END}")
-            print(f"      └─ Location: {Colors.YELLOW}{country}{Colors.END}")
-
-            if scan_data and verbose:
-                device_info = {
-                    'ip': ip,
-                    'port': 554,
-                    'product': result.get('product', 'RTSP Camera'),
-                    'version': result.get('version', 'Unknown'),
-                    'country': country,
-                    'city': result.get('location', {}).get('city', 'Unknown'),
-                    'org': org,
-                    'isp': result.get('isp', 'Unknown'),
-                    'timestamp': result.get('timestamp', 'Unknown')
-                }
-                scan_data.add_device("IoT Cameras", device_info)
+# ╔═══════════════════════════════════════════════════════════════════╗
+# ║                      SCAN EXECUTOR                                ║
+# ╚═══════════════════════════════════════════════════════════════════╝
 
-        return total
-    except Exception as e:
-        print_status('error', f"Scan failed: {e}")
-        return 0
+# Server-side aggregates requested in count-only (metrics) mode
+COUNT_FACETS = 'country:10,org:10,product:10,port:10'
+
+def fetch_category(api, query, count_only=False):
+    """Run the Shodan call for a category: api.count with facets in
+    count-only mode (no banners, no query credits), api.search otherwise"""
+    if count_only:
+        return api.count(query, facets=COUNT_FACETS)
+    return api.search(query)
+
+def ingest_category_results(category, results, scan_data, verbose=False, all_matches=False):
+    """Store one category's Shodan response in scan_data (no output).
+    Verbose mode keeps category.device_limit matches, or every match on
+    the page with all_matches (deep collection)."""
+    scan_data.add_category(category.name, results['total'])
+    scan_data.add_facets(category.name, results.get('facets'))
+    if verbose:
+        matches = results.get('matches', [])
+        for result in (matches if all_matches else matches[:category.device_limit]):
+            scan_data.add_device(category.name, category.device_info(result))
 
-def scan_scada_ics(api, country_code=None, scan_data=None, verbose=False):
-    """Scan for SCADA/ICS"""
-    scan_header(3, 6, "SCADA / INDUSTRIAL CONTROL SYSTEMS", "CRITICAL ⚠️⚠️⚠️", Colors.RED)
+def execute_category(api, category, country_code=None, scan_data=None, verbose=False,
+                     pending=None, scan_num=1, total_scans=1, count_only=False, all_matches=False):
+    """Run one registry category: query (or await a pending query), store
+    results in scan_data, and render. Returns the Shodan total."""
+    scan_header(scan_num, total_scans, category.title, category.risk_label, category.risk_color)
 
-    query = 'port:502 "Modbus"'
-    if country_code:
-        query += f' country:{country_code}'
+    query = category.build_query(country_code)
     print_status('scan', f"Query: {Colors.CYAN}{query}{Colors.END}")
-    loading_animation("Discovering critical infrastructure", 2)
-    
+    if pending is None:
+        loading_animation(category.loading_text, category.loading_time)
+
     try:
-        results = api.search(query)
+        results = pending.result() if pending is not None else fetch_category(api, query, count_only)
         total = results['total']
 
-        print_status('critical', f"Discovered {Colors.BOLD}{Colors.RED}{total:,}{Colors.END} SCADA/ICS systems exposed")
-        print_status('warning', f"Impact: {Colors.RED}Critical infrastructure{Colors.END}")
+        count_text = f"{Colors.BOLD}{category.count_color}{total:,}{Colors.END}"
+        print_status('critical' if category.risk_level == 'CRITICAL' else 'found',
+                     category.found_text.format(total=count_text))
+        label, note = category.risk_note
+        print_status('warning', f"{label}: {Colors.RED}{note}{Colors.END}")
 
         if scan_data:
-            scan_data.add_category("SCADA/ICS", total)
-
-        print(f"\n{Colors.BOLD}{Colors.RED}Potential Sectors Affected:{Colors.END}")
-        sectors = [
-            ("Manufacturing & Production", "⚙️"),
-            ("Water Treatment Facilities", "💧"),
-            ("Power Generation/Distribution", "⚡"),
-            ("Building Automation Systems", "🏭"),
-        ]
-        for sector, icon in sectors:
-            print(f"  {Colors.YELLOW}{icon}{Colors.END}  {sector}")
-
-        print(f"\n{Colors.BOLD}{Colors.MAGENTA}Critical Infrastructure Exposures:{Colors.END}")
-        for i, result in enumerate(results['matches'][:3], 1):
-            ip = result['ip_str']
-            org = result.get('org', 'Unknown')
-            country = result.get('location', {}).get('country_name', 'Unknown')
-            print(f"  {Colors.RED}[CRITICAL-{i}]{Colors.END} {Colors.WHITE}{ip}:502{Colors.END}")
-            print(f"      ├─ Organization: {Colors.CYAN}{org}{Colors.END}")
-            print(f"      ├─ Country: {Colors.YELLOW}{country}{Colors.END}")
-            print(f"      └─ Protocol: {Colors.RED}Modbus (Industrial){Colors.END}")
-
-            if scan_data and verbose:
-                device_info = {
-                    'ip': ip,
-                    'port': 502,
-                    'product': result.get('product', 'Modbus SCADA'),
-                    'version': result.get('version', 'Unknown'),
-                    'country': country,
-                    'city': result.get('location', {}).get('city', 'Unknown'),
-                    'org': org,
-                    'isp': result.get('isp', 'Unknown'),
-                    'timestamp': result.get('timestamp', 'Unknown')
-                }
-                scan_data.add_device("SCADA/ICS", device_info)
+            ingest_category_results(category, results, scan_data, verbose, all_matches)
 
+        category.renderer(category, results)
         return total
     except Exception as e:
-        print_status('error', f"Scan failed: {e}")
-        return 0
-
-def scan_building_automation(api, country_code=None, scan_data=None, verbose=False):
-    """Scan for Building Management Systems"""
-    scan_header(4, 6, "BUILDING AUTOMATION SYSTEMS (BACnet)", "HIGH ⚠️⚠️", Colors.ORANGE)
-
-    query = 'port:47808 "BACnet"'
-    if country_code:
-        query += f' country:{country_code}'
-    print_status('scan', f"Query: {Colors.CYAN}{query}{Colors.END}")
-    loading_animation("Analyzing building automation protocols", 1.5)
-    
-    try:
-        results = api.search(query)
-        total = results['total']
-
-        print_status('found', f"Located {Colors.BOLD}{Colors.ORANGE}{total:,}{Colors.END} building automation systems")
-        print_status('warning', f"Controls: {Colors.RED}HVAC, lighting, security{Colors.END}")
+        # A failed query is left out of the totals rather than counted as 0
+        print_status('error', f"Scan failed: {e} {Colors.DIM}(not counted){Colors.END}")
+        return None
 
-        if scan_data:
-            scan_data.add_category("Building Automation", total)
-
-        print(f"\n{Colors.BOLD}{Colors.MAGENTA}Building System Exposures:{Colors.END}")
-        for i, result in enumerate(results['matches'][:3], 1):
-            ip = result['ip_str']
-            org = result.get('org', 'Unknown')
-            country = result.get('location', {}).get('country_name', 'Unknown')
-            print(f"  {Colors.ORANGE}[{i}]{Colors.END} {Colors.WHITE}{ip}:47808{Colors.END}")
-            print(f"      ├─ Organization: {Colors.CYAN}{org}{Colors.END}")
-            print(f"      └─ Country: {Colors.YELLOW}{country}{Colors.END}")
-
-            if scan_data and verbose:
-                device_info = {
-                    'ip': ip,
-                    'port': 47808,
-                    'product': result.get('product', 'BACnet System'),
-                    'version': result.get('version', 'Unknown'),
-                    'country': country,
-                    'city': result.get('location', {}).get('city', 'Unknown'),
-                    'org': org,
-                    'isp': result.get('isp', 'Unknown'),
-                    'timestamp': result.get('timestamp', 'Unknown')
-                }
-                scan_data.add_device("Building Automation", device_info)
+# ╔═══════════════════════════════════════════════════════════════════╗
+# ║                      QUERY CACHE                                  ║
+# ╚═══════════════════════════════════════════════════════════════════╝
 
-        return total
-    except Exception as e:
-        print_status('error', f"Scan failed: {e}")
-        return 0
+CACHE_PATH = Path(".moiraguard_cache") / "query_cache.sqlite"
+CACHE_TTL_SECONDS = 6 * 3600          # re-query after 6 hours
+CACHE_MAX_BYTES = 200 * 1024 * 1024   # evict least-recently-used entries beyond 200 MB
+
+def normalize_query(query):
+    """Collapse whitespace so trivially different spellings share a cache entry"""
+    return re.sub(r'\s+', ' ', (query or '').strip())
+
+def search_credit_cost(query, page=1):
+    """Query credits Shodan charges for one api.search call: filtered
+    queries and any page beyond the first cost 1 credit; count is free"""
+    return 1 if page > 1 or ':' in (query or '') else 0
+
+class QueryCache:
+    """SQLite-backed cache of Shodan search/count responses keyed by
+    method, normalized query, page and facets. Thread-safe."""
+    def __init__(self, path=CACHE_PATH, ttl=CACHE_TTL_SECONDS, max_bytes=CACHE_MAX_BYTES, offline=False):
+        self.path = Path(path)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.offline = offline
+        self.hits = 0
+        self.misses = 0
+        self.credits_saved = 0
+        self.bytes_saved = 0
+        self._lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                method TEXT NOT NULL,
+                query TEXT NOT NULL,
+                page INTEGER NOT NULL,
+                created REAL NOT NULL,
+                accessed REAL NOT NULL,
+                size INTEGER NOT NULL,
+                body BLOB NOT NULL
+            )""")
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses(accessed)")
+        self._db.commit()
+
+    @staticmethod
+    def make_key(method, query, page=1, facets=None):
+        """Stable cache key for one API call"""
+        raw = json.dumps([method, normalize_query(query), page, facets or ''])
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def get(self, method, query, page=1, facets=None):
+        """Return the cached response, or None on a miss. Expired entries
+        are still served in offline mode."""
+        key = self.make_key(method, query, page, facets)
+        with self._lock:
+            row = self._db.execute(
+                "SELECT created, size, body FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None or (not self.offline and time.time() - row[0] > self.ttl):
+                self.misses += 1
+                return None
+            self._db.execute("UPDATE responses SET accessed = ? WHERE key = ?", (time.time(), key))
+            self._db.commit()
+            self.hits += 1
+            self.bytes_saved += row[1]
+            if method == 'search':
+                self.credits_saved += search_credit_cost(query, page)
+        return json.loads(zlib.decompress(row[2]).decode('utf-8'))
+
+    def contains(self, method, query, page=1, facets=None):
+        """True if a servable entry exists (does not touch hit/miss counters)"""
+        key = self.make_key(method, query, page, facets)
+        with self._lock:
+            row = self._db.execute("SELECT created FROM responses WHERE key = ?", (key,)).fetchone()
+        return row is not None and (self.offline or time.time() - row[0] <= self.ttl)
+
+    def put(self, method, query, response, page=1, facets=None):
+        """Store a response and evict old entries if over the size budget"""
+        raw = json.dumps(response).encode('utf-8')
+        body = zlib.compress(raw, 6)
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (self.make_key(method, query, page, facets), method, normalize_query(query),
+                 page, now, now, len(raw), body))
+            self._db.commit()
+            self._evict()
+
+    def _evict(self):
+        """Drop least-recently-used entries until stored bodies fit max_bytes"""
+        stored = self._db.execute("SELECT COALESCE(SUM(LENGTH(body)), 0) FROM responses").fetchone()[0]
+        if stored <= self.max_bytes:
+            return
+        target = self.max_bytes * 0.9
+        for key, length in self._db.execute(
+                "SELECT key, LENGTH(body) FROM responses ORDER BY accessed ASC").fetchall():
+            if stored <= target:
+                break
+            self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            stored -= length
+        self._db.commit()
+
+    def close(self):
+        """Close the database connection"""
+        with self._lock:
+            self._db.close()
+
+class CachedShodanAPI:
+    """Wraps a shodan.Shodan client so search() and count() are served from
+    QueryCache when possible. Every other attribute passes through.
+
+    search_async() and count_async() are the coroutine versions the
+    QueryDispatcher uses on the API event loop: misses go through
+    async_api (an AsyncShodanAPI), or through the blocking client on a
+    worker thread when there is none. Cache reads and writes are short
+    local SQLite calls made on the loop thread; the cache lock is never
+    held across an await, so the loop can't deadlock on it."""
+    def __init__(self, api, cache, async_api=None):
+        self.api = api
+        self.cache = cache
+        self.async_api = async_api
+
+    def is_cached(self, method, query, page=1, facets=None):
+        """True if this call would be served without touching the network"""
+        return method in ('search', 'count') and self.cache.contains(method, query, page, facets)
+
+    def _lookup(self, method, query, page, facets):
+        """Cached response, or None on a miss (offline misses raise)"""
+        cached = self.cache.get(method, query, page, facets)
+        if cached is None and self.cache.offline:
+            raise shodan.APIError(f"Offline mode: no cached {method} response for '{query}' (page {page})")
+        return cached
+
+    def _fetch(self, method, query, page, facets, call):
+        cached = self._lookup(method, query, page, facets)
+        if cached is not None:
+            return cached
+        response = call()
+        self.cache.put(method, query, response, page, facets)
+        return response
+
+    async def _fetch_async(self, method, query, page, facets, call, blocking_call):
+        cached = self._lookup(method, query, page, facets)
+        if cached is not None:
+            return cached
+        if self.async_api is not None:
+            response = await call()
+        else:
+            response = await asyncio.get_running_loop().run_in_executor(None, blocking_call)
+        self.cache.put(method, query, response, page, facets)
+        return response
+
+    async def search_async(self, query, page=1):
+        """Cached search on the API event loop"""
+        return await self._fetch_async('search', query, page, None,
+                                       lambda: self.async_api.search(query, page=page),
+                                       lambda: self.api.search(query, page=page))
+
+    async def count_async(self, query, facets=None):
+        """Cached count on the API event loop"""
+        return await self._fetch_async('count', query, 1, facets,
+                                       lambda: self.async_api.count(query, facets=facets),
+                                       lambda: self.api.count(query, facets=facets))
+
+    def search(self, query, page=1, **kwargs):
+        """Cached api.search"""
+        if kwargs:
+            # Uncommon options (limit/offset/minify...) bypass the cache
+            return self.api.search(query, page=page, **kwargs)
+        return self._fetch('search', query, page, None, lambda: self.api.search(query, page=page))
+
+    def count(self, query, facets=None):
+        """Cached api.count"""
+        return self._fetch('count', query, 1, facets, lambda: self.api.count(query, facets=facets))
+
+    def __getattr__(self, name):
+        return getattr(self.api, name)
+
+def open_cached_api(api_key, offline=False):
+    """Backend API client wrapped in the query cache for this backend. Query
+    engine and batch misses go through the shared async client, except
+    offline (nothing is fetched) and while recording fixtures (the
+    recorder wraps the blocking client)."""
+    api = open_shodan_api(api_key)
+    async_api = None
+    if not offline and not _backend_options.get('record_fixtures'):
+        async_api = open_async_api(api_key)
+    return CachedShodanAPI(api, QueryCache(path=backend_cache_path(CACHE_PATH), offline=offline), async_api)
+
+def print_cache_report(cache):
+    """Print query cache hit/credit statistics"""
+    lookups = cache.hits + cache.misses
+    if lookups == 0:
+        return
+    hit_rate = cache.hits / lookups * 100
+    print(f"\n{Colors.BOLD}{Colors.CYAN}Query Cache:{Colors.END}")
+    print(f"  • Cache hits       : {Colors.GREEN}{cache.hits}{Colors.END}/{lookups} {Colors.DIM}({hit_rate:.0f}%){Colors.END}")
+    print(f"  • Credits saved    : {Colors.GREEN}{cache.credits_saved}{Colors.END}")
+    print(f"  • Data served local: {Colors.CYAN}{cache.bytes_saved / 1024:,.1f} KB{Colors.END}")
+    if cache.offline:
+        print(f"  • Mode             : {Colors.YELLOW}OFFLINE (cache only){Colors.END}")
 
-def scan_iot_mqtt(api, country_code=None, scan_data=None, verbose=False):
-    """Scan for MQTT brokers"""
-    scan_header(5, 6, "IoT MQTT MESSAGING BROKERS", "HIGH ⚠️⚠️", Colors.ORANGE)
+# ╔═══════════════════════════════════════════════════════════════════╗
+# ║                      QUERY ENGINE                                 ║
+# ╚═══════════════════════════════════════════════════════════════════╝
 
-    query = 'port:1883 "mosquitto"'
-    if country_code:
-        query += f' country:{country_code}'
-    print_status('scan', f"Query: {Colors.CYAN}{query}{Colors.END}")
-    loading_animation("Discovering IoT messaging infrastructure", 1.5)
-    
+class QueryDispatcher:
+    """Shared dispatcher that overlaps Shodan API calls on the process's
+    API event loop, at most max_concurrent at a time, through the client's
+    coroutine methods (CachedShodanAPI.search_async/count_async). A client
+    without them (e.g. a bare LocalShodanAPI) is called on worker threads.
+    Pacing and retries happen in the rate limiter below the query cache,
+    so cache hits never wait for a token."""
+    def __init__(self, api, max_concurrent=6):
+        self.api = api
+        self.max_concurrent = max_concurrent
+        self._slots = None                # created on first use, inside the loop
+
+    async def _call(self, method, args, kwargs):
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_concurrent)
+        async with self._slots:
+            coroutine = getattr(self.api, f"{method}_async", None)
+            if coroutine is not None:
+                return await coroutine(*args, **kwargs)
+            call = functools.partial(getattr(self.api, method), *args, **kwargs)
+            return await asyncio.get_running_loop().run_in_executor(None, call)
+
+    def submit(self, method, *args, **kwargs):
+        """Schedule api.<method>(*args, **kwargs); returns a concurrent.futures.Future"""
+        return run_on_api_loop(self._call(method, args, kwargs))
+
+def run_query_engine(api, country_code=None, scan_data=None, verbose=False, categories=None,
+                     count_only=False, pages=None, credit_budget=None, resume=False):
+    """Send every category query up front, then render results in registry
+    order as each one arrives. Returns {category: total}.
+
+    count_only uses api.count with facets instead of api.search; it is
+    ignored in verbose mode, which needs the device banners. In verbose
+    mode, a page limit or credit budget (per category) switches on deep
+    collection: every match is kept and later pages are streamed in
+    (see collect_category_pages)."""
+    categories = categories if categories is not None else CATEGORY_REGISTRY
+    count_only = count_only and not verbose
+    deep = verbose and scan_data is not None and (pages is not None or credit_budget is not None)
+    checkpoint = CollectionCheckpoint(backend_path(CHECKPOINT_PATH), resume=resume) if deep else None
+    dispatcher = QueryDispatcher(api, max_concurrent=max(1, min(len(categories), 8)))
+    pending = {}
     try:
-        results = api.search(query)
-        total = results['total']
+        for category in categories:
+            query = category.build_query(country_code)
+            if count_only:
+                pending[category.name] = dispatcher.submit('count', query, facets=COUNT_FACETS)
+            else:
+                pending[category.name] = dispatcher.submit('search', query)
 
-        print_status('found', f"Found {Colors.BOLD}{Colors.ORANGE}{total:,}{Colors.END} exposed MQTT brokers")
-        print_status('warning', f"Risk: {Colors.RED}IoT device communication interception{Colors.END}")
+        stats = {}
+        failed = []
+        for scan_num, category in enumerate(categories, 1):
+            with perf_span('category', category.name):
+                total = execute_category(
+                    api, category, country_code, scan_data, verbose,
+                    pending=pending[category.name], scan_num=scan_num, total_scans=len(categories),
+                    count_only=count_only, all_matches=deep)
+                if total is None:
+                    failed.append(category.name)
+                else:
+                    stats[category.name] = total
+                if total is not None and deep and category.name in scan_data.categories:
+                    collect_category_pages(dispatcher, category, country_code, scan_data,
+                                           pending[category.name].result(), pages, credit_budget, checkpoint)
+            if scan_data is not None:
+                scan_data.finish_category(category.name)
+        if failed:
+            print_status('warning', f"{len(failed)} categories failed and are missing from the totals: {', '.join(failed)}")
+        return stats
+    finally:
+        # Drop queries that never started (e.g. Ctrl+C mid-scan)
+        for future in pending.values():
+            future.cancel()
 
-        if scan_data:
-            scan_data.add_category("MQTT Brokers", total)
-
-        print(f"\n{Colors.BOLD}{Colors.MAGENTA}MQTT Broker Exposures:{Colors.END}")
-        for i, result in enumerate(results['matches'][:3], 1):
-            ip = result['ip_str']
-            version = result.get('product', 'MQTT Broker')
-            country = result.get('location', {}).get('country_name', 'Unknown')
-            print(f"  {Colors.ORANGE}[{i}]{Colors.END} {Colors.WHITE}{ip}:1883{Colors.END}")
-            print(f"      ├─ Version: {Colors.CYAN}{version}{Colors.END}")
-            print(f"      └─ Country: {Colors.YELLOW}{country}{Colors.END}")
-
-            if scan_data and verbose:
-                device_info = {
-                    'ip': ip,
-                    'port': 1883,
-                    'product': version,
-                    'version': result.get('version', 'Unknown'),
-                    'country': country,
-                    'city': result.get('location', {}).get('city', 'Unknown'),
-                    'org': result.get('org', 'Unknown'),
-                    'isp': result.get('isp', 'Unknown'),
-                    'timestamp': result.get('timestamp', 'Unknown')
-                }
-                scan_data.add_device("MQTT Brokers", device_info)
+# ╔═══════════════════════════════════════════════════════════════════╗
+# ║                      DEEP COLLECTION                              ║
+# ╚═══════════════════════════════════════════════════════════════════╝
 
-        return total
-    except Exception as e:
-        print_status('error', f"Scan failed: {e}")
+SEARCH_PAGE_SIZE = 100                # matches per api.search page
+CHECKPOINT_PATH = Path(".moiraguard_cache") / "collect_checkpoint.json"
+
+class CollectionCheckpoint:
+    """Last completed search page per unfinished query, rewritten after every page so
+    an interrupted deep collection can pick up where it stopped (--resume)"""
+    def __init__(self, path=CHECKPOINT_PATH, resume=False):
+        self.path = Path(path)
+        self.state = {}
+        if resume and self.path.exists():
+            try:
+                with open(self.path, 'r') as f:
+                    self.state = json.load(f)
+            except (OSError, ValueError) as e:
+                print_status('warning', f"Ignoring unreadable checkpoint {self.path}: {e}")
+
+    def get(self, query):
+        """Checkpoint entry for a query, or None"""
+        return self.state.get(normalize_query(query))
+
+    def update(self, query, **fields):
+        """Merge fields into a query's entry and save"""
+        self.state.setdefault(normalize_query(query), {}).update(fields)
+        self.save()
+
+    def discard(self, query):
+        """Drop a finished query's entry and save"""
+        if self.state.pop(normalize_query(query), None) is not None:
+            self.save()
+
+    def save(self):
+        """Atomically write the checkpoint file"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix('.tmp')
+        with open(tmp, 'w') as f:
+            json.dump(self.state, f, indent=2)
+        os.replace(tmp, self.path)
+
+class SearchCursor:
+    """Page-by-page cursor over api.search, like shodan's search_cursor but
+    budgeted and resumable. Iterating yields (page, results) with the next
+    page already in flight, and stops when matches run out or the page or
+    credit budget is reached. Pages up to resume_after were completed by an
+    earlier run: they are replayed from the query cache or skipped, never
+    paid for twice."""
+    def __init__(self, dispatcher, query, start_page=1, max_pages=None, credit_budget=None,
+                 credits_spent=0, resume_after=0):
+        self.dispatcher = dispatcher
+        self.query = query
+        self.start_page = start_page
+        self.max_pages = max_pages
+        self.credit_budget = credit_budget
+        self.credits_spent = credits_spent    # credits for pages yielded so far
+        self.resume_after = resume_after
+        self.skipped = 0
+        self.stop_reason = None               # 'exhausted', 'pages' or 'credits'
+
+    def _is_cached(self, page):
+        is_cached = getattr(self.dispatcher.api, 'is_cached', None)
+        return bool(is_cached and is_cached('search', self.query, page))
+
+    def _schedule(self, page):
+        """Submit the next fetchable page; returns (page, future, cost) or None"""
+        while page <= self.resume_after and not self._is_cached(page):
+            self.skipped += 1
+            page += 1
+        if self.max_pages is not None and page > self.max_pages:
+            self.stop_reason = 'pages'
+            return None
+        cost = 0 if self._is_cached(page) else search_credit_cost(self.query, page)
+        if self.credit_budget is not None and self.credits_spent + cost > self.credit_budget:
+            self.stop_reason = 'credits'
+            return None
+        return page, self.dispatcher.submit('search', self.query, page=page), cost
+
+    def __iter__(self):
+        pending = self._schedule(self.start_page)
+        while pending is not None:
+            page, future, cost = pending
+            results = future.result()
+            self.credits_spent += cost
+            if not results.get('matches') or page * SEARCH_PAGE_SIZE >= results.get('total', 0):
+                self.stop_reason = 'exhausted'
+                pending = None
+            else:
+                pending = self._schedule(page + 1)
+            yield page, results
+
+def collect_category_pages(dispatcher, category, country_code, scan_data, first_page,
+                           pages=None, credit_budget=None, checkpoint=None):
+    """Keep paging one category after its first page, streaming each page's
+    matches into scan_data as it arrives (pages are not accumulated).
+    pages/credit_budget are per category; None means no limit. Returns
+    the number of devices added."""
+    query = category.build_query(country_code)
+    total = first_page.get('total', 0)
+    state = checkpoint.get(query) if checkpoint else None
+    resume_after = state.get('last_page', 1) if state else 1
+    credits = state.get('credits', 0) if state else search_credit_cost(query, 1)
+
+    cursor = SearchCursor(dispatcher, query, start_page=2, max_pages=pages,
+                          credit_budget=credit_budget, credits_spent=credits,
+                          resume_after=resume_after)
+    if resume_after > 1:
+        print_status('info', f"Resuming {category.name} after page {Colors.CYAN}{resume_after}{Colors.END} "
+                             f"{Colors.DIM}(earlier pages replayed from cache){Colors.END}")
+    if checkpoint and not state:
+        checkpoint.update(query, last_page=1, credits=credits, total=total)
+
+    added = 0
+    last_page = 1
+    try:
+        for page, results in cursor:
+            matches = results.get('matches', [])
+            for result in matches:
+                scan_data.add_device(category.name, category.device_info(result))
+            added += len(matches)
+            last_page = page
+            if checkpoint:
+                checkpoint.update(query, last_page=page, credits=cursor.credits_spent, total=total)
+            print_status('info', f"Page {page}: {Colors.GREEN}+{len(matches)}{Colors.END} devices "
+                                 f"{Colors.DIM}({cursor.credits_spent} credits used){Colors.END}")
+    except shodan.APIError as e:
+        print_status('warning', f"Deep collection stopped after page {last_page}: {Colors.YELLOW}{e}{Colors.END}")
+    except KeyboardInterrupt:
+        print_status('warning', f"Interrupted after page {last_page} - re-run with {Colors.CYAN}--resume{Colors.END} to continue")
+        raise
+    if checkpoint and cursor.stop_reason == 'exhausted':
+        # Nothing left to resume: a later --resume run collects this query from page 1 again
+        checkpoint.discard(query)
+
+    stored = len(scan_data.categories[category.name]['devices'])
+    reason = {'exhausted': 'all results collected', 'pages': 'page limit reached',
+              'credits': 'credit budget reached'}.get(cursor.stop_reason, 'stopped early')
+    print_status('success', f"Collected {Colors.BOLD}{stored:,}{Colors.END}/{total:,} devices "
+                            f"{Colors.DIM}({cursor.credits_spent} credits, {reason}){Colors.END}")
+    if cursor.skipped:
+        print_status('warning', f"{cursor.skipped} page(s) completed in an earlier run were no longer cached and were skipped")
+    return added
+
+def estimate_query_credits(verbose, pages=None, credit_budget=None, categories=None):
+    """Upper bound on query credits for a Query Mode run"""
+    if not verbose:
         return 0
+    per_category = credit_budget if credit_budget is not None else (pages or 1)
+    return len(categories if categories is not None else CATEGORY_REGISTRY) * max(1, per_category)
 
-def scan_industrial_iot(api, country_code=None, scan_data=None, verbose=False):
-    """Scan for Industrial IoT"""
-    scan_header(6, 6, "INDUSTRIAL IoT GATEWAYS & AUTOMATION", "CRITICAL ⚠️⚠️⚠️", Colors.RED)
+# ╔═══════════════════════════════════════════════════════════════════╗
+# ║                      SCAN HISTORY                                 ║
+# ╚═══════════════════════════════════════════════════════════════════╝
 
-    query = '"Industrial IoT" OR "IIoT Gateway" OR "Siemens" OR "Allen Bradley"'
-    if country_code:
-        query += f' country:{country_code}'
-    print_status('scan', f"Query: {Colors.CYAN}{query}{Colors.END}")
-    loading_animation("Scanning industrial automation systems", 2)
-    
+HISTORY_PATH = Path(".moiraguard_cache") / "history.sqlite"
+HISTORY_GLOBAL = 'GLOBAL'             # country key of runs without a country filter
+TREND_DAYS = 90
+
+class ScanHistory:
+    """SQLite history of Query Mode runs: category totals, facet
+    breakdowns and device rows, indexed by country, category and time so
+    trends are a single indexed query instead of re-parsing exports."""
+    def __init__(self, path=HISTORY_PATH, record_runs=True):
+        self.path = Path(path)
+        self.record_runs = record_runs   # False: read-only use (e.g. offline delta)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self.path))
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS runs (
+                id INTEGER PRIMARY KEY,
+                started REAL NOT NULL,
+                country TEXT NOT NULL,
+                country_name TEXT NOT NULL,
+                verbose INTEGER NOT NULL,
+                total INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS totals (
+                run_id INTEGER NOT NULL REFERENCES runs(id),
+                started REAL NOT NULL,
+                country TEXT NOT NULL,
+                category TEXT NOT NULL,
+                count INTEGER NOT NULL,
+                complete INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE TABLE IF NOT EXISTS facets (
+                run_id INTEGER NOT NULL REFERENCES runs(id),
+                category TEXT NOT NULL,
+                facet TEXT NOT NULL,
+                value TEXT,
+                count INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS devices (
+                run_id INTEGER NOT NULL REFERENCES runs(id),
+                category TEXT NOT NULL,
+                ip TEXT,
+                port INTEGER,
+                product TEXT,
+                version TEXT,
+                country TEXT,
+                city TEXT,
+                org TEXT,
+                isp TEXT,
+                timestamp TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_runs_country ON runs(country, started);
+            CREATE INDEX IF NOT EXISTS idx_totals_series ON totals(country, category, started);
+            CREATE INDEX IF NOT EXISTS idx_facets_run ON facets(run_id, category);
+            CREATE INDEX IF NOT EXISTS idx_devices_run ON devices(run_id, category);
+            """)
+        # Histories written before device sets were marked complete: treat old runs as sampled
+        if 'complete' not in {row[1] for row in self._db.execute("PRAGMA table_info(totals)")}:
+            self._db.execute("ALTER TABLE totals ADD COLUMN complete INTEGER NOT NULL DEFAULT 0")
+        self._db.commit()
+
+    @staticmethod
+    def country_key(country_code):
+        return country_code.upper() if country_code else HISTORY_GLOBAL
+
+    def record(self, scan_data, verbose=False):
+        """Store one completed scan in a single transaction; returns the run id"""
+        country = self.country_key(scan_data.country_code)
+        started = scan_data.timestamp.timestamp()
+        total = sum(data['count'] for data in scan_data.categories.values())
+        with self._db:
+            run_id = self._db.execute(
+                "INSERT INTO runs (started, country, country_name, verbose, total) VALUES (?, ?, ?, ?, ?)",
+                (started, country, scan_data.country_name, int(verbose), total)).lastrowid
+            self._db.executemany(
+                "INSERT INTO totals (run_id, started, country, category, count, complete) VALUES (?, ?, ?, ?, ?, ?)",
+                [(run_id, started, country, name, data['count'], int(verbose and scan_data.is_complete(name)))
+                 for name, data in scan_data.categories.items()])
+            self._db.executemany(
+                "INSERT INTO facets VALUES (?, ?, ?, ?, ?)",
+                ((run_id, name, facet, None if item.get('value') is None else str(item['value']), item.get('count', 0))
+                 for name, facets in scan_data.facets.items()
+                 for facet, items in facets.items() for item in items))
+            self._db.executemany(
+                "INSERT INTO devices VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                ((run_id, name) + tuple(device.get(field) for field in DEVICE_FIELDS)
+                 for name, data in scan_data.categories.items() for device in data['devices']))
+        return run_id
+
+    def series(self, country_code, category, days=TREND_DAYS):
+        """[(datetime, count)] for one country and category, oldest first"""
+        since = time.time() - days * 86400 if days else 0
+        rows = self._db.execute(
+            "SELECT started, count FROM totals WHERE country = ? AND category = ? AND started >= ? "
+            "ORDER BY started", (self.country_key(country_code), category, since)).fetchall()
+        return [(datetime.fromtimestamp(started), count) for started, count in rows]
+
+    def trend(self, country_code, days=TREND_DAYS):
+        """{category: [(datetime, count), ...]} for every category seen for a country"""
+        since = time.time() - days * 86400 if days else 0
+        trend = defaultdict(list)
+        for started, category, count in self._db.execute(
+                "SELECT started, category, count FROM totals WHERE country = ? AND started >= ? "
+                "ORDER BY started", (self.country_key(country_code), since)):
+            trend[category].append((datetime.fromtimestamp(started), count))
+        return dict(trend)
+
+    def facet_history(self, country_code, category, facet, days=TREND_DAYS):
+        """[(datetime, value, count)] facet breakdowns for a country and category"""
+        since = time.time() - days * 86400 if days else 0
+        rows = self._db.execute(
+            "SELECT runs.started, facets.value, facets.count FROM facets JOIN runs ON runs.id = facets.run_id "
+            "WHERE runs.country = ? AND runs.started >= ? AND facets.category = ? AND facets.facet = ? "
+            "ORDER BY runs.started, facets.count DESC",
+            (self.country_key(country_code), since, category, facet)).fetchall()
+        return [(datetime.fromtimestamp(started), value, count) for started, value, count in rows]
+
+    def previous_run(self, country_code, verbose=True):
+        """(run id, datetime) of the latest run for a country, or None"""
+        query = "SELECT id, started FROM runs WHERE country = ?"
+        if verbose:
+            query += " AND verbose = 1"
+        row = self._db.execute(query + " ORDER BY started DESC LIMIT 1",
+                               (self.country_key(country_code),)).fetchone()
+        return None if row is None else (row[0], datetime.fromtimestamp(row[1]))
+
+    def complete_categories(self, run_id):
+        """Categories whose full device set was stored in a run"""
+        return {category for category, in self._db.execute(
+            "SELECT category FROM totals WHERE run_id = ? AND complete = 1", (run_id,))}
+
+    def run_devices(self, run_id):
+        """Yield one run's device rows as dicts (category plus DEVICE_FIELDS)"""
+        columns = ('category',) + DEVICE_FIELDS
+        cursor = self._db.execute(
+            f"SELECT {', '.join(columns)} FROM devices WHERE run_id = ?", (run_id,))
+        for row in cursor:
+            yield dict(zip(columns, row))
+
+    def runs(self, country_code=None, limit=20):
+        """Most recent runs as (id, datetime, country, country_name, verbose, total)"""
+        query = "SELECT id, started, country, country_name, verbose, total FROM runs"
+        params = ()
+        if country_code is not None:
+            query += " WHERE country = ?"
+            params = (self.country_key(country_code),)
+        rows = self._db.execute(query + " ORDER BY started DESC LIMIT ?", params + (limit,)).fetchall()
+        return [(run_id, datetime.fromtimestamp(started), country, name, bool(verbose), total)
+                for run_id, started, country, name, verbose, total in rows]
+
+    def close(self):
+        """Close the database connection"""
+        self._db.close()
+
+def record_scan_history(history, scan_data, verbose=False):
+    """Add a finished scan to the history store, reporting (not raising) failures"""
+    if history is None or not history.record_runs or not scan_data.categories:
+        return None
     try:
-        results = api.search(query)
-        total = results['total']
-
-        print_status('critical', f"Identified {Colors.BOLD}{Colors.RED}{total:,}{Colors.END} Industrial IoT systems")
-        print_status('warning', f"Risk: {Colors.RED}Production line control{Colors.END}")
+        run_id = history.record(scan_data, verbose)
+        print_status('info', f"Recorded in scan history as run {Colors.CYAN}#{run_id}{Colors.END}")
+        return run_id
+    except sqlite3.Error as e:
+        print_status('warning', f"Could not record scan history: {e}")
+        return None
 
-        if scan_data:
-            scan_data.add_category("Industrial IoT", total)
-
-        # Vendor distribution
-        vendors = defaultdict(int)
-        for result in results['matches'][:20]:
-            product = result.get('product', '').lower()
-            if 'siemens' in product:
-                vendors['Siemens'] += 1
-            elif 'rockwell' in product or 'allen bradley' in product:
-                vendors['Rockwell/Allen Bradley'] += 1
-            elif 'schneider' in product:
-                vendors['Schneider Electric'] += 1
+# ── Delta scans ──────────────────────────────────────────────────────────
+# A delta run diffs the current ScanData against the previous verbose run
+# for the same country in the history. Devices are keyed on
+# (ip, port, category); the previous run is loaded into a dict (hash index)
+# of key → tracked fields, so the diff is one pass over each side.
+# A normal verbose run stores only a sample per category, so "added" needs
+# a complete base run and "removed" needs both runs complete; for sampled
+# categories only changes to devices seen in both runs are reported.
+DELTA_KEY_FIELDS = ('ip', 'port')
+DELTA_TRACKED_FIELDS = ('product', 'version', 'org', 'isp', 'country', 'city')
+
+class ScanDelta:
+    """Devices added, removed and changed between a base run and a scan"""
+    def __init__(self, base_run=None, base_started=None):
+        self.base_run = base_run
+        self.base_started = base_started
+        self.added = []                  # (category, device dict)
+        self.removed = []                # (category, device dict)
+        self.changed = []                # (category, device dict, {field: [old, new]})
+        self.unchanged = 0
+        self.sampled = []                # categories diffed on samples (changes only)
+
+    def counts(self):
+        """{category: {'added', 'removed', 'changed'}}"""
+        counts = defaultdict(lambda: {'added': 0, 'removed': 0, 'changed': 0})
+        for kind, items in (('added', self.added), ('removed', self.removed), ('changed', self.changed)):
+            for item in items:
+                counts[item[0]][kind] += 1
+        return dict(counts)
+
+    def __len__(self):
+        return len(self.added) + len(self.removed) + len(self.changed)
+
+def compute_scan_delta(history, scan_data):
+    """Diff scan_data against the latest verbose run for its country in
+    history. Returns a ScanDelta, or None if there is no base run."""
+    base = history.previous_run(scan_data.country_code, verbose=True)
+    if base is None:
+        return None
+    base_run, base_started = base
+    categories = set(scan_data.categories)
+    base_complete = history.complete_categories(base_run)
+
+    # Hash index of the previous run: (ip, port, category) → device row
+    previous = {}
+    for row in history.run_devices(base_run):
+        if row['category'] in categories:
+            previous[(row['ip'], row['port'], row['category'])] = row
+
+    delta = ScanDelta(base_run, base_started)
+    delta.sampled = [category for category in scan_data.categories
+                     if not (category in base_complete and scan_data.is_complete(category))]
+    seen = set()
+    for category, data in scan_data.categories.items():
+        for device in data['devices']:
+            key = (device.get('ip'), device.get('port'), category)
+            if key in seen:
+                continue
+            seen.add(key)
+            old = previous.get(key)
+            if old is None:
+                # Missing from a sampled base run doesn't make a device new
+                if category in base_complete:
+                    delta.added.append((category, device.to_dict()))
+                continue
+            changes = {}
+            for field in DELTA_TRACKED_FIELDS:
+                new_value = device.get(field)
+                if old[field] != (None if new_value is None else str(new_value)):
+                    changes[field] = [old[field], new_value]
+            if changes:
+                delta.changed.append((category, device.to_dict(), changes))
             else:
-                vendors['Other'] += 1
-
-        print(f"\n{Colors.BOLD}{Colors.CYAN}Vendor Distribution:{Colors.END}")
-        for vendor, count in sorted(vendors.items(), key=lambda x: x[1], reverse=True):
-            if count > 0:
-                bar = '█' * min(count * 2, 20)
-                print(f"  {Colors.GREEN}►{Colors.END} {vendor:30s} {Colors.YELLOW}{bar}{Colors.END} {count}")
-
-        print(f"\n{Colors.BOLD}{Colors.MAGENTA}IIoT System Exposures:{Colors.END}")
-        for i, result in enumerate(results['matches'][:3], 1):
-            ip = result['ip_str']
-            product = result.get('product', 'Industrial System')
-            country = result.get('location', {}).get('country_name', 'Unknown')
-            print(f"  {Colors.RED}[IIoT-{i}]{Colors.END} {Colors.WHITE}{ip}{Colors.END}")
-            print(f"      ├─ System: {Colors.CYAN}{product}{Colors.END}")
-            print(f"      └─ Country: {Colors.YELLOW}{country}{Colors.END}")
-
-            if scan_data and verbose:
-                device_info = {
-                    'ip': ip,
-                    'port': result.get('port', 'N/A'),
-                    'product': product,
-                    'version': result.get('version', 'Unknown'),
-                    'country': country,
-                    'city': result.get('location', {}).get('city', 'Unknown'),
-                    'org': result.get('org', 'Unknown'),
-                    'isp': result.get('isp', 'Unknown'),
-                    'timestamp': result.get('timestamp', 'Unknown')
-                }
-                scan_data.add_device("Industrial IoT", device_info)
+                delta.unchanged += 1
+    sampled = set(delta.sampled)
+    for key, row in previous.items():
+        if key not in seen and key[2] not in sampled:
+            delta.removed.append((key[2], {field: row[field] for field in DEVICE_FIELDS}))
+    return delta
+
+def print_delta_summary(delta):
+    """Print per-category added/removed/changed counts"""
+    print_separator('═', 80, Colors.CYAN)
+    print(f"{Colors.BOLD}{Colors.CYAN}DELTA SINCE RUN #{delta.base_run} "
+          f"({delta.base_started.strftime('%Y-%m-%d %H:%M:%S')}){Colors.END}")
+    print_separator('─', 80, Colors.DIM)
+    print(f"{Colors.BOLD}{'Category':<30}{'Added':>12}{'Removed':>12}{'Changed':>12}{Colors.END}")
+    for category, counts in delta.counts().items():
+        print(f"{category[:29]:<30}{Colors.RED}{counts['added']:>+12,}{Colors.END}"
+              f"{Colors.GREEN}{-counts['removed']:>+12,}{Colors.END}{Colors.YELLOW}{counts['changed']:>12,}{Colors.END}")
+    print_separator('─', 80, Colors.DIM)
+    print(f"{'Total':<30}{len(delta.added):>+12,}{-len(delta.removed):>+12,}{len(delta.changed):>12,}"
+          f"  {Colors.DIM}({delta.unchanged:,} unchanged){Colors.END}")
+    if delta.sampled:
+        print(f"{Colors.YELLOW}[!] Sampled, not fully collected in one of the runs - changes only, no "
+              f"added/removed: {', '.join(delta.sampled)}{Colors.END}")
+        print(f"    {Colors.DIM}Collect every match with --pages/--credit-budget for a complete change feed{Colors.END}")
+    print_separator('═', 80, Colors.CYAN)
+
+def run_scan_delta(history, scan_data, verbose=False):
+    """Delta mode: diff a finished scan against the previous run, print
+    the summary and export the change feed. Returns the ScanDelta or None."""
+    if history is None or not verbose:
+        print_status('warning', "Delta mode needs verbose results and the scan history - skipped")
+        return None
+    delta = compute_scan_delta(history, scan_data)
+    if delta is None:
+        print_status('info', "No previous verbose run for this target - this run becomes the delta baseline")
+        return None
+    print_delta_summary(delta)
+    export_delta(scan_data, delta)
+    return delta
+
+SPARK_BLOCKS = '▁▂▃▄▅▆▇█'
+
+def sparkline(values):
+    """Unicode block sparkline for a list of numbers"""
+    if not values:
+        return ''
+    low, high = min(values), max(values)
+    span = (high - low) or 1
+    return ''.join(SPARK_BLOCKS[round((v - low) / span * (len(SPARK_BLOCKS) - 1))] for v in values)
+
+def print_trend_report(history, country_code=None, days=TREND_DAYS, category=None):
+    """Print per-category exposure trends (or one category's runs) from the history"""
+    label = country_code.upper() if country_code else 'Global'
+    window = f"last {days} days" if days else "all time"
+    if category:
+        points = history.series(country_code, category, days)
+        if not points:
+            print_status('warning', f"No history for {category} in {label} ({window})")
+            return False
+    else:
+        trend = history.trend(country_code, days)
+        if not trend:
+            print_status('warning', f"No scan history for {label} ({window}) — run a Query Mode scan first")
+            return False
 
-        return total
+    print_separator('═', 100, Colors.CYAN)
+    print(f"{Colors.BOLD}{Colors.CYAN}EXPOSURE TREND — {label} ({window}){Colors.END}")
+    print_separator('─', 100, Colors.DIM)
+    if category:
+        previous = None
+        print(f"{Colors.BOLD}{'Run time':<22}{'Count':>14}{'Change':>14}{Colors.END}")
+        for when, count in points:
+            change = '' if previous is None else f"{count - previous:+,}"
+            print(f"{when.strftime('%Y-%m-%d %H:%M:%S'):<22}{count:>14,}{change:>14}")
+            previous = count
+        print_separator('─', 100, Colors.DIM)
+        print(f"{category}: {sparkline([count for _, count in points])}")
+        print_separator('═', 100, Colors.CYAN)
+        return True
+
+    print(f"{Colors.BOLD}{'Category':<26}{'Runs':>6}{'First':>12}{'Latest':>12}{'Change':>12}{'Min':>10}{'Max':>10}  Trend{Colors.END}")
+    for name, points in trend.items():
+        counts = [count for _, count in points]
+        change = counts[-1] - counts[0]
+        color = Colors.RED if change > 0 else Colors.GREEN if change < 0 else Colors.DIM
+        print(f"{name[:25]:<26}{len(counts):>6}{counts[0]:>12,}{counts[-1]:>12,}"
+              f"{color}{change:>+12,}{Colors.END}{min(counts):>10,}{max(counts):>10,}  {Colors.CYAN}{sparkline(counts[-24:])}{Colors.END}")
+    first = min(points[0][0] for points in trend.values())
+    last = max(points[-1][0] for points in trend.values())
+    print_separator('─', 100, Colors.DIM)
+    print(f"{Colors.DIM}Runs between {first.strftime('%Y-%m-%d %H:%M')} and {last.strftime('%Y-%m-%d %H:%M')} "
+          f"· history: {history.path}{Colors.END}")
+    print_separator('═', 100, Colors.CYAN)
+    return True
+
+# ╔═══════════════════════════════════════════════════════════════════╗
+# ║                      BATCH RUNNER                                 ║
+# ╚═══════════════════════════════════════════════════════════════════╝
+
+def load_target_profiles(config_file='targets.json'):
+    """Load regional scan profiles from the targets config"""
+    if not os.path.exists(config_file):
+        print_status('error', f"Config file not found: {Colors.YELLOW}{config_file}{Colors.END}")
+        return {}
+    try:
+        with open(config_file, 'r') as f:
+            return json.load(f).get('profiles', {})
     except Exception as e:
-        print_status('error', f"Scan failed: {e}")
-        return 0
+        print_status('error', f"Error loading profiles: {Colors.RED}{e}{Colors.END}")
+        return {}
+
+def build_rollup(country_scans, region_name):
+    """Merge per-country ScanData into one regional ScanData: category
+    totals and facet buckets are summed, devices concatenated"""
+    rollup = ScanData(None, region_name)
+    facet_sums = defaultdict(lambda: defaultdict(lambda: defaultdict(int)))
+
+    for scan_data in country_scans:
+        for name, data in scan_data.categories.items():
+            if name not in rollup.categories:
+                rollup.add_category(name, 0)
+            rollup.categories[name]['count'] += data['count']
+            for device in data['devices']:
+                rollup.add_device(name, device)
+        for name, facets in scan_data.facets.items():
+            for facet, buckets in facets.items():
+                for bucket in buckets:
+                    facet_sums[name][facet][bucket['value']] += bucket['count']
+
+    for name, facets in facet_sums.items():
+        rollup.add_facets(name, {
+            facet: [{'value': value, 'count': count}
+                    for value, count in sorted(values.items(), key=lambda x: x[1], reverse=True)]
+            for facet, values in facets.items()
+        })
+    return rollup
+
+def run_batch_profile(api, profile_key, profiles=None, verbose=False, count_only=True,
+                      max_concurrent=4, categories=None):
+    """Scan every registry category for every country in a targets.json
+    profile through one bounded, rate-limited dispatcher.
+
+    Returns (country_scans, rollup, failures): one ScanData per country in
+    profile order, the regional rollup, and a list of (country, category, error)."""
+    profiles = profiles if profiles is not None else load_target_profiles()
+    profile = profiles[profile_key]
+    categories = categories if categories is not None else CATEGORY_REGISTRY
+    count_only = count_only and not verbose
+
+    country_scans = [ScanData(code, country_name_for_code(code)) for code in profile['countries']]
+    failures = []
+    dispatcher = QueryDispatcher(api, max_concurrent=max_concurrent)
+    pending = {}
+    try:
+        for scan_data in country_scans:
+            for category in categories:
+                query = category.build_query(scan_data.country_code)
+                if count_only:
+                    future = dispatcher.submit('count', query, facets=COUNT_FACETS)
+                else:
+                    future = dispatcher.submit('search', query)
+                pending[future] = (scan_data, category)
+
+        remaining = {scan_data.country_code: len(categories) for scan_data in country_scans}
+        for future in concurrent.futures.as_completed(pending):
+            scan_data, category = pending[future]
+            try:
+                with perf_span('category', f"{scan_data.country_code} {category.name}"):
+                    ingest_category_results(category, future.result(), scan_data, verbose)
+            except Exception as e:
+                # Leave the category out rather than recording a false zero
+                failures.append((scan_data.country_code, category.name, str(e)))
+                print_status('error', f"{scan_data.country_code} / {category.name}: {Colors.RED}{e}{Colors.END}")
+
+            remaining[scan_data.country_code] -= 1
+            if remaining[scan_data.country_code] == 0:
+                total = sum(cat['count'] for cat in scan_data.categories.values())
+                print_status('success', f"{Colors.CYAN}{scan_data.country_code}{Colors.END} "
+                                        f"{scan_data.country_name:20s} "
+                                        f"{len(scan_data.categories)}/{len(categories)} categories  "
+                                        f"{Colors.GREEN}{total:,}{Colors.END} devices")
+    finally:
+        for future in pending:
+            future.cancel()
+
+    rollup = build_rollup(country_scans, profile.get('name', profile_key))
+    return country_scans, rollup, failures
+
+def print_batch_summary(country_scans, rollup, categories=None):
+    """Print a country × category matrix with regional totals"""
+    names = [c.name for c in (categories if categories is not None else CATEGORY_REGISTRY)]
+    short = [n[:10] for n in names]
+
+    print_separator('═', 109, Colors.CYAN)
+    print(f"{Colors.BOLD}{Colors.CYAN}REGIONAL ROLLUP — {rollup.country_name}{Colors.END}")
+    print_separator('─', 109, Colors.DIM)
+    print(f"{Colors.BOLD}{'Country':<24}" + ''.join(f"{s:>12}" for s in short) + f"{'Total':>13}{Colors.END}")
+    for scan_data in country_scans:
+        row = [scan_data.categories[n]['count'] if n in scan_data.categories else None for n in names]
+        cells = ''.join(f"{v:>12,}" if v is not None else f"{'ERR':>12}" for v in row)
+        total = sum(v for v in row if v is not None)
+        print(f"{scan_data.country_code or '--':<4}{scan_data.country_name[:19]:<20}{cells}{Colors.GREEN}{total:>13,}{Colors.END}")
+    print_separator('─', 109, Colors.DIM)
+    row = [rollup.categories.get(n, {}).get('count', 0) for n in names]
+    print(f"{Colors.BOLD}{'REGION TOTAL':<24}" + ''.join(f"{v:>12,}" for v in row) + f"{sum(row):>13,}{Colors.END}")
+    print_separator('═', 109, Colors.CYAN)
+
+@traced_export('batch')
+def export_batch(country_scans, rollup, profile_key, verbose=False, chart_profile=None):
+    """Write one JSON per country plus the regional rollup into a batch
+    folder, and per-country charts when a chart profile is given"""
+    output_dir = create_output_directory()
+    batch_dir = output_dir / f"batch_{profile_key}_{rollup.timestamp.strftime('%Y%m%d_%H%M%S')}"
+    batch_dir.mkdir(exist_ok=True)
+    for scan_data in country_scans:
+        export_json(scan_data, verbose, filepath=batch_dir / f"moiraguard_scan_{scan_data.country_code}.json")
+    export_json(rollup, verbose, filepath=batch_dir / f"moiraguard_rollup_{profile_key}.json")
+
+    if chart_profile:
+        # Every country's charts go through one worker pool
+        scans = [scan_data for scan_data in country_scans + [rollup] if scan_data.categories]
+        prerender_charts(scans, chart_profile)
+        for scan_data in scans:
+            if scan_data.chart_cache is not None:
+                export_png_charts(scan_data, chart_profile, output_dir=batch_dir,
+                                  name_suffix=scan_data.country_code or profile_key)
+    return batch_dir
+
+def batch_mode(api_key, profile_key, verbose=False, offline=False, max_concurrent=4, chart_profile=None,
+               history=None):
+    """Non-interactive regional scan driven by a targets.json profile"""
+    profiles = load_target_profiles()
+    if profile_key not in profiles:
+        print_status('error', f"Unknown profile: {Colors.YELLOW}{profile_key}{Colors.END}")
+        print_status('info', "Available profiles:")
+        for key, profile in profiles.items():
+            print(f"  {Colors.CYAN}{key:<25}{Colors.END} {profile.get('name', '')} {Colors.DIM}({len(profile.get('countries', []))} countries){Colors.END}")
+        return 1
+
+    profile = profiles[profile_key]
+    countries = profile.get('countries', [])
+    print_status('info', f"Batch profile: {Colors.CYAN}{profile.get('name', profile_key)}{Colors.END} — "
+                         f"{len(countries)} countries × {len(CATEGORY_REGISTRY)} categories "
+                         f"({'verbose' if verbose else 'metrics only'})")
+
+    api = open_cached_api(api_key, offline)
+    country_scans, rollup, failures = run_batch_profile(
+        api, profile_key, profiles, verbose=verbose, count_only=not verbose,
+        max_concurrent=max_concurrent)
+
+    print_batch_summary(country_scans, rollup)
+    print_cache_report(api.cache)
+    for scan_data in country_scans:
+        record_scan_history(history, scan_data, verbose)
+    batch_dir = export_batch(country_scans, rollup, profile_key, verbose, chart_profile)
+    print_status('success', f"Batch results written to: {Colors.CYAN}{batch_dir}{Colors.END}")
+    if failures:
+        print_status('warning', f"{len(failures)} country/category queries failed and were left out of the totals")
+        return 1
+    return 0
 
 # ╔═══════════════════════════════════════════════════════════════════╗
 # ║                    EXPORT & VISUALIZATION                         ║
@@ -770,22 +3308,66 @@ def create_output_directory():
     output_dir.mkdir(exist_ok=True)
     return output_dir
 
-def export_json(scan_data, verbose=False):
-    """Export scan results to JSON"""
+# Devices written between flushes, so readers can tail an export in progress
+EXPORT_FLUSH_EVERY = 1000
+
+def _indent_json(value, level):
+    """json.dumps(value, indent=2) nested level*2 spaces deep"""
+    return json.dumps(value, indent=2).replace('\n', '\n' + '  ' * level)
+
+def write_json_stream(f, scan_data, verbose=False):
+    """Write the export_json document to f one category and device at a
+    time, so memory stays flat however many devices were collected"""
+    f.write('{\n')
+    for key, value in scan_data.header().items():
+        f.write(f'  {json.dumps(key)}: {json.dumps(value)},\n')
+
+    f.write('  "categories": {')
+    for i, (name, category) in enumerate(scan_data.categories.items()):
+        f.write(',\n    ' if i else '\n    ')
+        f.write(f'{json.dumps(name)}: {{\n      "count": {json.dumps(category["count"])},\n      "devices": [')
+        written = 0
+        # Non-verbose exports leave out device details
+        for device in (category['devices'] if verbose else ()):
+            f.write(',\n        ' if written else '\n        ')
+            f.write(json.dumps(device.to_dict()))
+            written += 1
+            if written % EXPORT_FLUSH_EVERY == 0:
+                f.flush()
+        f.write('\n      ]\n    }' if written else ']\n    }')
+        f.flush()
+    f.write('\n  },\n' if scan_data.categories else '},\n')
+    f.write(f'  "facets": {_indent_json(scan_data.facets, 1)}\n}}\n')
+
+def write_jsonl_stream(f, scan_data, verbose=True):
+    """Write scan results as JSON Lines: a 'scan' header record, then per
+    category a 'category' record, its 'device' records and any 'facets'"""
+    f.write(json.dumps(dict(type='scan', **scan_data.header())) + '\n')
+    for name, category in scan_data.categories.items():
+        f.write(json.dumps({'type': 'category', 'category': name, 'count': category['count'],
+                            'risk_level': get_category_risk(name)}) + '\n')
+        written = 0
+        for device in (category['devices'] if verbose else ()):
+            f.write(json.dumps(dict(type='device', category=name, **device.to_dict())) + '\n')
+            written += 1
+            if written % EXPORT_FLUSH_EVERY == 0:
+                f.flush()
+        if name in scan_data.facets:
+            f.write(json.dumps({'type': 'facets', 'category': name, 'facets': scan_data.facets[name]}) + '\n')
+        f.flush()
+
+@traced_export('json')
+def export_json(scan_data, verbose=False, filepath=None):
+    """Export scan results to JSON (to filepath, or a timestamped file in the export dir)"""
     try:
-        output_dir = create_output_directory()
-        timestamp = scan_data.timestamp.strftime('%Y%m%d_%H%M%S')
-        filename = f"moiraguard_scan_{timestamp}.json"
-        filepath = output_dir / filename
-
-        data = scan_data.to_dict()
-        if not verbose:
-            # Remove detailed device info for non-verbose exports
-            for category in data['categories'].values():
-                category['devices'] = []
+        if filepath is None:
+            output_dir = create_output_directory()
+            timestamp = scan_data.timestamp.strftime('%Y%m%d_%H%M%S')
+            filename = f"moiraguard_scan_{timestamp}.json"
+            filepath = output_dir / filename
 
         with open(filepath, 'w') as f:
-            json.dump(data, f, indent=2)
+            write_json_stream(f, scan_data, verbose)
 
         print_status('success', f"JSON exported to: {Colors.CYAN}{filepath}{Colors.END}")
         return filepath
@@ -793,6 +3375,58 @@ def export_json(scan_data, verbose=False):
         print_status('error', f"JSON export failed: {Colors.RED}{e}{Colors.END}")
         return None
 
+@traced_export('jsonl')
+def export_jsonl(scan_data, verbose=True, filepath=None):
+    """Export scan results to JSON Lines (one record per line, streamable)"""
+    try:
+        if filepath is None:
+            output_dir = create_output_directory()
+            timestamp = scan_data.timestamp.strftime('%Y%m%d_%H%M%S')
+            filepath = output_dir / f"moiraguard_scan_{timestamp}.jsonl"
+
+        with open(filepath, 'w') as f:
+            write_jsonl_stream(f, scan_data, verbose)
+
+        print_status('success', f"JSON Lines exported to: {Colors.CYAN}{filepath}{Colors.END}")
+        return filepath
+    except Exception as e:
+        print_status('error', f"JSON Lines export failed: {Colors.RED}{e}{Colors.END}")
+        return None
+
+def write_delta_stream(f, scan_data, delta):
+    """Write a change feed as JSON Lines: a 'delta' header record, then one
+    'added', 'removed' or 'changed' record per device"""
+    header = dict(type='delta', **scan_data.header())
+    header.update(base_run=delta.base_run, base_timestamp=delta.base_started.isoformat(),
+                  added=len(delta.added), removed=len(delta.removed),
+                  changed=len(delta.changed), unchanged=delta.unchanged, sampled_categories=delta.sampled)
+    f.write(json.dumps(header) + '\n')
+    for kind, items in (('added', delta.added), ('removed', delta.removed)):
+        for category, device in items:
+            f.write(json.dumps(dict(type=kind, category=category, **device)) + '\n')
+    for category, device, changes in delta.changed:
+        f.write(json.dumps(dict(type='changed', category=category, changes=changes, **device)) + '\n')
+
+@traced_export('delta')
+def export_delta(scan_data, delta, filepath=None):
+    """Export a ScanDelta as a JSON Lines change feed"""
+    try:
+        if filepath is None:
+            output_dir = create_output_directory()
+            timestamp = scan_data.timestamp.strftime('%Y%m%d_%H%M%S')
+            filepath = output_dir / f"moiraguard_delta_{timestamp}.jsonl"
+
+        with open(filepath, 'w') as f:
+            write_delta_stream(f, scan_data, delta)
+
+        print_status('success', f"Change feed exported to: {Colors.CYAN}{filepath}{Colors.END} "
+                                f"{Colors.DIM}({len(delta):,} changes){Colors.END}")
+        return filepath
+    except Exception as e:
+        print_status('error', f"Change feed export failed: {Colors.RED}{e}{Colors.END}")
+        return None
+
+@traced_export('csv')
 def export_csv(scan_data, verbose=False):
     """Export scan results to CSV"""
     try:
@@ -816,17 +3450,8 @@ def export_csv(scan_data, verbose=False):
             writer.writerow(['Category Summary'])
             writer.writerow(['Category', 'Device Count', 'Risk Level'])
 
-            risk_levels = {
-                'Smart Home Devices': 'HIGH',
-                'IoT Cameras': 'CRITICAL',
-                'SCADA/ICS': 'CRITICAL',
-                'Building Automation': 'HIGH',
-                'MQTT Brokers': 'HIGH',
-                'Industrial IoT': 'CRITICAL'
-            }
-
             for category, data in scan_data.categories.items():
-                risk = risk_levels.get(category, 'MEDIUM')
+                risk = get_category_risk(category)
                 writer.writerow([category, data['count'], risk])
 
             writer.writerow([])
@@ -859,373 +3484,704 @@ def export_csv(scan_data, verbose=False):
         print_status('error', f"CSV export failed: {Colors.RED}{e}{Colors.END}")
         return None
 
-def export_png_charts(scan_data):
-    """Export charts as PNG images using matplotlib with logo and improved styling"""
+@traced_export('hosts')
+def export_hosts(scan_data, verbose=True, filepath=None):
+    """Export unique hosts (devices merged by IP across categories) to CSV"""
     try:
-        output_dir = create_output_directory()
-        timestamp = scan_data.timestamp.strftime('%Y%m%d_%H%M%S')
-
-        # Prepare data
-        categories = list(scan_data.categories.keys())
-        counts = [scan_data.categories[cat]['count'] for cat in categories]
-        total = sum(counts)
-
-        # Enhanced color scheme for risk levels
-        colors_map = {
-            'Smart Home Devices': '#FF8C00',  # Orange
-            'IoT Cameras': '#DC143C',         # Crimson
-            'SCADA/ICS': '#B22222',           # Fire Brick
-            'Building Automation': '#FF6347', # Tomato
-            'MQTT Brokers': '#FFA500',        # Orange
-            'Industrial IoT': '#8B0000'       # Dark Red
-        }
-        colors = [colors_map.get(cat, '#4682B4') for cat in categories]
-
-        # Modern clean style with better fonts
-        plt.style.use('seaborn-v0_8-whitegrid')
-        plt.rcParams.update({
-            'font.family': 'sans-serif',
-            'font.sans-serif': ['Arial', 'Helvetica', 'DejaVu Sans'],
-            'font.size': 11,
-            'axes.labelsize': 13,
-            'axes.titlesize': 16,
-            'xtick.labelsize': 11,
-            'ytick.labelsize': 11,
-            'legend.fontsize': 11,
-            'figure.titlesize': 18
-        })
-
-        # Load logo if available
-        logo_path = Path("MoiraGuard-Eye-O-Tea-logo.png")
-        logo_img = None
-        if logo_path.exists():
-            try:
-                logo_img = plt.imread(str(logo_path))
-            except Exception:
-                pass
+        index = scan_data.host_index()
+        if not index:
+            print_status('warning', "No device IPs collected - run a Verbose scan to export hosts")
+            return None
+        if filepath is None:
+            output_dir = create_output_directory()
+            timestamp = scan_data.timestamp.strftime('%Y%m%d_%H%M%S')
+            filepath = output_dir / f"moiraguard_hosts_{timestamp}.csv"
 
-        # 1. PIE CHART - Device Distribution (Improved)
-        fig1, ax1 = plt.subplots(figsize=(14, 10), facecolor='white')
+        with open(filepath, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['IP Address', 'Categories', 'Category Count', 'Ports', 'Products',
+                             'Organization', 'ISP', 'Country', 'City'])
+            for host in index:
+                record = host.to_dict()
+                writer.writerow([
+                    host.ip,
+                    '; '.join(record['categories']),
+                    len(record['categories']),
+                    ' '.join(str(port) for port in record['ports']),
+                    '; '.join(str(product) for product in record['products']),
+                    host.org or 'N/A', host.isp or 'N/A', host.country or 'N/A', host.city or 'N/A',
+                ])
+
+        print_status('success', f"Hosts exported to: {Colors.CYAN}{filepath}{Colors.END} "
+                                f"{Colors.DIM}({len(index):,} unique hosts from {index.rows:,} device rows){Colors.END}")
+        return filepath
+    except Exception as e:
+        print_status('error', f"Hosts export failed: {Colors.RED}{e}{Colors.END}")
+        return None
 
-        wedges, texts, autotexts = ax1.pie(
-            counts, labels=categories, colors=colors,
-            autopct='%1.1f%%', startangle=90,
-            textprops={'fontsize': 12, 'weight': 'bold'},
-            explode=[0.03] * len(categories),
-            shadow=True,
-            pctdistance=0.85
-        )
+class CsvSink:
+    """Scan-time CSV/TSV export attached to a ScanData. Device rows are
+    appended through a buffered writer as they are stored, and the category
+    summary goes to a separate small file rewritten as each category
+    finishes, so an interrupted scan still leaves completed categories on disk."""
+    DEVICE_HEADER = ['Category', 'IP Address', 'Port', 'Product', 'Version', 'Country', 'City',
+                     'Organization', 'ISP', 'Timestamp']
+
+    def __init__(self, base_path, delimiter=',', buffer_size=1024 * 1024):
+        base = Path(base_path)
+        ext = 'tsv' if delimiter == '\t' else 'csv'
+        self.devices_path = base.with_name(f"{base.name}_devices.{ext}")
+        self.summary_path = base.with_name(f"{base.name}_summary.{ext}")
+        self.delimiter = delimiter
+        self.format = ext.upper()
+        self.rows = 0
+        self._finished = []
+        self._file = open(self.devices_path, 'w', newline='', buffering=buffer_size)
+        self._writer = csv.writer(self._file, delimiter=delimiter)
+        self._writer.writerow(self.DEVICE_HEADER)
+
+    def write_device(self, category_name, device):
+        """Queue one device row (flushed by the buffer or at category end)"""
+        self._writer.writerow([category_name] + [device.get(field, 'N/A') for field in DEVICE_FIELDS])
+        self.rows += 1
+
+    def category_done(self, scan_data, category_name):
+        """Flush device rows and rewrite the summary for finished categories"""
+        self._file.flush()
+        if category_name in scan_data.categories and category_name not in self._finished:
+            self._finished.append(category_name)
+        tmp = self.summary_path.with_name(self.summary_path.name + '.tmp')
+        with open(tmp, 'w', newline='') as f:
+            writer = csv.writer(f, delimiter=self.delimiter)
+            writer.writerow(['Category', 'Device Count', 'Risk Level', 'Devices Written'])
+            for name in self._finished:
+                data = scan_data.categories[name]
+                writer.writerow([name, data['count'], get_category_risk(name), len(data['devices'])])
+            writer.writerow(['Total Devices', sum(scan_data.categories[n]['count'] for n in self._finished),
+                             '', sum(len(scan_data.categories[n]['devices']) for n in self._finished)])
+        os.replace(tmp, self.summary_path)
+
+    def close(self):
+        """Flush and close the device file"""
+        if not self._file.closed:
+            self._file.close()
+            print_status('success', f"Live {self.format} written: "
+                                    f"{Colors.CYAN}{self.devices_path}{Colors.END} {Colors.DIM}({self.rows:,} rows){Colors.END}")
+            print_status('success', f"Category summary: {Colors.CYAN}{self.summary_path}{Colors.END}")
+
+# Rows per Arrow record batch (bounds the temporary ip/timestamp columns)
+ARROW_BATCH_ROWS = 65536
+_ISO_TIMESTAMP = r'^\d{4}-\d\d-\d\d(T\d\d:\d\d:\d\d(\.\d{1,6})?)?$'
+
+def _arrow_codes(codes, start, length):
+    """Zero-copy uint32 Arrow view of a slice of an array('I') code column"""
+    indices = pa.Array.from_buffers(pa.uint32(), len(codes), [None, pa.py_buffer(codes)])
+    return indices.slice(start, length)
+
+def _arrow_dictionaries(tables):
+    """Arrow dictionaries for a ScanData's value tables: {field: (values,
+    null codes)}. Strings become dictionary<uint32, string> values (missing
+    values become null indices, since Arrow dictionaries cannot hold nulls); port
+    becomes an int32 lookup."""
+    dictionaries = {}
+    for field in _ENCODED_FIELDS:
+        values = tables[field].values
+        if field == 'port':
+            dictionaries[field] = (pa.array([v if isinstance(v, int) else None for v in values], pa.int32()), None)
+        else:
+            nulls = [code for code, v in enumerate(values) if v is None]
+            dictionaries[field] = (pa.array(['' if v is None else str(v) for v in values], pa.string()),
+                                   pa.array(nulls, pa.uint32()) if nulls else None)
+    return dictionaries
+
+def _arrow_device_batches(scan_data, schema):
+    """Yield RecordBatches of the device table, one category slice at a time"""
+    names = pa.array(list(scan_data.categories), pa.string())
+    for category_code, (name, data) in enumerate(scan_data.categories.items()):
+        store = data['devices']
+        if not store:
+            continue
+        dictionaries = _arrow_dictionaries(store.tables)
+        for start in range(0, len(store), ARROW_BATCH_ROWS):
+            length = min(ARROW_BATCH_ROWS, len(store) - start)
+            columns = {
+                'category': pa.DictionaryArray.from_arrays(
+                    _arrow_codes(array('I', [category_code]) * length, 0, length), names),
+                'ip': pa.array([store.value(row, 'ip') for row in range(start, start + length)], pa.string()),
+            }
+            for field in _ENCODED_FIELDS:
+                indices = _arrow_codes(store.codes(field), start, length)
+                values, nulls = dictionaries[field]
+                if field == 'port':
+                    columns[field] = pc.take(values, indices)
+                else:
+                    if nulls is not None:
+                        indices = pc.if_else(pc.is_in(indices, value_set=nulls),
+                                             pa.scalar(None, pa.uint32()), indices)
+                    columns[field] = pa.DictionaryArray.from_arrays(indices, values)
+            stamps = pa.array(store.timestamps()[start:start + length], pa.string())
+            valid = pc.match_substring_regex(stamps, _ISO_TIMESTAMP)
+            columns['timestamp'] = pc.cast(pc.if_else(valid, stamps, pa.scalar(None, pa.string())),
+                                           pa.timestamp('us'))
+            yield pa.record_batch([columns[field.name] for field in schema], schema=schema)
+
+@traced_export('columnar')
+def export_columnar(scan_data, verbose=True, fmt='parquet', output_dir=None):
+    """Export the device table and category summary as Parquet ('parquet')
+    or Arrow IPC ('arrow') files with typed, dictionary-encoded columns.
+    Returns the device file path."""
+    try:
+        if not PYARROW_AVAILABLE:
+            print_status('error', "pyarrow library not installed")
+            print_status('info', f"Install with: {Colors.CYAN}pip3 install pyarrow{Colors.END}")
+            return None
 
-        # Style percentage text
-        for autotext in autotexts:
-            autotext.set_color('white')
-            autotext.set_fontweight('bold')
-            autotext.set_fontsize(13)
-
-        # Enhanced title
-        title_text = f'MOIRAGUARD IoT Device Distribution\n{scan_data.country_name} | Total: {total:,} Devices\n{scan_data.timestamp.strftime("%Y-%m-%d %H:%M:%S")}'
-        ax1.set_title(title_text, fontsize=20, fontweight='bold', pad=35, color='#2c3e50')
-
-        # Add logo if available
-        if logo_img is not None:
-            imagebox = OffsetImage(logo_img, zoom=0.12)
-            ab = AnnotationBbox(imagebox, (1.35, 1.15), frameon=False,
-                               xycoords='axes fraction')
-            ax1.add_artist(ab)
-
-        # Professional footer
-        fig1.text(0.5, 0.02, '👁️ MOIRAGUARD Eye-O-Tea Scanner | DEFCON GROUP CASABLANCA 2026 | @MLY',
-                 ha='center', fontsize=11, style='italic', color='#7f8c8d')
-
-        plt.tight_layout(rect=[0, 0.03, 1, 0.97])
-        pie_file = output_dir / f"moiraguard_pie_chart_{timestamp}.png"
-        plt.savefig(pie_file, dpi=300, bbox_inches='tight', facecolor='white', edgecolor='none')
-        plt.close()
-        print_status('success', f"Pie chart exported: {Colors.CYAN}{pie_file.name}{Colors.END}")
-
-        # 2. BAR CHART - Category Comparison (Improved)
-        fig2, ax2 = plt.subplots(figsize=(16, 10), facecolor='white')
-
-        bars = ax2.bar(
-            range(len(categories)), counts,
-            color=colors,
-            edgecolor='#2c3e50',
-            linewidth=2,
-            alpha=0.85,
-            width=0.7
-        )
+        output_dir = Path(output_dir) if output_dir else create_output_directory()
+        base = f"moiraguard_scan_{scan_data.timestamp.strftime('%Y%m%d_%H%M%S')}"
+        ext = 'parquet' if fmt == 'parquet' else 'arrow'
+        devices_path = output_dir / f"{base}_devices.{ext}"
+        summary_path = output_dir / f"{base}_summary.{ext}"
+        metadata = {'moiraguard': json.dumps(scan_data.header())}
+
+        encoded = pa.dictionary(pa.uint32(), pa.string())
+        schema = pa.schema([
+            ('category', encoded), ('ip', pa.string()), ('port', pa.int32()),
+            ('product', encoded), ('version', encoded), ('country', encoded),
+            ('city', encoded), ('org', encoded), ('isp', encoded),
+            ('timestamp', pa.timestamp('us')),
+        ], metadata=metadata)
+
+        if fmt == 'parquet':
+            writer = pq.ParquetWriter(str(devices_path), schema, compression='zstd')
+            write = writer.write_batch
+        else:
+            writer = pa_ipc.new_file(str(devices_path), schema)
+            write = writer.write_batch
+        rows = 0
+        try:
+            if verbose:
+                for batch in _arrow_device_batches(scan_data, schema):
+                    write(batch)
+                    rows += batch.num_rows
+        finally:
+            writer.close()
+
+        names = list(scan_data.categories)
+        summary = pa.table({
+            'category': pa.array(names, pa.string()),
+            'count': pa.array([scan_data.categories[n]['count'] for n in names], pa.int64()),
+            'risk_level': pa.array([get_category_risk(n) for n in names], pa.string()).dictionary_encode(),
+            'devices_collected': pa.array([len(scan_data.categories[n]['devices']) for n in names], pa.int64()),
+        }).replace_schema_metadata(metadata)
+        if fmt == 'parquet':
+            pq.write_table(summary, str(summary_path), compression='zstd')
+        else:
+            with pa_ipc.new_file(str(summary_path), summary.schema) as summary_writer:
+                summary_writer.write_table(summary)
+
+        label = 'Parquet' if fmt == 'parquet' else 'Arrow'
+        print_status('success', f"{label} device table exported to: {Colors.CYAN}{devices_path}{Colors.END} "
+                                f"{Colors.DIM}({rows:,} rows){Colors.END}")
+        print_status('success', f"{label} category summary exported to: {Colors.CYAN}{summary_path}{Colors.END}")
+        return devices_path
+    except Exception as e:
+        print_status('error', f"Columnar export failed: {Colors.RED}{e}{Colors.END}")
+        return None
 
-        # Style axes
-        ax2.set_xlabel('IoT Device Category', fontsize=15, fontweight='bold', color='#2c3e50', labelpad=10)
-        ax2.set_ylabel('Number of Exposed Devices', fontsize=15, fontweight='bold', color='#2c3e50', labelpad=10)
-        ax2.set_xticks(range(len(categories)))
-        ax2.set_xticklabels(categories, rotation=30, ha='right', fontsize=12, weight='bold')
-        ax2.yaxis.set_major_formatter(plt.FuncFormatter(lambda x, p: f'{int(x):,}'))
-        ax2.grid(axis='y', alpha=0.25, linestyle='--', linewidth=0.8, color='#95a5a6')
-        ax2.set_axisbelow(True)
-        ax2.spines['top'].set_visible(False)
-        ax2.spines['right'].set_visible(False)
-
-        # Enhanced title
-        title_text = f'MOIRAGUARD IoT Exposure by Category\n{scan_data.country_name} | Total: {total:,} Devices | {scan_data.timestamp.strftime("%Y-%m-%d %H:%M")}'
-        ax2.set_title(title_text, fontsize=20, fontweight='bold', pad=35, color='#2c3e50')
-
-        # Add value labels on bars
-        for bar, count in zip(bars, counts):
-            height = bar.get_height()
-            ax2.text(
-                bar.get_x() + bar.get_width() / 2., height + (max(counts) * 0.015),
-                f'{count:,}',
-                ha='center', va='bottom',
-                fontsize=12, fontweight='bold',
-                color='#2c3e50'
-            )
+# ── Chart rendering pipeline ─────────────────────────────────────────────
+# Charts are rendered once per ScanData and shared by the PNG, HTML and
+# HTML-screenshot exports: ChartModel holds the chart data, each renderer
+# turns it into image bytes for a ChartProfile, and render_charts runs
+# them in worker processes.
+
+# Category colors used by every rendered chart
+CHART_COLORS = {
+    'Smart Home Devices': '#FF8C00',  # Orange
+    'IoT Cameras': '#DC143C',         # Crimson
+    'SCADA/ICS': '#B22222',           # Fire Brick
+    'Building Automation': '#FF6347', # Tomato
+    'MQTT Brokers': '#FFA500',        # Orange
+    'Industrial IoT': '#8B0000'       # Dark Red
+}
+RISK_CHART_COLORS = {'CRITICAL': '#DC143C', 'HIGH': '#FF8C00', 'MEDIUM': '#FFD700'}
+LOGO_PATH = Path("MoiraGuard-Eye-O-Tea-logo.png")
+CHART_FOOTER = '👁️ MOIRAGUARD Eye-O-Tea Scanner | DEFCON GROUP CASABLANCA 2026 | @MLY'
+
+class ChartProfile:
+    """Chart output settings: format (png/svg/webp), resolution and whether
+    to run the bbox_inches='tight' second layout pass. Resolution is either
+    a fixed dpi or a target pixel width (dpi derived per figure)."""
+    def __init__(self, name, fmt='png', dpi=None, width=None, tight=True):
+        self.name = name
+        self.fmt = fmt
+        self.dpi = dpi
+        self.width = width
+        self.tight = tight
+
+    def dpi_for(self, fig):
+        """Raster resolution for a figure"""
+        if self.width:
+            return self.width / fig.get_size_inches()[0]
+        return self.dpi or 100
+
+    def with_format(self, fmt):
+        """Copy of this profile writing another format"""
+        return ChartProfile(self.name, fmt or self.fmt, self.dpi, self.width, self.tight)
+
+    def key(self):
+        return (self.name, self.fmt, self.dpi, self.width, self.tight)
+
+CHART_PROFILES = {
+    # Dashboard tiles / batch runs: small, fast, no tight-bbox pass (the
+    # logo outside the axes may be cropped)
+    'thumbnail': ChartProfile('thumbnail', 'png', width=480, tight=False),
+    'screen':    ChartProfile('screen', 'png', width=1400),
+    'print':     ChartProfile('print', 'png', dpi=300),
+}
+CHART_FORMATS = ('png', 'svg', 'webp')
+CHART_MIME_TYPES = {'png': 'image/png', 'svg': 'image/svg+xml', 'webp': 'image/webp'}
+
+# Profile used when an export does not ask for one (--chart-profile/--chart-format)
+_default_chart_profile = CHART_PROFILES['print']
+
+def set_chart_profile(name='print', fmt=None):
+    """Choose the default chart profile (and optionally override its format)"""
+    global _default_chart_profile
+    _default_chart_profile = CHART_PROFILES[name].with_format(fmt)
+    return _default_chart_profile
+
+def get_chart_profile(profile=None):
+    """Resolve a profile name, ChartProfile or None (the default)"""
+    if profile is None:
+        return _default_chart_profile
+    if isinstance(profile, str):
+        return CHART_PROFILES[profile]
+    return profile
+
+def html_chart_profile():
+    """Profile for charts embedded in the HTML report: the default profile,
+    capped at screen size (print-resolution PNGs inlined as base64 make
+    the page megabytes large and slow to render)"""
+    profile = get_chart_profile()
+    if profile.name == 'print':
+        return CHART_PROFILES['screen'].with_format(profile.fmt)
+    return profile
+
+# Chart name → (output file prefix, status label), in export order
+CHART_FILES = {
+    'pie':     ('moiraguard_pie_chart', 'Pie chart'),
+    'bar':     ('moiraguard_bar_chart', 'Bar chart'),
+    'risk':    ('moiraguard_risk_chart', 'Risk chart'),
+    'summary': ('moiraguard_summary', 'Summary chart'),
+}
 
-        # Add logo
-        if logo_img is not None:
-            imagebox = OffsetImage(logo_img, zoom=0.1)
-            ab = AnnotationBbox(imagebox, (1.08, 1.08), frameon=False,
-                               xycoords='axes fraction')
-            ax2.add_artist(ab)
-
-        # Footer
-        fig2.text(0.5, 0.02, '👁️ MOIRAGUARD Eye-O-Tea Scanner | DEFCON GROUP CASABLANCA 2026 | @MLY',
-                 ha='center', fontsize=11, style='italic', color='#7f8c8d')
-
-        plt.tight_layout(rect=[0, 0.03, 1, 0.97])
-        bar_file = output_dir / f"moiraguard_bar_chart_{timestamp}.png"
-        plt.savefig(bar_file, dpi=300, bbox_inches='tight', facecolor='white', edgecolor='none')
-        plt.close()
-        print_status('success', f"Bar chart exported: {Colors.CYAN}{bar_file.name}{Colors.END}")
-
-        # 3. RISK LEVEL DOUGHNUT CHART
-        risk_levels = {
-            'Smart Home Devices': 'HIGH',
-            'IoT Cameras': 'CRITICAL',
-            'SCADA/ICS': 'CRITICAL',
-            'Building Automation': 'HIGH',
-            'MQTT Brokers': 'HIGH',
-            'Industrial IoT': 'CRITICAL'
-        }
+class ChartModel:
+    """Chart data for one ScanData, computed once. Plain values only, so it
+    can be sent to worker processes."""
+    def __init__(self, scan_data):
+        self.country_name = scan_data.country_name
+        self.timestamp = scan_data.timestamp
+        self.categories = list(scan_data.categories.keys())
+        self.counts = [scan_data.categories[cat]['count'] for cat in self.categories]
+        self.total = sum(self.counts)
+        self.colors = [CHART_COLORS.get(cat, '#4682B4') for cat in self.categories]
 
         risk_data = {'CRITICAL': 0, 'HIGH': 0, 'MEDIUM': 0}
-        for cat, count in zip(categories, counts):
-            risk = risk_levels.get(cat, 'MEDIUM')
-            risk_data[risk] += count
-
+        for cat, count in zip(self.categories, self.counts):
+            risk_data[get_category_risk(cat)] += count
         # Filter out zero values
-        risk_labels = [k for k, v in risk_data.items() if v > 0]
-        risk_values = [v for v in risk_data.values() if v > 0]
-        risk_colors = {'CRITICAL': '#DC143C', 'HIGH': '#FF8C00', 'MEDIUM': '#FFD700'}
-        risk_chart_colors = [risk_colors[label] for label in risk_labels]
-
-        # 3. RISK LEVEL DOUGHNUT CHART (Improved)
-        fig3, ax3 = plt.subplots(figsize=(14, 10), facecolor='white')
-
-        wedges, texts, autotexts = ax3.pie(
-            risk_values, labels=risk_labels,
-            colors=risk_chart_colors,
-            autopct='%1.1f%%', startangle=90,
-            wedgeprops=dict(width=0.4, edgecolor='white', linewidth=4),
-            textprops={'fontsize': 14, 'weight': 'bold'},
-            explode=[0.05] * len(risk_labels),
-            shadow=True
-        )
+        self.risk_labels = [k for k, v in risk_data.items() if v > 0]
+        self.risk_values = [v for v in risk_data.values() if v > 0]
+        self.risk_colors = [RISK_CHART_COLORS[label] for label in self.risk_labels]
 
-        # Style percentage text
-        for autotext in autotexts:
-            autotext.set_color('white')
-            autotext.set_fontweight('bold')
-            autotext.set_fontsize(15)
-
-        # Enhanced title
-        title_text = f'MOIRAGUARD Risk Level Distribution\n{scan_data.country_name} | Total: {total:,} Devices\n{scan_data.timestamp.strftime("%Y-%m-%d")}'
-        ax3.set_title(title_text, fontsize=20, fontweight='bold', pad=35, color='#2c3e50')
-
-        # Add center text in doughnut
-        centre_circle = plt.Circle((0, 0), 0.60, fc='white', linewidth=0)
-        ax3.add_artist(centre_circle)
-        ax3.text(0, 0.05, f'{total:,}', ha='center', va='center',
-                fontsize=24, weight='bold', color='#2c3e50')
-        ax3.text(0, -0.12, 'Devices', ha='center', va='center',
-                fontsize=16, weight='bold', color='#7f8c8d')
-
-        # Enhanced legend
-        legend_labels = [f'{label}: {value:,} devices ({value/total*100:.1f}%)'
-                        for label, value in zip(risk_labels, risk_values)]
-        legend = ax3.legend(legend_labels, loc='upper left', bbox_to_anchor=(1.02, 1),
-                           fontsize=13, frameon=True, shadow=True, fancybox=True)
-        legend.get_frame().set_facecolor('white')
-        legend.get_frame().set_alpha(0.95)
-        legend.get_frame().set_edgecolor('#95a5a6')
-
-        # Add logo
-        if logo_img is not None:
-            imagebox = OffsetImage(logo_img, zoom=0.1)
-            ab = AnnotationBbox(imagebox, (1.3, 1.15), frameon=False,
-                               xycoords='axes fraction')
-            ax3.add_artist(ab)
-
-        # Footer
-        fig3.text(0.5, 0.02, '👁️ MOIRAGUARD Eye-O-Tea Scanner | DEFCON GROUP CASABLANCA 2026 | @MLY',
-                 ha='center', fontsize=11, style='italic', color='#7f8c8d')
-
-        plt.tight_layout(rect=[0, 0.03, 1, 0.97])
-        risk_file = output_dir / f"moiraguard_risk_chart_{timestamp}.png"
-        plt.savefig(risk_file, dpi=300, bbox_inches='tight', facecolor='white', edgecolor='none')
-        plt.close()
-        print_status('success', f"Risk chart exported: {Colors.CYAN}{risk_file.name}{Colors.END}")
-
-        # 4. COMBINED SUMMARY CHART (Improved)
-        fig4 = plt.figure(figsize=(22, 13), facecolor='white')
-
-        # Add logo at top center if available
-        if logo_img is not None:
-            ax_logo = fig4.add_axes([0.42, 0.93, 0.16, 0.07])
-            ax_logo.imshow(logo_img)
-            ax_logo.axis('off')
-
-        # Device distribution pie chart
-        ax4_1 = plt.subplot(2, 2, 1)
-        wedges, texts, autotexts = ax4_1.pie(
-            counts, labels=categories, colors=colors,
-            autopct='%1.1f%%', startangle=90,
-            textprops={'fontsize': 11, 'weight': 'bold'},
-            explode=[0.02] * len(categories),
-            shadow=True
-        )
-        ax4_1.set_title('Device Distribution by Category', fontsize=15, fontweight='bold',
-                       pad=15, color='#2c3e50')
-        for autotext in autotexts:
-            autotext.set_color('white')
-            autotext.set_fontweight('bold')
-            autotext.set_fontsize(12)
-
-        # Risk level doughnut chart
-        ax4_2 = plt.subplot(2, 2, 2)
-        wedges, texts, autotexts = ax4_2.pie(
-            risk_values, labels=risk_labels,
-            colors=risk_chart_colors,
-            autopct='%1.1f%%', startangle=90,
-            textprops={'fontsize': 12, 'weight': 'bold'},
-            wedgeprops=dict(width=0.4, edgecolor='white', linewidth=2),
-            explode=[0.05] * len(risk_labels),
-            shadow=True
-        )
-        ax4_2.set_title('Risk Level Distribution', fontsize=15, fontweight='bold',
-                       pad=15, color='#2c3e50')
-        for autotext in autotexts:
-            autotext.set_color('white')
-            autotext.set_fontweight('bold')
-            autotext.set_fontsize(13)
-
-        # Center circle for doughnut
-        centre_circle = plt.Circle((0, 0), 0.40, fc='white', linewidth=0)
-        ax4_2.add_artist(centre_circle)
-        ax4_2.text(0, 0, f'{total:,}', ha='center', va='center',
-                  fontsize=18, weight='bold', color='#2c3e50')
-
-        # Horizontal bar chart at bottom
-        ax4_3 = plt.subplot(2, 1, 2)
-        bars = ax4_3.barh(categories, counts, color=colors,
-                         edgecolor='#2c3e50', linewidth=1.5, alpha=0.85)
-        ax4_3.set_xlabel('Number of Exposed Devices', fontsize=14, fontweight='bold',
-                        color='#2c3e50', labelpad=10)
-        ax4_3.set_title('Detailed Category Breakdown', fontsize=15, fontweight='bold',
-                       pad=15, color='#2c3e50')
-        ax4_3.xaxis.set_major_formatter(plt.FuncFormatter(lambda x, p: f'{int(x):,}'))
-        ax4_3.grid(axis='x', alpha=0.2, linestyle='--', color='#95a5a6')
-        ax4_3.set_axisbelow(True)
-        ax4_3.spines['top'].set_visible(False)
-        ax4_3.spines['right'].set_visible(False)
-
-        # Add value labels
-        for bar, count in zip(bars, counts):
-            width = bar.get_width()
-            ax4_3.text(width + (max(counts) * 0.01), bar.get_y() + bar.get_height()/2,
-                      f'{count:,}',
-                      ha='left', va='center', fontsize=11, fontweight='bold', color='#2c3e50')
-
-        # Main title
-        main_title = f'MOIRAGUARD IoT Security Scan Summary\n{scan_data.country_name} | Total: {total:,} Devices | {scan_data.timestamp.strftime("%Y-%m-%d %H:%M:%S")}'
-        fig4.suptitle(main_title, fontsize=22, fontweight='bold', y=0.985, color='#2c3e50')
-
-        # Footer with branding
-        fig4.text(0.5, 0.005,
-                 f'👁️ Generated by MOIRAGUARD Eye-O-Tea Scanner | DEFCON GROUP CASABLANCA 2026 | Author: @MLY\n'
-                 f'⚠️ For Security Research & Educational Purposes Only ⚠️',
-                 ha='center', fontsize=11, style='italic', color='#7f8c8d')
-
-        plt.tight_layout(rect=[0, 0.02, 1, 0.97])
-        summary_file = output_dir / f"moiraguard_summary_{timestamp}.png"
-        plt.savefig(summary_file, dpi=300, bbox_inches='tight', facecolor='white', edgecolor='none')
-        plt.close()
-        print_status('success', f"Summary chart exported: {Colors.CYAN}{summary_file.name}{Colors.END}")
-
-        print_status('success', f"All PNG charts exported to: {Colors.CYAN}{output_dir}{Colors.END}")
-        return [pie_file, bar_file, risk_file, summary_file]
+    def key(self):
+        """Identity of the rendered output; charts are re-rendered only when it changes"""
+        return (self.country_name, self.timestamp, tuple(self.categories), tuple(self.counts))
 
-    except Exception as e:
-        print_status('error', f"PNG export failed: {Colors.RED}{e}{Colors.END}")
-        return None
+_chart_assets = {}
 
-def export_html_with_charts(scan_data, verbose=False):
-    """Export scan results to HTML with embedded charts"""
-    try:
-        output_dir = create_output_directory()
-        timestamp = scan_data.timestamp.strftime('%Y%m%d_%H%M%S')
-        filename = f"moiraguard_scan_{timestamp}.html"
-        filepath = output_dir / filename
+def chart_logo():
+    """Decoded logo image (or None), loaded once per process"""
+    if 'logo' not in _chart_assets:
+        _chart_assets['logo'] = None
+        if LOGO_PATH.exists():
+            try:
+                _chart_assets['logo'] = plt.imread(str(LOGO_PATH))
+            except Exception:
+                pass
+    return _chart_assets['logo']
 
-        # Prepare data for charts
-        categories = list(scan_data.categories.keys())
-        counts = [scan_data.categories[cat]['count'] for cat in categories]
-        total = sum(counts)
-
-        # Enhanced color scheme - distinct colors for each category
-        colors_map = {
-            'Smart Home Devices': '#00a8e8',    # Cyan Blue (IoT theme)
-            'IoT Cameras': '#DC143C',           # Crimson Red (Critical)
-            'SCADA/ICS': '#8B0000',             # Dark Red (Critical)
-            'Building Automation': '#9C27B0',   # Purple (Control Systems)
-            'MQTT Brokers': '#FF6F00',          # Deep Orange (Messaging)
-            'Industrial IoT': '#1B5E20'         # Dark Green (Industrial)
-        }
-        chart_colors = [colors_map.get(cat, '#4682B4') for cat in categories]
-
-        # Load and encode logo as base64
-        logo_base64 = ""
-        logo_path = Path("MoiraGuard-Eye-O-Tea-logo.png")
-        if logo_path.exists():
+def logo_base64():
+    """Base64-encoded logo file for inline HTML (empty if missing), read once"""
+    if 'logo_base64' not in _chart_assets:
+        _chart_assets['logo_base64'] = ""
+        if LOGO_PATH.exists():
             try:
-                with open(logo_path, 'rb') as logo_file:
-                    logo_base64 = base64.b64encode(logo_file.read()).decode('utf-8')
+                with open(LOGO_PATH, 'rb') as logo_file:
+                    _chart_assets['logo_base64'] = base64.b64encode(logo_file.read()).decode('utf-8')
             except Exception:
                 pass
+    return _chart_assets['logo_base64']
+
+def init_chart_style():
+    """Apply the shared matplotlib style and preload assets (once per worker)"""
+    # Modern clean style with better fonts
+    plt.style.use('seaborn-v0_8-whitegrid')
+    plt.rcParams.update({
+        'font.family': 'sans-serif',
+        'font.sans-serif': ['Arial', 'Helvetica', 'DejaVu Sans'],
+        'font.size': 11,
+        'axes.labelsize': 13,
+        'axes.titlesize': 16,
+        'xtick.labelsize': 11,
+        'ytick.labelsize': 11,
+        'legend.fontsize': 11,
+        'figure.titlesize': 18
+    })
+    chart_logo()
+
+def _figure_bytes(fig, rect, profile):
+    """Lay out, encode and close a figure; returns image bytes"""
+    buffer = io.BytesIO()
+    fig.tight_layout(rect=rect)
+    fig.savefig(buffer, format=profile.fmt, dpi=profile.dpi_for(fig),
+                bbox_inches='tight' if profile.tight else None, facecolor='white', edgecolor='none')
+    plt.close(fig)
+    return buffer.getvalue()
+
+def _render_pie_chart(model, logo_img, profile):
+    """Device distribution pie chart"""
+    fig1, ax1 = plt.subplots(figsize=(14, 10), facecolor='white')
+
+    wedges, texts, autotexts = ax1.pie(
+        model.counts, labels=model.categories, colors=model.colors,
+        autopct='%1.1f%%', startangle=90,
+        textprops={'fontsize': 12, 'weight': 'bold'},
+        explode=[0.03] * len(model.categories),
+        shadow=True,
+        pctdistance=0.85
+    )
+
+    # Style percentage text
+    for autotext in autotexts:
+        autotext.set_color('white')
+        autotext.set_fontweight('bold')
+        autotext.set_fontsize(13)
+
+    # Enhanced title
+    title_text = f'MOIRAGUARD IoT Device Distribution\n{model.country_name} | Total: {model.total:,} Devices\n{model.timestamp.strftime("%Y-%m-%d %H:%M:%S")}'
+    ax1.set_title(title_text, fontsize=20, fontweight='bold', pad=35, color='#2c3e50')
+
+    # Add logo if available
+    if logo_img is not None:
+        imagebox = OffsetImage(logo_img, zoom=0.12)
+        ab = AnnotationBbox(imagebox, (1.35, 1.15), frameon=False,
+                           xycoords='axes fraction')
+        ax1.add_artist(ab)
+
+    # Professional footer
+    fig1.text(0.5, 0.02, CHART_FOOTER, ha='center', fontsize=11, style='italic', color='#7f8c8d')
+    return _figure_bytes(fig1, [0, 0.03, 1, 0.97], profile)
+
+def _render_bar_chart(model, logo_img, profile):
+    """Category comparison bar chart"""
+    categories, counts = model.categories, model.counts
+    fig2, ax2 = plt.subplots(figsize=(16, 10), facecolor='white')
+
+    bars = ax2.bar(
+        range(len(categories)), counts,
+        color=model.colors,
+        edgecolor='#2c3e50',
+        linewidth=2,
+        alpha=0.85,
+        width=0.7
+    )
+
+    # Style axes
+    ax2.set_xlabel('IoT Device Category', fontsize=15, fontweight='bold', color='#2c3e50', labelpad=10)
+    ax2.set_ylabel('Number of Exposed Devices', fontsize=15, fontweight='bold', color='#2c3e50', labelpad=10)
+    ax2.set_xticks(range(len(categories)))
+    ax2.set_xticklabels(categories, rotation=30, ha='right', fontsize=12, weight='bold')
+    ax2.yaxis.set_major_formatter(plt.FuncFormatter(lambda x, p: f'{int(x):,}'))
+    ax2.grid(axis='y', alpha=0.25, linestyle='--', linewidth=0.8, color='#95a5a6')
+    ax2.set_axisbelow(True)
+    ax2.spines['top'].set_visible(False)
+    ax2.spines['right'].set_visible(False)
+
+    # Enhanced title
+    title_text = f'MOIRAGUARD IoT Exposure by Category\n{model.country_name} | Total: {model.total:,} Devices | {model.timestamp.strftime("%Y-%m-%d %H:%M")}'
+    ax2.set_title(title_text, fontsize=20, fontweight='bold', pad=35, color='#2c3e50')
+
+    # Add value labels on bars
+    for bar, count in zip(bars, counts):
+        height = bar.get_height()
+        ax2.text(
+            bar.get_x() + bar.get_width() / 2., height + (max(counts) * 0.015),
+            f'{count:,}',
+            ha='center', va='bottom',
+            fontsize=12, fontweight='bold',
+            color='#2c3e50'
+        )
 
-        # Generate HTML
-        html_content = f"""<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>MOIRAGUARD Scan Report - {scan_data.timestamp.strftime('%Y-%m-%d')}</title>
-    <script src="https://cdn.jsdelivr.net/npm/chart.js"></script>
-    <style>
+    # Add logo
+    if logo_img is not None:
+        imagebox = OffsetImage(logo_img, zoom=0.1)
+        ab = AnnotationBbox(imagebox, (1.08, 1.08), frameon=False,
+                           xycoords='axes fraction')
+        ax2.add_artist(ab)
+
+    # Footer
+    fig2.text(0.5, 0.02, CHART_FOOTER, ha='center', fontsize=11, style='italic', color='#7f8c8d')
+    return _figure_bytes(fig2, [0, 0.03, 1, 0.97], profile)
+
+def _render_risk_chart(model, logo_img, profile):
+    """Risk level doughnut chart"""
+    total = model.total
+    fig3, ax3 = plt.subplots(figsize=(14, 10), facecolor='white')
+
+    wedges, texts, autotexts = ax3.pie(
+        model.risk_values, labels=model.risk_labels,
+        colors=model.risk_colors,
+        autopct='%1.1f%%', startangle=90,
+        wedgeprops=dict(width=0.4, edgecolor='white', linewidth=4),
+        textprops={'fontsize': 14, 'weight': 'bold'},
+        explode=[0.05] * len(model.risk_labels),
+        shadow=True
+    )
+
+    # Style percentage text
+    for autotext in autotexts:
+        autotext.set_color('white')
+        autotext.set_fontweight('bold')
+        autotext.set_fontsize(15)
+
+    # Enhanced title
+    title_text = f'MOIRAGUARD Risk Level Distribution\n{model.country_name} | Total: {total:,} Devices\n{model.timestamp.strftime("%Y-%m-%d")}'
+    ax3.set_title(title_text, fontsize=20, fontweight='bold', pad=35, color='#2c3e50')
+
+    # Add center text in doughnut
+    centre_circle = plt.Circle((0, 0), 0.60, fc='white', linewidth=0)
+    ax3.add_artist(centre_circle)
+    ax3.text(0, 0.05, f'{total:,}', ha='center', va='center',
+            fontsize=24, weight='bold', color='#2c3e50')
+    ax3.text(0, -0.12, 'Devices', ha='center', va='center',
+            fontsize=16, weight='bold', color='#7f8c8d')
+
+    # Enhanced legend
+    legend_labels = [f'{label}: {value:,} devices ({value/total*100:.1f}%)'
+                    for label, value in zip(model.risk_labels, model.risk_values)]
+    legend = ax3.legend(legend_labels, loc='upper left', bbox_to_anchor=(1.02, 1),
+                       fontsize=13, frameon=True, shadow=True, fancybox=True)
+    legend.get_frame().set_facecolor('white')
+    legend.get_frame().set_alpha(0.95)
+    legend.get_frame().set_edgecolor('#95a5a6')
+
+    # Add logo
+    if logo_img is not None:
+        imagebox = OffsetImage(logo_img, zoom=0.1)
+        ab = AnnotationBbox(imagebox, (1.3, 1.15), frameon=False,
+                           xycoords='axes fraction')
+        ax3.add_artist(ab)
+
+    # Footer
+    fig3.text(0.5, 0.02, CHART_FOOTER, ha='center', fontsize=11, style='italic', color='#7f8c8d')
+    return _figure_bytes(fig3, [0, 0.03, 1, 0.97], profile)
+
+def _render_summary_chart(model, logo_img, profile):
+    """Combined summary chart (pie, risk doughnut and category breakdown)"""
+    categories, counts, total = model.categories, model.counts, model.total
+    fig4 = plt.figure(figsize=(22, 13), facecolor='white')
+
+    # Add logo at top center if available
+    if logo_img is not None:
+        ax_logo = fig4.add_axes([0.42, 0.93, 0.16, 0.07])
+        ax_logo.imshow(logo_img)
+        ax_logo.axis('off')
+
+    # Device distribution pie chart
+    ax4_1 = fig4.add_subplot(2, 2, 1)
+    wedges, texts, autotexts = ax4_1.pie(
+        counts, labels=categories, colors=model.colors,
+        autopct='%1.1f%%', startangle=90,
+        textprops={'fontsize': 11, 'weight': 'bold'},
+        explode=[0.02] * len(categories),
+        shadow=True
+    )
+    ax4_1.set_title('Device Distribution by Category', fontsize=15, fontweight='bold',
+                   pad=15, color='#2c3e50')
+    for autotext in autotexts:
+        autotext.set_color('white')
+        autotext.set_fontweight('bold')
+        autotext.set_fontsize(12)
+
+    # Risk level doughnut chart
+    ax4_2 = fig4.add_subplot(2, 2, 2)
+    wedges, texts, autotexts = ax4_2.pie(
+        model.risk_values, labels=model.risk_labels,
+        colors=model.risk_colors,
+        autopct='%1.1f%%', startangle=90,
+        textprops={'fontsize': 12, 'weight': 'bold'},
+        wedgeprops=dict(width=0.4, edgecolor='white', linewidth=2),
+        explode=[0.05] * len(model.risk_labels),
+        shadow=True
+    )
+    ax4_2.set_title('Risk Level Distribution', fontsize=15, fontweight='bold',
+                   pad=15, color='#2c3e50')
+    for autotext in autotexts:
+        autotext.set_color('white')
+        autotext.set_fontweight('bold')
+        autotext.set_fontsize(13)
+
+    # Center circle for doughnut
+    centre_circle = plt.Circle((0, 0), 0.40, fc='white', linewidth=0)
+    ax4_2.add_artist(centre_circle)
+    ax4_2.text(0, 0, f'{total:,}', ha='center', va='center',
+              fontsize=18, weight='bold', color='#2c3e50')
+
+    # Horizontal bar chart at bottom
+    ax4_3 = fig4.add_subplot(2, 1, 2)
+    bars = ax4_3.barh(categories, counts, color=model.colors,
+                     edgecolor='#2c3e50', linewidth=1.5, alpha=0.85)
+    ax4_3.set_xlabel('Number of Exposed Devices', fontsize=14, fontweight='bold',
+                    color='#2c3e50', labelpad=10)
+    ax4_3.set_title('Detailed Category Breakdown', fontsize=15, fontweight='bold',
+                   pad=15, color='#2c3e50')
+    ax4_3.xaxis.set_major_formatter(plt.FuncFormatter(lambda x, p: f'{int(x):,}'))
+    ax4_3.grid(axis='x', alpha=0.2, linestyle='--', color='#95a5a6')
+    ax4_3.set_axisbelow(True)
+    ax4_3.spines['top'].set_visible(False)
+    ax4_3.spines['right'].set_visible(False)
+
+    # Add value labels
+    for bar, count in zip(bars, counts):
+        width = bar.get_width()
+        ax4_3.text(width + (max(counts) * 0.01), bar.get_y() + bar.get_height()/2,
+                  f'{count:,}',
+                  ha='left', va='center', fontsize=11, fontweight='bold', color='#2c3e50')
+
+    # Main title
+    main_title = f'MOIRAGUARD IoT Security Scan Summary\n{model.country_name} | Total: {total:,} Devices | {model.timestamp.strftime("%Y-%m-%d %H:%M:%S")}'
+    fig4.suptitle(main_title, fontsize=22, fontweight='bold', y=0.985, color='#2c3e50')
+
+    # Footer with branding
+    fig4.text(0.5, 0.005,
+             f'👁️ Generated by MOIRAGUARD Eye-O-Tea Scanner | DEFCON GROUP CASABLANCA 2026 | Author: @MLY\n'
+             f'⚠️ For Security Research & Educational Purposes Only ⚠️',
+             ha='center', fontsize=11, style='italic', color='#7f8c8d')
+    return _figure_bytes(fig4, [0, 0.02, 1, 0.97], profile)
+
+_CHART_RENDERERS = {
+    'pie': _render_pie_chart,
+    'bar': _render_bar_chart,
+    'risk': _render_risk_chart,
+    'summary': _render_summary_chart,
+}
+
+def _render_chart_job(job):
+    """Worker entry point: render one (key, chart name, model, profile) job"""
+    key, name, model, profile = job
+    return key, name, _CHART_RENDERERS[name](model, chart_logo(), profile)
+
+def _run_chart_jobs(jobs, max_workers=4):
+    """Run chart jobs in worker processes (in-process if unavailable or
+    only one job). Returns {key: {chart name: image bytes}}."""
+    results = defaultdict(dict)
+    if max_workers > 1 and len(jobs) > 1:
+        try:
+            with concurrent.futures.ProcessPoolExecutor(
+                    max_workers=min(max_workers, len(jobs)), initializer=init_chart_style) as pool:
+                for key, name, image in pool.map(_render_chart_job, jobs):
+                    results[key][name] = image
+                return results
+        except (OSError, concurrent.futures.process.BrokenProcessPool) as e:
+            print_status('warning', f"Parallel chart rendering unavailable ({e}) - rendering in-process")
+            results.clear()
+    init_chart_style()
+    for key, name, image in map(_render_chart_job, jobs):
+        results[key][name] = image
+    return results
+
+def render_charts(model, names=None, max_workers=4, profile=None):
+    """Render charts for a ChartModel in parallel worker processes.
+    Returns {name: image bytes}."""
+    profile = get_chart_profile(profile)
+    jobs = [(0, name, model, profile) for name in (names or CHART_FILES)]
+    return _run_chart_jobs(jobs, max_workers)[0]
+
+def get_rendered_charts(scan_data, profile=None):
+    """Rendered charts for scan_data, rendering only on first use (or after
+    the counts or profile change). Returns (ChartModel, {name: bytes})."""
+    profile = get_chart_profile(profile)
+    model = ChartModel(scan_data)
+    key = (model.key(), profile.key())
+    cached = getattr(scan_data, 'chart_cache', None)
+    if cached is None or cached[0] != key:
+        print_status('info', f"Rendering charts ({profile.name}, {profile.fmt.upper()})...")
+        with perf_span('render.charts', profile.name, charts=len(CHART_FILES)):
+            scan_data.chart_cache = (key, render_charts(model, profile=profile))
+    return model, scan_data.chart_cache[1]
+
+def prerender_charts(scan_datas, profile=None, max_workers=4):
+    """Render charts for many ScanData objects through one worker pool
+    (regional batches), filling each chart_cache"""
+    profile = get_chart_profile(profile)
+    jobs = []
+    for i, scan_data in enumerate(scan_datas):
+        model = ChartModel(scan_data)
+        if model.total:
+            jobs.extend((i, name, model, profile) for name in CHART_FILES)
+    with perf_span('render.charts', profile.name, charts=len(jobs)):
+        rendered = _run_chart_jobs(jobs, max_workers)
+    for i, charts in rendered.items():
+        scan_data = scan_datas[i]
+        scan_data.chart_cache = ((ChartModel(scan_data).key(), profile.key()), charts)
+
+@traced_export('png')
+def export_png_charts(scan_data, profile=None, output_dir=None, name_suffix=None):
+    """Export charts as image files (PNG by default; see ChartProfile)
+    using matplotlib with logo and improved styling"""
+    try:
+        output_dir = Path(output_dir) if output_dir else create_output_directory()
+        suffix = name_suffix or scan_data.timestamp.strftime('%Y%m%d_%H%M%S')
+        profile = get_chart_profile(profile)
+        model, charts = get_rendered_charts(scan_data, profile)
+
+        files = []
+        for name, (prefix, label) in CHART_FILES.items():
+            chart_file = output_dir / f"{prefix}_{suffix}.{profile.fmt}"
+            with open(chart_file, 'wb') as f:
+                f.write(charts[name])
+            files.append(chart_file)
+            print_status('success', f"{label} exported: {Colors.CYAN}{chart_file.name}{Colors.END}")
+
+        print_status('success', f"All {profile.fmt.upper()} charts exported to: {Colors.CYAN}{output_dir}{Colors.END}")
+        return files
+
+    except Exception as e:
+        print_status('error', f"Chart export failed: {Colors.RED}{e}{Colors.END}")
+        return None
+
+# ── HTML report templates ────────────────────────────────────────────────
+# The report is assembled from precompiled string.Template pieces and
+# written to the file section by section; device rows are streamed, so
+# verbose reports grow linearly with the device count. The stylesheet is
+# a constant, inlined by default or written once per output directory as
+# a shared asset (--html-css shared).
+HTML_REPORT_CSS = """\
         /* 👁️ MOIRAGUARD Eye O Tea - Cyber-Mystic Neon Theme */
-        * {{ margin: 0; padding: 0; box-sizing: border-box; }}
+        * { margin: 0; padding: 0; box-sizing: border-box; }
 
-        body {{
+        body {
             font-family: 'Rajdhani', 'Orbitron', 'Segoe UI', sans-serif;
             background: #05070B;
             color: #E6F0F5;
             padding: 20px;
             position: relative;
             overflow-x: hidden;
-        }}
+        }
 
         /* Animated circuit pattern background */
-        body::before {{
+        body::before {
             content: '';
             position: fixed;
             top: 0;
@@ -1239,14 +4195,14 @@ def export_html_with_charts(scan_data, verbose=False):
             pointer-events: none;
             z-index: 0;
             animation: pulseGlow 8s ease-in-out infinite;
-        }}
+        }
 
-        @keyframes pulseGlow {{
-            0%, 100% {{ opacity: 0.5; }}
-            50% {{ opacity: 0.8; }}
-        }}
+        @keyframes pulseGlow {
+            0%, 100% { opacity: 0.5; }
+            50% { opacity: 0.8; }
+        }
 
-        .container {{
+        .container {
             max-width: 1400px;
             margin: 0 auto;
             background: rgba(11, 18, 32, 0.95);
@@ -1260,10 +4216,10 @@ def export_html_with_charts(scan_data, verbose=False):
             z-index: 1;
             border: 1px solid rgba(0, 255, 136, 0.3);
             backdrop-filter: blur(10px);
-        }}
+        }
 
         /* Neon header with eye effect gradient */
-        .header {{
+        .header {
             background: linear-gradient(135deg, #02140F 0%, #052E23 100%);
             color: #E6F0F5;
             padding: 50px 40px;
@@ -1271,9 +4227,9 @@ def export_html_with_charts(scan_data, verbose=False):
             position: relative;
             overflow: hidden;
             border-bottom: 2px solid #00FF88;
-        }}
+        }
 
-        .header::before {{
+        .header::before {
             content: '';
             position: absolute;
             top: 50%;
@@ -1284,14 +4240,14 @@ def export_html_with_charts(scan_data, verbose=False):
             background: radial-gradient(circle at center, rgba(0, 255, 170, 0.15) 0%, rgba(0, 59, 46, 0.1) 40%, transparent 70%);
             pointer-events: none;
             animation: eyePulse 6s ease-in-out infinite;
-        }}
+        }
 
-        @keyframes eyePulse {{
-            0%, 100% {{ transform: translate(-50%, -50%) scale(1); opacity: 0.3; }}
-            50% {{ transform: translate(-50%, -50%) scale(1.2); opacity: 0.6; }}
-        }}
+        @keyframes eyePulse {
+            0%, 100% { transform: translate(-50%, -50%) scale(1); opacity: 0.3; }
+            50% { transform: translate(-50%, -50%) scale(1.2); opacity: 0.6; }
+        }
 
-        .header h1 {{
+        .header h1 {
             font-size: 2.8em;
             margin-bottom: 15px;
             background: linear-gradient(180deg, #FFFFFF 0%, #BFC9D4 50%, #7A8A99 100%);
@@ -1303,9 +4259,9 @@ def export_html_with_charts(scan_data, verbose=False):
             z-index: 1;
             font-weight: 900;
             letter-spacing: 2px;
-        }}
+        }
 
-        .header .subtitle {{
+        .header .subtitle {
             font-size: 1.3em;
             position: relative;
             z-index: 1;
@@ -1313,10 +4269,10 @@ def export_html_with_charts(scan_data, verbose=False):
             text-shadow: 0 0 15px rgba(0, 255, 136, 0.8), 0 0 30px rgba(0, 201, 107, 0.4);
             font-weight: 600;
             letter-spacing: 1px;
-        }}
+        }
 
         /* Critical warning banner */
-        .warning-banner {{
+        .warning-banner {
             background: linear-gradient(135deg, #DC143C 0%, #8B0000 100%);
             color: white;
             padding: 18px;
@@ -1326,18 +4282,18 @@ def export_html_with_charts(scan_data, verbose=False):
             box-shadow: 0 0 20px rgba(220, 20, 60, 0.4);
             border-top: 1px solid rgba(255, 255, 255, 0.1);
             border-bottom: 1px solid rgba(255, 255, 255, 0.1);
-        }}
+        }
 
         /* Glassmorphic meta cards */
-        .meta-info {{
+        .meta-info {
             display: grid;
             grid-template-columns: repeat(auto-fit, minmax(200px, 1fr));
             gap: 25px;
             padding: 40px;
             background: linear-gradient(135deg, rgba(11, 18, 32, 0.6) 0%, rgba(5, 46, 35, 0.4) 100%);
-        }}
+        }
 
-        .meta-card {{
+        .meta-card {
             background: rgba(0, 255, 136, 0.05);
             padding: 25px;
             border-radius: 15px;
@@ -1348,9 +4304,9 @@ def export_html_with_charts(scan_data, verbose=False):
             backdrop-filter: blur(10px);
             position: relative;
             overflow: hidden;
-        }}
+        }
 
-        .meta-card::before {{
+        .meta-card::before {
             content: '';
             position: absolute;
             top: 0;
@@ -1359,41 +4315,41 @@ def export_html_with_charts(scan_data, verbose=False):
             height: 100%;
             background: linear-gradient(90deg, transparent, rgba(0, 255, 136, 0.1), transparent);
             transition: left 0.5s;
-        }}
+        }
 
-        .meta-card:hover {{
+        .meta-card:hover {
             transform: translateY(-5px);
             box-shadow: 0 0 30px rgba(0, 255, 136, 0.4);
             border-color: #00FF88;
-        }}
+        }
 
-        .meta-card:hover::before {{
+        .meta-card:hover::before {
             left: 100%;
-        }}
+        }
 
-        .meta-card .label {{
+        .meta-card .label {
             color: #A7B8C5;
             font-size: 0.85em;
             margin-bottom: 10px;
             font-weight: 700;
             text-transform: uppercase;
             letter-spacing: 2px;
-        }}
+        }
 
-        .meta-card .value {{
+        .meta-card .value {
             color: #00FF88;
             font-size: 2em;
             font-weight: bold;
             text-shadow: 0 0 15px rgba(0, 255, 136, 0.6);
             font-family: 'Orbitron', monospace;
-        }}
+        }
         /* Neon chart sections */
-        .charts-section {{
+        .charts-section {
             padding: 50px 40px;
             background: linear-gradient(135deg, rgba(5, 7, 11, 0.9) 0%, rgba(11, 18, 32, 0.9) 100%);
-        }}
+        }
 
-        .chart-container {{
+        .chart-container {
             margin-bottom: 50px;
             background: rgba(0, 255, 136, 0.03);
             padding: 35px;
@@ -1403,9 +4359,9 @@ def export_html_with_charts(scan_data, verbose=False):
             transition: all 0.3s ease;
             backdrop-filter: blur(10px);
             position: relative;
-        }}
+        }
 
-        .chart-container::before {{
+        .chart-container::before {
             content: '';
             position: absolute;
             top: -2px;
@@ -1417,18 +4373,18 @@ def export_html_with_charts(scan_data, verbose=False):
             opacity: 0;
             z-index: -1;
             transition: opacity 0.3s;
-        }}
+        }
 
-        .chart-container:hover {{
+        .chart-container:hover {
             box-shadow: 0 0 40px rgba(0, 255, 136, 0.3);
             transform: translateY(-3px);
-        }}
+        }
 
-        .chart-container:hover::before {{
+        .chart-container:hover::before {
             opacity: 0.3;
-        }}
+        }
 
-        .chart-title {{
+        .chart-title {
             font-size: 1.7em;
             color: #E6F0F5;
             margin-bottom: 25px;
@@ -1438,9 +4394,9 @@ def export_html_with_charts(scan_data, verbose=False):
             padding-bottom: 20px;
             text-transform: uppercase;
             letter-spacing: 2px;
-        }}
+        }
 
-        .chart-title::after {{
+        .chart-title::after {
             content: '';
             position: absolute;
             bottom: 0;
@@ -1451,18 +4407,18 @@ def export_html_with_charts(scan_data, verbose=False):
             background: linear-gradient(90deg, #00FF88 0%, #00C96B 50%, #007A4D 100%);
             border-radius: 2px;
             box-shadow: 0 0 10px rgba(0, 255, 136, 0.5);
-        }}
+        }
 
         /* Neon stat cards */
-        .stats-grid {{
+        .stats-grid {
             display: grid;
             grid-template-columns: repeat(auto-fit, minmax(280px, 1fr));
             gap: 25px;
             padding: 40px;
             background: linear-gradient(135deg, rgba(2, 20, 15, 0.6) 0%, rgba(5, 46, 35, 0.4) 100%);
-        }}
+        }
 
-        .stat-card {{
+        .stat-card {
             background: rgba(0, 255, 136, 0.05);
             padding: 30px;
             border-radius: 15px;
@@ -1472,9 +4428,9 @@ def export_html_with_charts(scan_data, verbose=False):
             position: relative;
             overflow: hidden;
             backdrop-filter: blur(10px);
-        }}
+        }
 
-        .stat-card::before {{
+        .stat-card::before {
             content: '';
             position: absolute;
             top: -50%;
@@ -1484,50 +4440,50 @@ def export_html_with_charts(scan_data, verbose=False):
             background: radial-gradient(circle, rgba(0, 255, 136, 0.1) 0%, transparent 70%);
             border-radius: 50%;
             animation: rotatePulse 10s linear infinite;
-        }}
+        }
 
-        @keyframes rotatePulse {{
-            0% {{ transform: rotate(0deg) scale(1); }}
-            50% {{ transform: rotate(180deg) scale(1.2); }}
-            100% {{ transform: rotate(360deg) scale(1); }}
-        }}
+        @keyframes rotatePulse {
+            0% { transform: rotate(0deg) scale(1); }
+            50% { transform: rotate(180deg) scale(1.2); }
+            100% { transform: rotate(360deg) scale(1); }
+        }
 
-        .stat-card:hover {{
+        .stat-card:hover {
             transform: translateY(-5px);
             box-shadow: 0 0 30px rgba(0, 255, 136, 0.3);
-        }}
+        }
 
-        .stat-card.critical {{
+        .stat-card.critical {
             border-left-color: #DC143C;
             box-shadow: 0 8px 32px rgba(220, 20, 60, 0.2);
-        }}
-        .stat-card.high {{
+        }
+        .stat-card.high {
             border-left-color: #FF6F00;
             box-shadow: 0 8px 32px rgba(255, 111, 0, 0.2);
-        }}
-        .stat-card.medium {{
+        }
+        .stat-card.medium {
             border-left-color: #FFD700;
             box-shadow: 0 8px 32px rgba(255, 215, 0, 0.2);
-        }}
+        }
 
-        .stat-card h3 {{
+        .stat-card h3 {
             color: #E6F0F5;
             font-size: 1.15em;
             margin-bottom: 15px;
             font-weight: 600;
             text-transform: uppercase;
             letter-spacing: 1px;
-        }}
+        }
 
-        .stat-card .count {{
+        .stat-card .count {
             font-size: 3em;
             font-weight: bold;
             color: #00FF88;
             text-shadow: 0 0 20px rgba(0, 255, 136, 0.6);
             font-family: 'Orbitron', monospace;
-        }}
+        }
 
-        .stat-card .risk {{
+        .stat-card .risk {
             margin-top: 12px;
             padding: 8px 16px;
             border-radius: 20px;
@@ -1536,49 +4492,49 @@ def export_html_with_charts(scan_data, verbose=False):
             font-weight: bold;
             text-transform: uppercase;
             letter-spacing: 1px;
-        }}
+        }
 
-        .risk.critical {{
+        .risk.critical {
             background: linear-gradient(135deg, #DC143C 0%, #8B0000 100%);
             color: white;
             box-shadow: 0 0 15px rgba(220, 20, 60, 0.5);
-        }}
-        .risk.high {{
+        }
+        .risk.high {
             background: linear-gradient(135deg, #FF6F00 0%, #CC5500 100%);
             color: white;
             box-shadow: 0 0 15px rgba(255, 111, 0, 0.5);
-        }}
-        .risk.medium {{
+        }
+        .risk.medium {
             background: linear-gradient(135deg, #FFD700 0%, #FFA500 100%);
             color: #000;
             box-shadow: 0 0 15px rgba(255, 215, 0, 0.5);
-        }}
-        .devices-table {{
+        }
+        .devices-table {
             width: 100%;
             margin: 30px;
             overflow-x: auto;
-        }}
-        table {{
+        }
+        table {
             width: 100%;
             border-collapse: collapse;
             background: white;
             box-shadow: 0 2px 15px rgba(0,0,0,0.1);
-        }}
-        th, td {{
+        }
+        th, td {
             padding: 15px;
             text-align: left;
             border-bottom: 1px solid #ddd;
-        }}
-        th {{
+        }
+        th {
             background: #2a5298;
             color: white;
             font-weight: bold;
-        }}
-        tr:hover {{
+        }
+        tr:hover {
             background: #f5f5f5;
-        }}
+        }
         /* Neon footer */
-        .footer {{
+        .footer {
             background: linear-gradient(135deg, #02140F 0%, #052E23 100%);
             color: #E6F0F5;
             padding: 35px 20px;
@@ -1586,9 +4542,9 @@ def export_html_with_charts(scan_data, verbose=False):
             position: relative;
             overflow: hidden;
             border-top: 2px solid #00FF88;
-        }}
+        }
 
-        .footer::before {{
+        .footer::before {
             content: '';
             position: absolute;
             top: 0;
@@ -1599,26 +4555,30 @@ def export_html_with_charts(scan_data, verbose=False):
                 radial-gradient(circle at 30% 50%, rgba(0, 255, 136, 0.1) 0%, transparent 60%),
                 radial-gradient(circle at 70% 50%, rgba(0, 201, 107, 0.08) 0%, transparent 60%);
             pointer-events: none;
-        }}
+        }
 
-        .footer p {{
+        .footer p {
             position: relative;
             z-index: 1;
             margin: 10px 0;
             text-shadow: 0 0 10px rgba(0, 255, 136, 0.3);
             letter-spacing: 1px;
-        }}
+        }
 
-        canvas {{
-            max-height: 450px;
-        }}
+        .chart-image {
+            display: block;
+            width: 100%;
+            max-width: 1100px;
+            margin: 0 auto;
+            border-radius: 10px;
+        }
 
         /* Neon table styling */
-        .devices-table {{
+        .devices-table {
             margin: 40px;
-        }}
+        }
 
-        table {{
+        table {
             width: 100%;
             border-collapse: collapse;
             background: rgba(11, 18, 32, 0.8);
@@ -1626,9 +4586,9 @@ def export_html_with_charts(scan_data, verbose=False):
             border-radius: 12px;
             overflow: hidden;
             border: 1px solid rgba(0, 255, 136, 0.2);
-        }}
+        }
 
-        th {{
+        th {
             background: linear-gradient(135deg, #02140F 0%, #00FF88 100%);
             color: #05070B;
             padding: 18px 15px;
@@ -1638,48 +4598,111 @@ def export_html_with_charts(scan_data, verbose=False):
             letter-spacing: 1.5px;
             font-size: 0.9em;
             text-shadow: 0 0 10px rgba(0, 255, 136, 0.5);
-        }}
+        }
 
-        td {{
+        td {
             padding: 15px;
             border-bottom: 1px solid rgba(0, 255, 136, 0.1);
             color: #A7B8C5;
             font-family: 'Courier New', monospace;
-        }}
+        }
 
-        tr:hover {{
+        tr:hover {
             background: rgba(0, 255, 136, 0.08);
-        }}
+        }
 
-        tr:hover td {{
+        tr:hover td {
             color: #00FF88;
             text-shadow: 0 0 5px rgba(0, 255, 136, 0.3);
-        }}
+        }
+
+        /* Device table controls */
+        .table-controls {
+            display: flex;
+            flex-wrap: wrap;
+            gap: 20px;
+            margin-bottom: 20px;
+        }
+
+        .table-controls label {
+            color: #A7B8C5;
+            font-size: 0.85em;
+            font-weight: 700;
+            text-transform: uppercase;
+            letter-spacing: 1px;
+        }
+
+        .table-controls select,
+        .table-controls input,
+        .table-pager button {
+            margin-left: 8px;
+            padding: 8px 12px;
+            background: #0B1220;
+            color: #E6F0F5;
+            border: 1px solid rgba(0, 255, 136, 0.3);
+            border-radius: 8px;
+            font-family: inherit;
+        }
+
+        .table-pager {
+            display: flex;
+            align-items: center;
+            justify-content: center;
+            gap: 20px;
+            margin-top: 20px;
+            color: #A7B8C5;
+        }
+
+        .table-pager button {
+            cursor: pointer;
+        }
+
+        .table-pager button:disabled {
+            opacity: 0.4;
+            cursor: default;
+        }
+
+        th[data-col] {
+            cursor: pointer;
+            user-select: none;
+        }
+
+        th[data-sort="asc"]::after { content: ' ▲'; }
+        th[data-sort="desc"]::after { content: ' ▼'; }
 
         /* Scrollbar styling */
-        ::-webkit-scrollbar {{
+        ::-webkit-scrollbar {
             width: 12px;
             height: 12px;
-        }}
+        }
 
-        ::-webkit-scrollbar-track {{
+        ::-webkit-scrollbar-track {
             background: #0B1220;
-        }}
+        }
 
-        ::-webkit-scrollbar-thumb {{
+        ::-webkit-scrollbar-thumb {
             background: linear-gradient(135deg, #00FF88 0%, #00C96B 100%);
             border-radius: 6px;
-        }}
+        }
 
-        ::-webkit-scrollbar-thumb:hover {{
+        ::-webkit-scrollbar-thumb:hover {
             background: linear-gradient(135deg, #00FFAA 0%, #00FF88 100%);
-        }}
-    </style>
+        }
+"""
+HTML_CSS_ASSET = 'moiraguard_report.css'
+
+HTML_REPORT_HEAD = Template("""<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>MOIRAGUARD Scan Report - $date</title>
+$styles
 </head>
 <body>
     <div class="container">
         <div class="header">
-            {f'<img src="data:image/png;base64,{logo_base64}" alt="MOIRAGUARD Logo" style="max-width: 300px; margin-bottom: 20px;">' if logo_base64 else ''}
+            $logo
             <h1>👁️ MOIRAGUARD Eye-O-Tea Scanner</h1>
             <div class="subtitle">IoT/IIoT Infrastructure Security Scan Report</div>
         </div>
@@ -1691,323 +4714,363 @@ def export_html_with_charts(scan_data, verbose=False):
         <div class="meta-info">
             <div class="meta-card">
                 <div class="label">Scan Date</div>
-                <div class="value">{scan_data.timestamp.strftime('%Y-%m-%d')}</div>
+                <div class="value">$date</div>
             </div>
             <div class="meta-card">
                 <div class="label">Scan Time</div>
-                <div class="value">{scan_data.timestamp.strftime('%H:%M:%S')}</div>
+                <div class="value">$time</div>
             </div>
             <div class="meta-card">
                 <div class="label">Target Region</div>
-                <div class="value">{scan_data.country_name}</div>
+                <div class="value">$region</div>
             </div>
             <div class="meta-card">
                 <div class="label">Total Devices</div>
-                <div class="value">{total:,}</div>
+                <div class="value">$total</div>
             </div>
         </div>
 
         <div class="stats-grid">
-"""
+""")
 
-        # Add individual category cards
-        risk_levels = {
-            'Smart Home Devices': ('HIGH', 'high'),
-            'IoT Cameras': ('CRITICAL', 'critical'),
-            'SCADA/ICS': ('CRITICAL', 'critical'),
-            'Building Automation': ('HIGH', 'high'),
-            'MQTT Brokers': ('HIGH', 'high'),
-            'Industrial IoT': ('CRITICAL', 'critical')
-        }
+HTML_LOGO = Template('<img src="data:image/png;base64,$logo" alt="MOIRAGUARD Logo" style="max-width: 300px; margin-bottom: 20px;">')
 
-        for category, data in scan_data.categories.items():
-            risk_text, risk_class = risk_levels.get(category, ('MEDIUM', 'medium'))
-            html_content += f"""
-            <div class="stat-card {risk_class}">
-                <h3>{category}</h3>
-                <div class="count">{data['count']:,}</div>
-                <span class="risk {risk_class}">{risk_text}</span>
+HTML_STAT_CARD = Template("""
+            <div class="stat-card $risk_class">
+                <h3>$category</h3>
+                <div class="count">$count</div>
+                <span class="risk $risk_class">$risk</span>
             </div>
-"""
+""")
 
-        html_content += """
+HTML_CHARTS = Template("""
         </div>
 
         <div class="charts-section">
             <div class="chart-container">
                 <div class="chart-title">📊 Device Distribution by Category</div>
-                <canvas id="categoryChart"></canvas>
+                <img class="chart-image" src="data:$mime;base64,$pie" alt="Device distribution by category">
             </div>
 
             <div class="chart-container">
                 <div class="chart-title">📈 Exposure by Category (Bar Chart)</div>
-                <canvas id="barChart"></canvas>
+                <img class="chart-image" src="data:$mime;base64,$bar" alt="Exposure by category">
             </div>
 
             <div class="chart-container">
                 <div class="chart-title">🎯 Risk Level Distribution</div>
-                <canvas id="riskChart"></canvas>
+                <img class="chart-image" src="data:$mime;base64,$risk" alt="Risk level distribution">
             </div>
         </div>
-"""
+""")
 
-        # Add detailed devices table if verbose
-        if verbose:
-            html_content += """
+HTML_DEVICE_TABLE = Template("""
         <div class="devices-table">
             <h2 style="margin-bottom: 20px; color: #2a5298;">🔍 Detailed Device Information</h2>
+            <div class="table-controls">
+                <label>Category <select id="filter-category"><option value="">All</option></select></label>
+                <label>Country <select id="filter-country"><option value="">All</option></select></label>
+                <label>Organization <input id="filter-org" type="search" placeholder="contains..."></label>
+                <label>Rows <select id="page-size"><option>25</option><option selected>50</option><option>100</option><option>500</option></select></label>
+            </div>
             <table>
                 <thead>
                     <tr>
-                        <th>Category</th>
-                        <th>IP Address</th>
-                        <th>Port</th>
-                        <th>Product</th>
-                        <th>Country</th>
-                        <th>City</th>
-                        <th>Organization</th>
+                        <th data-col="category">Category</th>
+                        <th data-col="ip">IP Address</th>
+                        <th data-col="port">Port</th>
+                        <th data-col="product">Product</th>
+                        <th data-col="country">Country</th>
+                        <th data-col="city">City</th>
+                        <th data-col="org">Organization</th>
                     </tr>
                 </thead>
-                <tbody>
-"""
-            for category, data in scan_data.categories.items():
-                for device in data['devices'][:50]:  # Limit to first 50 per category
-                    html_content += f"""
-                    <tr>
-                        <td>{category}</td>
-                        <td><code>{device.get('ip', 'N/A')}</code></td>
-                        <td>{device.get('port', 'N/A')}</td>
-                        <td>{device.get('product', 'N/A')}</td>
-                        <td>{device.get('country', 'N/A')}</td>
-                        <td>{device.get('city', 'N/A')}</td>
-                        <td>{device.get('org', 'N/A')}</td>
-                    </tr>
-"""
-            html_content += """
+                <tbody id="device-rows">
+                    <tr><td colspan="7">$device_count devices - enable JavaScript to browse the table.</td></tr>
                 </tbody>
             </table>
+            <div class="table-pager">
+                <button type="button" id="page-prev">&larr; Prev</button>
+                <span id="page-info"></span>
+                <button type="button" id="page-next">Next &rarr;</button>
+            </div>
         </div>
-"""
+""")
 
-        html_content += f"""
+HTML_REPORT_FOOTER = Template("""
         <div class="footer">
             <p>Generated by MOIRAGUARD Eye-O-Tea Scanner | DEFCON GROUP CASANLANCA 2026</p>
             <p>Author: Mohammed Amine Moulay (@MLY)</p>
             <p style="margin-top: 10px; font-size: 0.9em;">⚠️ For Security Research & Educational Purposes Only ⚠️</p>
         </div>
     </div>
-
-    <script>
-        // Category Pie Chart
-        // Category Pie Chart with Enhanced Colors
-        const ctx1 = document.getElementById('categoryChart').getContext('2d');
-        new Chart(ctx1, {{
-            type: 'pie',
-            data: {{
-                labels: {json.dumps(categories)},
-                datasets: [{{
-                    data: {json.dumps(counts)},
-                    backgroundColor: {json.dumps(chart_colors)},
-                    borderWidth: 3,
-                    borderColor: '#fff',
-                    hoverBorderWidth: 4,
-                    hoverBorderColor: '#00f2fe',
-                    hoverOffset: 15
-                }}]
-            }},
-            options: {{
-                responsive: true,
-                maintainAspectRatio: true,
-                plugins: {{
-                    legend: {{
-                        position: 'bottom',
-                        labels: {{
-                            padding: 20,
-                            font: {{
-                                size: 13,
-                                weight: 'bold',
-                                family: "'Segoe UI', Tahoma, Geneva, Verdana, sans-serif"
-                            }},
-                            color: '#0a192f',
-                            usePointStyle: true,
-                            pointStyle: 'circle',
-                            boxWidth: 15,
-                            boxHeight: 15
-                        }}
-                    }},
-                    tooltip: {{
-                        backgroundColor: 'rgba(10, 25, 47, 0.95)',
-                        titleColor: '#00f2fe',
-                        bodyColor: '#fff',
-                        borderColor: '#00a8e8',
-                        borderWidth: 2,
-                        padding: 12,
-                        titleFont: {{
-                            size: 14,
-                            weight: 'bold'
-                        }},
-                        bodyFont: {{
-                            size: 13
-                        }},
-                        callbacks: {{
-                            label: function(context) {{
-                                let label = context.label || '';
-                                let value = context.parsed || 0;
-                                let total = context.dataset.data.reduce((a, b) => a + b, 0);
-                                let percentage = ((value / total) * 100).toFixed(1);
-                                return label + ': ' + value.toLocaleString() + ' (' + percentage + '%)';
-                            }}
-                        }}
-                    }}
-                }},
-                animation: {{
-                    animateRotate: true,
-                    animateScale: true,
-                    duration: 1500
-                }}
-            }}
-        }});
-
-        // Bar Chart
-        // Bar Chart with Enhanced Styling
-        const ctx2 = document.getElementById('barChart').getContext('2d');
-        new Chart(ctx2, {{
-            type: 'bar',
-            data: {{
-                labels: {json.dumps(categories)},
-                datasets: [{{
-                    label: 'Exposed Devices',
-                    data: {json.dumps(counts)},
-                    backgroundColor: {json.dumps(chart_colors)},
-                    borderWidth: 2,
-                    borderColor: {json.dumps(chart_colors)},
-                    borderRadius: 8,
-                    hoverBackgroundColor: {json.dumps([c + 'dd' for c in chart_colors])},
-                    hoverBorderColor: '#00f2fe',
-                    hoverBorderWidth: 3
-                }}]
-            }},
-            options: {{
-                responsive: true,
-                maintainAspectRatio: true,
-                plugins: {{
-                    legend: {{
-                        display: false
-                    }},
-                    tooltip: {{
-                        backgroundColor: 'rgba(10, 25, 47, 0.95)',
-                        titleColor: '#00f2fe',
-                        bodyColor: '#fff',
-                        borderColor: '#00a8e8',
-                        borderWidth: 2,
-                        padding: 12,
-                        titleFont: {{
-                            size: 14,
-                            weight: 'bold'
-                        }},
-                        bodyFont: {{
-                            size: 13
-                        }}
-                    }}
-                }},
-                scales: {{
-                    y: {{
-                        beginAtZero: true,
-                        grid: {{
-                            color: 'rgba(0, 168, 232, 0.1)',
-                            lineWidth: 1
-                        }},
-                        ticks: {{
-                            color: '#0a192f',
-                            font: {{
-                                size: 12,
-                                weight: 'bold'
-                            }},
-                            callback: function(value) {{
-                                return value.toLocaleString();
-                            }}
-                        }}
-                    }},
-                    x: {{
-                        grid: {{
-                            display: false
-                        }},
-                        ticks: {{
-                            color: '#0a192f',
-                            font: {{
-                                size: 12,
-                                weight: 'bold'
-                            }}
-                        }}
-                    }}
-                }},
-                animation: {{
-                    duration: 1500,
-                    easing: 'easeOutQuart'
-                }}
-            }}
-        }});
-
-        // Risk Level Doughnut Chart
-        const riskData = {{
-            'CRITICAL': 0,
-            'HIGH': 0,
-            'MEDIUM': 0
-        }};
-
-        const riskMap = {json.dumps(dict(zip(categories, [risk_levels.get(cat, ('MEDIUM', 'medium'))[0] for cat in categories])))};
-        const countMap = {json.dumps(dict(zip(categories, counts)))};
-
-        for (let cat in riskMap) {{
-            riskData[riskMap[cat]] += countMap[cat];
-        }}
-
-        const ctx3 = document.getElementById('riskChart').getContext('2d');
-        new Chart(ctx3, {{
-            type: 'doughnut',
-            data: {{
-                labels: Object.keys(riskData),
-                datasets: [{{
-                    data: Object.values(riskData),
-                    backgroundColor: ['#DC143C', '#FF8C00', '#FFD700'],
-                    borderWidth: 2,
-                    borderColor: '#fff'
-                }}]
-            }},
-            options: {{
-                responsive: true,
-                maintainAspectRatio: true,
-                plugins: {{
-                    legend: {{
-                        position: 'bottom',
-                        labels: {{
-                            padding: 15,
-                            font: {{
-                                size: 12
-                            }}
-                        }}
-                    }},
-                    tooltip: {{
-                        callbacks: {{
-                            label: function(context) {{
-                                let label = context.label || '';
-                                let value = context.parsed || 0;
-                                let total = context.dataset.data.reduce((a, b) => a + b, 0);
-                                let percentage = ((value / total) * 100).toFixed(1);
-                                return label + ': ' + value.toLocaleString() + ' (' + percentage + '%)';
-                            }}
-                        }}
-                    }}
-                }}
-            }}
-        }});
-    </script>
+$scripts
 </body>
 </html>
+""")
+
+# Columns of the device table, in display order; all but ip are
+# dictionary-encoded in the embedded data (codes into "dicts")
+HTML_TABLE_COLUMNS = ('category', 'ip', 'port', 'product', 'country', 'city', 'org')
+
+# Client-side device table: reads the columnar JSON blob written by
+# write_device_blob and renders one page at a time (no external scripts)
+HTML_REPORT_JS = """\
+(function () {
+    var source = document.getElementById('device-data');
+    if (!source) { return; }
+    var blob = JSON.parse(source.textContent);
+    var data = blob.data, dicts = blob.dicts, total = blob.rows;
+    var $ = function (id) { return document.getElementById(id); };
+    var state = { sort: null, desc: false, page: 0, size: 50 };
+    var view = [];
+
+    function ipText(v) {
+        if (typeof v !== 'number') { return v === null ? 'N/A' : String(v); }
+        return [v >>> 24, (v >>> 16) & 255, (v >>> 8) & 255, v & 255].join('.');
+    }
+    function text(col, row) {
+        if (col === 'ip') { return ipText(data.ip[row]); }
+        var v = dicts[col][data[col][row]];
+        return v === null || v === undefined ? 'N/A' : String(v);
+    }
+    // Sort rank of every dictionary code, so sorting compares integers
+    var ranks = {};
+    function rank(col) {
+        if (!ranks[col]) {
+            var values = dicts[col], order = values.map(function (_, i) { return i; });
+            order.sort(function (a, b) {
+                var x = values[a], y = values[b];
+                if (x === y) { return 0; }
+                if (x === null) { return 1; }
+                if (y === null) { return -1; }
+                if (typeof x === 'number' && typeof y === 'number') { return x - y; }
+                return String(x).localeCompare(String(y));
+            });
+            ranks[col] = new Int32Array(values.length);
+            order.forEach(function (code, i) { ranks[col][code] = i; });
+        }
+        return ranks[col];
+    }
+    function fillSelect(select, col) {
+        var used = {};
+        data[col].forEach(function (code) { used[code] = true; });
+        Object.keys(used).map(Number)
+            .filter(function (code) { return dicts[col][code] !== null; })
+            .sort(function (a, b) { return rank(col)[a] - rank(col)[b]; })
+            .forEach(function (code) {
+                var option = document.createElement('option');
+                option.value = code;
+                option.textContent = dicts[col][code];
+                select.appendChild(option);
+            });
+    }
+
+    function apply() {
+        var category = $('filter-category').value, country = $('filter-country').value;
+        var org = $('filter-org').value.trim().toLowerCase();
+        var orgMatch = null;
+        if (org) {
+            orgMatch = dicts.org.map(function (v) { return v !== null && String(v).toLowerCase().indexOf(org) !== -1; });
+        }
+        category = category === '' ? -1 : Number(category);
+        country = country === '' ? -1 : Number(country);
+        view = [];
+        for (var row = 0; row < total; row++) {
+            if (category !== -1 && data.category[row] !== category) { continue; }
+            if (country !== -1 && data.country[row] !== country) { continue; }
+            if (orgMatch && !orgMatch[data.org[row]]) { continue; }
+            view.push(row);
+        }
+        if (state.sort) {
+            var col = state.sort, sign = state.desc ? -1 : 1, key;
+            if (col === 'ip') {
+                key = function (row) { var v = data.ip[row]; return typeof v === 'number' ? v : Infinity; };
+            } else {
+                var r = rank(col), codes = data[col];
+                key = function (row) { return r[codes[row]]; };
+            }
+            view.sort(function (a, b) { return (key(a) - key(b)) * sign || a - b; });
+        }
+        state.page = 0;
+        render();
+    }
+
+    function render() {
+        var body = $('device-rows'), pages = Math.max(1, Math.ceil(view.length / state.size));
+        state.page = Math.min(state.page, pages - 1);
+        var first = state.page * state.size, last = Math.min(first + state.size, view.length);
+        var fragment = document.createDocumentFragment();
+        for (var i = first; i < last; i++) {
+            var tr = document.createElement('tr');
+            blob.columns.forEach(function (col) {
+                var td = document.createElement('td');
+                if (col === 'ip') {
+                    var code = document.createElement('code');
+                    code.textContent = text(col, view[i]);
+                    td.appendChild(code);
+                } else {
+                    td.textContent = text(col, view[i]);
+                }
+                tr.appendChild(td);
+            });
+            fragment.appendChild(tr);
+        }
+        body.textContent = '';
+        body.appendChild(fragment);
+        $('page-info').textContent = view.length
+            ? 'Rows ' + (first + 1).toLocaleString() + '-' + last.toLocaleString() + ' of ' + view.length.toLocaleString()
+              + (view.length < total ? ' (filtered from ' + total.toLocaleString() + ')' : '')
+              + ' | Page ' + (state.page + 1) + ' / ' + pages
+            : 'No devices match the filters';
+        $('page-prev').disabled = state.page === 0;
+        $('page-next').disabled = state.page >= pages - 1;
+    }
+
+    fillSelect($('filter-category'), 'category');
+    fillSelect($('filter-country'), 'country');
+    $('filter-category').onchange = $('filter-country').onchange = apply;
+    $('filter-org').oninput = apply;
+    $('page-size').onchange = function () { state.size = Number(this.value); render(); };
+    $('page-prev').onclick = function () { state.page--; render(); };
+    $('page-next').onclick = function () { state.page++; render(); };
+    Array.prototype.forEach.call(document.querySelectorAll('th[data-col]'), function (th) {
+        th.onclick = function () {
+            var col = th.getAttribute('data-col');
+            state.desc = state.sort === col ? !state.desc : false;
+            state.sort = col;
+            Array.prototype.forEach.call(document.querySelectorAll('th[data-col]'), function (other) {
+                other.removeAttribute('data-sort');
+            });
+            th.setAttribute('data-sort', state.desc ? 'desc' : 'asc');
+            apply();
+        };
+    });
+    apply();
+})();
 """
+HTML_JS_ASSET = 'moiraguard_report.js'
+
+# Stylesheet/script handling: 'inline' (self-contained file) or 'shared' (linked assets)
+HTML_CSS_MODES = ('inline', 'shared')
+_html_css_mode = 'inline'
+
+def set_html_css(mode):
+    """Choose whether HTML reports inline the stylesheet and script or link shared assets"""
+    global _html_css_mode
+    _html_css_mode = mode
+
+def _html_asset(output_dir, name, content):
+    """Write a shared report asset into output_dir unless it is already current"""
+    asset = Path(output_dir) / name
+    if not asset.exists() or asset.read_text(encoding='utf-8') != content:
+        asset.write_text(content, encoding='utf-8')
+    return asset
+
+def html_css_asset(output_dir):
+    """Shared stylesheet for reports in output_dir"""
+    return _html_asset(output_dir, HTML_CSS_ASSET, HTML_REPORT_CSS)
+
+def html_js_asset(output_dir):
+    """Shared device-table script for reports in output_dir"""
+    return _html_asset(output_dir, HTML_JS_ASSET, HTML_REPORT_JS)
+
+def _json_chunk(values):
+    """JSON list body (no brackets) that is safe inside a <script> element"""
+    return json.dumps(values, separators=(',', ':'))[1:-1].replace('</', '<\\/')
+
+def write_device_blob(f, scan_data):
+    """Write every collected device as a columnar JSON <script> block:
+    {"columns", "rows", "dicts": {col: values}, "data": {col: [codes]}}.
+    Columns are streamed one category at a time."""
+    stores = [(code, data['devices']) for code, data in enumerate(scan_data.categories.values())
+              if data['devices']]
+    rows = sum(len(store) for _, store in stores)
+    dicts = {'category': list(scan_data.categories)}
+    for col in HTML_TABLE_COLUMNS[2:]:
+        dicts[col] = scan_data._tables[col].values
+
+    f.write('<script type="application/json" id="device-data">{"columns":')
+    f.write(json.dumps(HTML_TABLE_COLUMNS))
+    f.write(f',"rows":{rows},"dicts":{{')
+    f.write(','.join(f'"{col}":[{_json_chunk(values)}]' for col, values in dicts.items()))
+    f.write('},"data":{')
+    for i, col in enumerate(HTML_TABLE_COLUMNS):
+        f.write(f'{"," if i else ""}"{col}":[')
+        sep = ''
+        for code, store in stores:
+            if col == 'category':
+                chunk = ','.join([str(code)] * len(store))
+            elif col == 'ip':
+                chunk = _json_chunk(store.packed_ips())
+            else:
+                chunk = _json_chunk(store.codes(col).tolist())
+            f.write(sep + chunk)
+            sep = ','
+        f.write(']')
+    f.write('}}</script>\n')
+    return rows
+
+def write_html_report(f, scan_data, verbose=False, chart_images=None, chart_mime='image/png',
+                      logo_b64='', css_href=None, js_src=None):
+    """Write the HTML report to an open text file, section by section"""
+    chart_images = chart_images or {}
+    if css_href:
+        styles = f'    <link rel="stylesheet" href="{escape(css_href)}">'
+    else:
+        styles = f"    <style>\n{HTML_REPORT_CSS}    </style>"
+    total = sum(data['count'] for data in scan_data.categories.values())
+    f.write(HTML_REPORT_HEAD.substitute(
+        date=scan_data.timestamp.strftime('%Y-%m-%d'), time=scan_data.timestamp.strftime('%H:%M:%S'),
+        region=escape(str(scan_data.country_name)), total=f"{total:,}", styles=styles,
+        logo=HTML_LOGO.substitute(logo=logo_b64) if logo_b64 else ''))
+
+    card = HTML_STAT_CARD.substitute
+    cards = []
+    for category, data in scan_data.categories.items():
+        risk = get_category_risk(category)
+        cards.append(card(category=escape(category), count=f"{data['count']:,}",
+                          risk=risk, risk_class=risk.lower()))
+    f.write(''.join(cards))
+
+    f.write(HTML_CHARTS.substitute(mime=chart_mime, pie=chart_images.get('pie', ''),
+                                   bar=chart_images.get('bar', ''), risk=chart_images.get('risk', '')))
+
+    scripts = ''
+    if verbose:
+        device_count = sum(len(data['devices']) for data in scan_data.categories.values())
+        f.write(HTML_DEVICE_TABLE.substitute(device_count=f"{device_count:,}"))
+        f.write('    ')
+        write_device_blob(f, scan_data)
+        if js_src:
+            scripts = f'    <script src="{escape(js_src)}"></script>'
+        else:
+            scripts = f"    <script>\n{HTML_REPORT_JS}    </script>"
 
-        with open(filepath, 'w') as f:
-            f.write(html_content)
+    f.write(HTML_REPORT_FOOTER.substitute(scripts=scripts))
+
+@traced_export('html')
+def export_html_with_charts(scan_data, verbose=False):
+    """Export scan results to HTML with embedded charts"""
+    try:
+        output_dir = create_output_directory()
+        timestamp = scan_data.timestamp.strftime('%Y%m%d_%H%M%S')
+        filename = f"moiraguard_scan_{timestamp}.html"
+        filepath = output_dir / filename
+
+        # Charts are rendered once per scan and profile, and shared with the PNG
+        # export and the long-PNG report when they use the same profile
+        profile = html_chart_profile()
+        model, charts = get_rendered_charts(scan_data, profile)
+        chart_images = {name: base64.b64encode(image).decode('ascii') for name, image in charts.items()}
+        css_href = js_src = None
+        if _html_css_mode == 'shared':
+            css_href = html_css_asset(output_dir).name
+            js_src = html_js_asset(output_dir).name if verbose else None
+
+        with open(filepath, 'w', encoding='utf-8') as f:
+            write_html_report(f, scan_data, verbose, chart_images, CHART_MIME_TYPES[profile.fmt],
+                              logo_base64(), css_href, js_src)
 
         print_status('success', f"HTML report exported to: {Colors.CYAN}{filepath}{Colors.END}")
         return filepath
@@ -2015,8 +5078,232 @@ def export_html_with_charts(scan_data, verbose=False):
         print_status('error', f"HTML export failed: {Colors.RED}{e}{Colors.END}")
         return None
 
-def export_html_as_png(scan_data, verbose=False):
-    """Export HTML report as a long PNG screenshot"""
+# ── Native report image ──────────────────────────────────────────────────
+# The long report PNG is composed with Pillow from the charts already
+# rendered for the scan plus drawn text blocks, in the HTML report's
+# layout and theme - no browser and no network needed.
+REPORT_WIDTH = 1400
+REPORT_MARGIN = 40
+REPORT_DEVICE_ROWS = 50  # per category, as in the HTML device table
+REPORT_THEME = {
+    'background': '#05070B',
+    'panel': '#0B1220',
+    'panel_alt': '#0F1A2B',
+    'header': '#052E23',
+    'border': '#1C4A3A',
+    'text': '#E6F0F5',
+    'muted': '#A7B8C5',
+    'accent': '#00FF88',
+    'banner': '#B0102F',
+}
+REPORT_RISK_COLORS = {'CRITICAL': '#DC143C', 'HIGH': '#FF6F00', 'MEDIUM': '#FFD700'}
+REPORT_TABLE_COLUMNS = [  # (title, device field, share of the table width)
+    ('Category', None, 0.17), ('IP Address', 'ip', 0.14), ('Port', 'port', 0.06),
+    ('Product', 'product', 0.19), ('Country', 'country', 0.12),
+    ('City', 'city', 0.12), ('Organization', 'org', 0.20),
+]
+
+def _report_font(size, bold=False):
+    """DejaVu Sans (bundled with matplotlib) at a pixel size, cached"""
+    key = ('font', size, bold)
+    if key not in _chart_assets:
+        path = font_manager.findfont(font_manager.FontProperties(
+            family='DejaVu Sans', weight='bold' if bold else 'normal'))
+        _chart_assets[key] = ImageFont.truetype(path, size)
+    return _chart_assets[key]
+
+def _fit_text(draw, text, font, width):
+    """Shorten text with an ellipsis to fit width pixels"""
+    text = str(text)
+    if draw.textlength(text, font=font) <= width:
+        return text
+    while text and draw.textlength(text + '…', font=font) > width:
+        text = text[:-1]
+    return text + '…'
+
+def _report_chart_images(scan_data, width):
+    """Pie, bar and risk charts as RGB images scaled to width. Reuses the
+    scan's rendered raster charts; otherwise renders at screen size, which
+    is all the report needs."""
+    model = ChartModel(scan_data)
+    cached = scan_data.chart_cache
+    if cached is not None and cached[0][0] == model.key() and cached[0][1][1] != 'svg':
+        charts = cached[1]
+    else:
+        model, charts = get_rendered_charts(scan_data, CHART_PROFILES['screen'])
+    images = []
+    for name, title in (('pie', 'Device Distribution by Category'),
+                        ('bar', 'Exposure by Category'),
+                        ('risk', 'Risk Level Distribution')):
+        image = Image.open(io.BytesIO(charts[name])).convert('RGB')
+        if image.width != width:
+            height = round(image.height * width / image.width)
+            image = image.resize((width, height), Image.LANCZOS, reducing_gap=2.0)
+        images.append((title, image))
+    return model, images
+
+def render_report_image(scan_data, verbose=False):
+    """Compose the full report (header, metadata, category cards, charts,
+    device table when verbose, footer) into one tall PIL image"""
+    theme = REPORT_THEME
+    margin = REPORT_MARGIN
+    inner = REPORT_WIDTH - 2 * margin
+    model, charts = _report_chart_images(scan_data, inner - 40)
+    logo = None
+    if LOGO_PATH.exists():
+        try:
+            logo = Image.open(LOGO_PATH).convert('RGBA')
+            logo = logo.resize((round(logo.width * 120 / logo.height), 120), Image.LANCZOS)
+        except Exception:
+            logo = None
+
+    categories = list(scan_data.categories.items())
+    devices = []
+    if verbose:
+        for category, data in categories:
+            devices.extend((category, device) for device in data['devices'][:REPORT_DEVICE_ROWS])
+
+    # Section heights, so the canvas is allocated once
+    header_h = 190 + (140 if logo is not None else 0)
+    banner_h, meta_h = 56, 110
+    card_h, card_cols = 150, 3
+    cards_h = ((len(categories) + card_cols - 1) // card_cols) * (card_h + 20)
+    charts_h = sum(image.height + 100 for _, image in charts)
+    row_h = 34
+    table_h = 90 + row_h * (len(devices) + 1) if verbose else 0
+    footer_h = 130
+    height = header_h + banner_h + meta_h + cards_h + charts_h + table_h + footer_h + 6 * 30
+
+    canvas = Image.new('RGB', (REPORT_WIDTH, height), theme['background'])
+    draw = ImageDraw.Draw(canvas)
+
+    def centered(y, text, font, fill):
+        draw.text((REPORT_WIDTH / 2, y), text, font=font, fill=fill, anchor='mt')
+
+    # Header
+    y = 30
+    draw.rounded_rectangle((margin, y, REPORT_WIDTH - margin, y + header_h), 15,
+                           fill=theme['header'], outline=theme['border'], width=2)
+    y += 30
+    if logo is not None:
+        canvas.paste(logo, ((REPORT_WIDTH - logo.width) // 2, y), logo)
+        y += 140
+    centered(y, 'MOIRAGUARD Eye-O-Tea Scanner', _report_font(46, True), theme['text'])
+    centered(y + 70, 'IoT/IIoT Infrastructure Security Scan Report', _report_font(22), theme['accent'])
+    y = 30 + header_h + 30
+
+    # Warning banner
+    draw.rounded_rectangle((margin, y, REPORT_WIDTH - margin, y + banner_h), 10, fill=theme['banner'])
+    centered(y + 17, 'CONFIDENTIAL SECURITY REPORT - For Authorized Personnel Only',
+             _report_font(20, True), 'white')
+    y += banner_h + 30
+
+    # Metadata cards
+    meta = [('Scan Date', scan_data.timestamp.strftime('%Y-%m-%d')),
+            ('Scan Time', scan_data.timestamp.strftime('%H:%M:%S')),
+            ('Target Region', scan_data.country_name),
+            ('Total Devices', f"{model.total:,}")]
+    card_w = (inner - 3 * 20) / 4
+    for i, (label, value) in enumerate(meta):
+        x = margin + i * (card_w + 20)
+        draw.rounded_rectangle((x, y, x + card_w, y + meta_h), 12,
+                               fill=theme['panel'], outline=theme['border'], width=1)
+        draw.text((x + 20, y + 20), label.upper(), font=_report_font(15), fill=theme['muted'])
+        draw.text((x + 20, y + 50), _fit_text(draw, value, _report_font(28, True), card_w - 40),
+                  font=_report_font(28, True), fill=theme['accent'])
+    y += meta_h + 30
+
+    # Category cards
+    card_w = (inner - (card_cols - 1) * 20) / card_cols
+    for i, (category, data) in enumerate(categories):
+        row, col = divmod(i, card_cols)
+        x, top = margin + col * (card_w + 20), y + row * (card_h + 20)
+        risk = get_category_risk(category)
+        draw.rounded_rectangle((x, top, x + card_w, top + card_h), 12, fill=theme['panel'])
+        draw.rectangle((x, top, x + 5, top + card_h), fill=REPORT_RISK_COLORS.get(risk, theme['muted']))
+        draw.text((x + 25, top + 18), _fit_text(draw, category, _report_font(20, True), card_w - 50),
+                  font=_report_font(20, True), fill=theme['text'])
+        draw.text((x + 25, top + 52), f"{data['count']:,}", font=_report_font(40, True), fill=theme['accent'])
+        pill_w = draw.textlength(risk, font=_report_font(14, True)) + 30
+        draw.rounded_rectangle((x + 25, top + 108, x + 25 + pill_w, top + 134), 13,
+                               fill=REPORT_RISK_COLORS.get(risk, theme['muted']))
+        draw.text((x + 25 + pill_w / 2, top + 121), risk, font=_report_font(14, True),
+                  fill='black' if risk == 'MEDIUM' else 'white', anchor='mm')
+    y += cards_h + 30
+
+    # Charts
+    for title, image in charts:
+        draw.rounded_rectangle((margin, y, REPORT_WIDTH - margin, y + image.height + 80), 15,
+                               fill=theme['panel'], outline=theme['border'], width=1)
+        draw.text((margin + 20, y + 18), title, font=_report_font(24, True), fill=theme['text'])
+        draw.rectangle((margin + 20, y + 54, margin + 120, y + 57), fill=theme['accent'])
+        canvas.paste(image, (margin + 20, y + 65))
+        y += image.height + 100
+
+    # Device table
+    if verbose:
+        y += 10
+        draw.text((margin, y), 'Detailed Device Information', font=_report_font(28, True), fill=theme['accent'])
+        y += 60
+        positions, x = [], margin
+        for title, field, share in REPORT_TABLE_COLUMNS:
+            positions.append((x, inner * share))
+            x += inner * share
+        draw.rectangle((margin, y, REPORT_WIDTH - margin, y + row_h), fill=theme['header'])
+        for (title, _, _), (x, width) in zip(REPORT_TABLE_COLUMNS, positions):
+            draw.text((x + 8, y + row_h / 2), title, font=_report_font(15, True), fill=theme['accent'], anchor='lm')
+        y += row_h
+        font = _report_font(14)
+        for i, (category, device) in enumerate(devices):
+            draw.rectangle((margin, y, REPORT_WIDTH - margin, y + row_h),
+                           fill=theme['panel'] if i % 2 else theme['panel_alt'])
+            for (_, field, _), (x, width) in zip(REPORT_TABLE_COLUMNS, positions):
+                value = category if field is None else device.get(field)
+                text = _fit_text(draw, 'N/A' if value is None else value, font, width - 16)
+                draw.text((x + 8, y + row_h / 2), text, font=font, fill=theme['text'], anchor='lm')
+            y += row_h
+        y += 30
+
+    # Footer
+    y += 20
+    draw.line((margin, y, REPORT_WIDTH - margin, y), fill=theme['border'], width=2)
+    centered(y + 25, 'Generated by MOIRAGUARD Eye-O-Tea Scanner | DEFCON GROUP CASABLANCA 2026',
+             _report_font(16), theme['muted'])
+    centered(y + 55, 'Author: Mohammed Amine Moulay (@MLY)', _report_font(16), theme['muted'])
+    centered(y + 85, 'For Security Research & Educational Purposes Only', _report_font(14), theme['muted'])
+    return canvas.crop((0, 0, REPORT_WIDTH, min(height, y + footer_h)))
+
+# Long-PNG report engine: 'native' (Pillow, default) or 'browser' (html2image)
+REPORT_ENGINES = ('native', 'browser')
+_report_engine = 'native'
+
+def set_report_engine(engine):
+    """Choose how export_html_as_png renders the long report"""
+    global _report_engine
+    _report_engine = engine
+
+@traced_export('report')
+def export_html_as_png(scan_data, verbose=False, engine=None):
+    """Export the report as one long PNG image"""
+    if (engine or _report_engine) == 'browser':
+        return export_html_screenshot(scan_data, verbose)
+    try:
+        output_dir = create_output_directory()
+        timestamp = scan_data.timestamp.strftime('%Y%m%d_%H%M%S')
+        print_status('info', "Composing report image...")
+        png_file = output_dir / f"moiraguard_report_{timestamp}.png"
+        render_report_image(scan_data, verbose).save(png_file, format='PNG', compress_level=1)
+
+        file_size = png_file.stat().st_size / (1024 * 1024)  # MB
+        print_status('success', f"Report image exported: {Colors.CYAN}{png_file.name}{Colors.END}")
+        print_status('info', f"File size: {Colors.GREEN}{file_size:.2f} MB{Colors.END}")
+        return png_file
+    except Exception as e:
+        print_status('error', f"Report image export failed: {Colors.RED}{e}{Colors.END}")
+        return None
+
+def export_html_screenshot(scan_data, verbose=False):
+    """Export HTML report as a long PNG screenshot (html2image + Chromium)"""
     try:
         if not HTML2IMAGE_AVAILABLE:
             print_status('error', "html2image library not installed")
@@ -2104,10 +5391,13 @@ def post_scan_menu(scan_data):
         print(f"{Colors.GREEN}[5]{Colors.END} Export to HTML with Charts {Colors.DIM}(Metrics Only){Colors.END}")
         print(f"{Colors.GREEN}[6]{Colors.END} Export to HTML with Charts {Colors.DIM}(Verbose - with device table){Colors.END}")
         print(f"{Colors.GREEN}[7]{Colors.END} Export Charts as PNG {Colors.DIM}(4 chart images){Colors.END}")
-        print(f"{Colors.GREEN}[8]{Colors.END} Export HTML as Long PNG {Colors.DIM}(Full page screenshot - Metrics){Colors.END}")
-        print(f"{Colors.GREEN}[9]{Colors.END} Export HTML as Long PNG {Colors.DIM}(Full page screenshot - Verbose){Colors.END}")
+        print(f"{Colors.GREEN}[8]{Colors.END} Export Report as Long PNG {Colors.DIM}(Full page report image - Metrics){Colors.END}")
+        print(f"{Colors.GREEN}[9]{Colors.END} Export Report as Long PNG {Colors.DIM}(Full page report image - Verbose){Colors.END}")
         print(f"{Colors.GREEN}[10]{Colors.END} Export ALL formats {Colors.DIM}(Metrics Only){Colors.END}")
         print(f"{Colors.GREEN}[11]{Colors.END} Export ALL formats + Screenshots {Colors.DIM}(Verbose){Colors.END}")
+        print(f"{Colors.GREEN}[12]{Colors.END} Export to JSON Lines {Colors.DIM}(Verbose - one device per line, streamable){Colors.END}")
+        print(f"{Colors.GREEN}[13]{Colors.END} Export to Parquet {Colors.DIM}(Verbose - typed columnar device table + summary){Colors.END}")
+        print(f"{Colors.GREEN}[14]{Colors.END} Export Unique Hosts {Colors.DIM}(Verbose - devices merged by IP across categories, CSV){Colors.END}")
         print(f"{Colors.YELLOW}[0]{Colors.END} {Colors.DIM}Exit{Colors.END}")
 
         print_separator('─', 60, Colors.DIM)
@@ -2152,6 +5442,12 @@ def post_scan_menu(scan_data):
                 export_png_charts(scan_data)
                 export_html_as_png(scan_data, verbose=True)
                 print_status('success', "All formats and screenshots exported successfully!")
+            elif choice == '12':
+                export_jsonl(scan_data, verbose=True)
+            elif choice == '13':
+                export_columnar(scan_data, verbose=True, fmt='parquet')
+            elif choice == '14':
+                export_hosts(scan_data)
             else:
                 print_status('error', "Invalid option. Please try again.")
 
@@ -2228,16 +5524,16 @@ def print_summary(stats, api=None, target_country=None):
             
             morocco_stats = {}
             
-            ma_iot = api.search('port:80,8080,443 country:MA')
+            ma_iot = api.count('port:80,8080,443 country:MA')
             morocco_stats['IoT Web Interfaces'] = ma_iot['total']
             
-            ma_cameras = api.search('port:554 country:MA')
+            ma_cameras = api.count('port:554 country:MA')
             morocco_stats['Camera Streams'] = ma_cameras['total']
             
-            ma_telnet = api.search('port:23 country:MA')
+            ma_telnet = api.count('port:23 country:MA')
             morocco_stats['Telnet Services'] = ma_telnet['total']
             
-            ma_scada = api.search('port:502 country:MA')
+            ma_scada = api.count('port:502 country:MA')
             morocco_stats['SCADA/ICS Systems'] = ma_scada['total']
             
             print_status('found', "Morocco-specific exposure identified")
@@ -2256,6 +5552,10 @@ def print_summary(stats, api=None, target_country=None):
         except Exception as e:
             print_status('info', "Local context analysis unavailable")
     
+    # Cache statistics (hits, credits saved)
+    if getattr(api, 'cache', None) is not None:
+        print_cache_report(api.cache)
+
     # Footer
     print(f"\n{Colors.BOLD}{Colors.CYAN}{'='*70}{Colors.END}")
     print(f"{Colors.BOLD}{Colors.WHITE}👁️  MOIRAGUARD Eye-O-Tea Scanner{Colors.END} {Colors.DIM}|{Colors.END} {Colors.CYAN}DEFCON GROUP CASANLANCA 2026{Colors.END} {Colors.DIM}|{Colors.END} {Colors.GREEN}@MLY{Colors.END}")
@@ -2264,6 +5564,19 @@ def print_summary(stats, api=None, target_country=None):
     print(f"{Colors.RED}[!] Legal Warning:{Colors.END} Unauthorized access is ILLEGAL")
     print(f"{Colors.BOLD}{Colors.CYAN}{'='*70}{Colors.END}\n")
 
+def print_host_summary(index, top=5):
+    """Print unique-host counts and the categories that share the most hosts"""
+    if not index:
+        return
+    shared = index.multi_category()
+    print(f"{Colors.BOLD}{Colors.CYAN}═══ UNIQUE HOSTS ═══{Colors.END}")
+    print(f"  {Colors.WHITE}{'Device rows':<28}{Colors.END} {index.rows:>10,}")
+    print(f"  {Colors.WHITE}{'Unique hosts (by IP)':<28}{Colors.END} {Colors.CYAN}{len(index):>10,}{Colors.END}")
+    print(f"  {Colors.WHITE}{'Hosts in 2+ categories':<28}{Colors.END} {Colors.YELLOW}{len(shared):>10,}{Colors.END}")
+    for (a, b), count in list(index.overlaps().items())[:top]:
+        print(f"    {Colors.DIM}{a} ∩ {b}:{Colors.END} {count:,}")
+    print()
+
 # ╔═══════════════════════════════════════════════════════════════════╗
 # ║              ACTIVE PROTOCOL VERIFICATION ENGINE                   ║
 # ╚═══════════════════════════════════════════════════════════════════╝
@@ -2427,17 +5740,124 @@ def _probe_http(ip, port=80, timeout=5):
         return False, str(e)
 
 
-# Maps each ScanData category → (protocol label, probe function, fallback port)
-_CATEGORY_PROBERS = {
-    'IoT Cameras':        ('RTSP',   _probe_rtsp,    554),
-    'SCADA/ICS':          ('Modbus', _probe_modbus,  502),
-    'Building Automation':('BACnet', _probe_bacnet, 47808),
-    'MQTT Brokers':       ('MQTT',   _probe_mqtt,   1883),
-    'Smart Home Devices': ('HTTP',   _probe_http,     80),
-    'Industrial IoT':     ('HTTP',   _probe_http,     80),
+# Maps each protocol label used by ScanCategory.prober → (probe function, default port)
+_PROTOCOL_PROBERS = {
+    'RTSP':   (_probe_rtsp,    554),
+    'Modbus': (_probe_modbus,  502),
+    'BACnet': (_probe_bacnet, 47808),
+    'MQTT':   (_probe_mqtt,   1883),
+    'HTTP':   (_probe_http,     80),
+    'Telnet': (_probe_telnet,   23),
 }
 
 
+def _category_probers():
+    """Map each registered category with a prober → (protocol label, probe function, fallback port)"""
+    probers = {}
+    for category in CATEGORY_REGISTRY:
+        if category.prober not in _PROTOCOL_PROBERS:
+            continue
+        probe_fn, default_port = _PROTOCOL_PROBERS[category.prober]
+        fallback_port = category.port if isinstance(category.port, int) else default_port
+        probers[category.name] = (category.prober, probe_fn, fallback_port)
+    return probers
+
+
+def run_verification(scan_data, max_per_cat=10, probers=None):
+    """Probe up to max_per_cat unique IPs per category, printing each result.
+    probers maps category → (protocol label, probe(ip, port), fallback port)
+    and defaults to the registry's. Returns {'results', 'probed',
+    'confirmed', 'reused', 'unique'}."""
+    grand_probed    = 0
+    grand_confirmed = 0
+    grand_reused    = 0
+    verification_results = {}
+    # (protocol, ip, port) → (ok, detail): a host listed under several
+    # categories with the same protocol is probed only once
+    probe_cache = {}
+
+    for category, (proto_label, probe_fn, fallback_port) in (probers or _category_probers()).items():
+        devices = scan_data.categories.get(category, {}).get('devices', [])
+        if not devices:
+            continue
+
+        # One target per unique IP within the category
+        targets = []
+        seen_ips = set()
+        for device in devices:
+            ip = device.get('ip')
+            if ip in seen_ips:
+                continue
+            seen_ips.add(ip)
+            targets.append(device)
+            if len(targets) >= max_per_cat:
+                break
+        print(f"\n{Colors.BOLD}{Colors.CYAN}[{proto_label}]{Colors.END} "
+              f"{Colors.WHITE}{category}{Colors.END} — probing {Colors.CYAN}{len(targets)}{Colors.END} IP(s)")
+        print_separator('─', 50, Colors.DIM)
+
+        cat_results    = []
+        cat_confirmed  = 0
+
+        # Capture loop variables for the closure
+        _probe  = probe_fn
+        _fport  = fallback_port
+
+        def _target(device, fport=_fport):
+            ip   = device.get('ip', '')
+            port = device.get('port', fport)
+            if not isinstance(port, int):
+                port = fport
+            return ip, port
+
+        def _task(ip, port, probe=_probe):
+            if not ip:
+                return ip, port, False, 'No IP stored'
+            ok, detail = probe(ip, port)
+            return ip, port, ok, detail
+
+        outcomes = []
+        pending = []
+        for device in targets:
+            ip, port = _target(device)
+            cached = probe_cache.get((proto_label, ip, port))
+            if cached is None:
+                pending.append((ip, port))
+            else:
+                outcomes.append((ip, port) + cached + (True,))
+
+        with perf_span('probe', f"{proto_label} {category}", probes=len(pending)), \
+                concurrent.futures.ThreadPoolExecutor(max_workers=10) as pool:
+            futures = [pool.submit(_task, ip, port) for ip, port in pending]
+            for future in concurrent.futures.as_completed(futures):
+                ip, port, ok, detail = future.result()
+                probe_cache[(proto_label, ip, port)] = (ok, detail)
+                outcomes.append((ip, port, ok, detail, False))
+
+        for ip, port, ok, detail, reused in outcomes:
+            cat_results.append({'ip': ip, 'port': port, 'confirmed': ok, 'detail': detail, 'reused': reused})
+            if reused:
+                grand_reused += 1
+                detail = f"{detail} (reused)"
+            if ok:
+                cat_confirmed += 1
+                print(f"  {Colors.GREEN}[CONFIRMED]{Colors.END} "
+                      f"{Colors.WHITE}{ip}:{port}{Colors.END}  "
+                      f"{Colors.DIM}{detail}{Colors.END}")
+            else:
+                print(f"  {Colors.DIM}[protected]{Colors.END} "
+                      f"{Colors.WHITE}{ip}:{port}{Colors.END}  "
+                      f"{Colors.DIM}{detail}{Colors.END}")
+
+        verification_results[category] = cat_results
+        grand_probed    += len(targets)
+        grand_confirmed += cat_confirmed
+        print(f"  {Colors.BOLD}→ {Colors.GREEN}{cat_confirmed}{Colors.END}{Colors.BOLD}/{len(targets)} "
+              f"confirmed unauthenticated{Colors.END}")
+
+    return {'results': verification_results, 'probed': grand_probed, 'confirmed': grand_confirmed,
+            'reused': grand_reused, 'unique': len(probe_cache)}
+
 def verify_exposure(scan_data):
     """Actively probe IPs collected during Verbose scan to confirm
     each device is genuinely accessible without credentials.
@@ -2490,8 +5910,10 @@ def verify_exposure(scan_data):
         print_status('info', "Re-run Query Mode with Verbose mode selected to collect IPs.")
         return
 
+    index = scan_data.host_index()
     print_status('info', f"{Colors.CYAN}{total_ips}{Colors.END} IPs available across "
-                         f"{Colors.CYAN}{len([c for c in scan_data.categories.values() if c['devices']])}{Colors.END} categories.")
+                         f"{Colors.CYAN}{len([c for c in scan_data.categories.values() if c['devices']])}{Colors.END} categories "
+                         f"({Colors.CYAN}{len(index)}{Colors.END} unique hosts).")
     print_separator('─', 60, Colors.DIM)
 
     try:
@@ -2512,57 +5934,11 @@ def verify_exposure(scan_data):
 
     print_separator('─', 60, Colors.DIM)
 
-    grand_probed    = 0
-    grand_confirmed = 0
-    verification_results = {}
-
-    for category, (proto_label, probe_fn, fallback_port) in _CATEGORY_PROBERS.items():
-        devices = scan_data.categories.get(category, {}).get('devices', [])
-        if not devices:
-            continue
-
-        targets = devices[:max_per_cat]
-        print(f"\n{Colors.BOLD}{Colors.CYAN}[{proto_label}]{Colors.END} "
-              f"{Colors.WHITE}{category}{Colors.END} — probing {Colors.CYAN}{len(targets)}{Colors.END} IP(s)")
-        print_separator('─', 50, Colors.DIM)
-
-        cat_results    = []
-        cat_confirmed  = 0
-
-        # Capture loop variables for the closure
-        _probe  = probe_fn
-        _fport  = fallback_port
-
-        def _task(device, probe=_probe, fport=_fport):
-            ip   = device.get('ip', '')
-            port = device.get('port', fport)
-            if not isinstance(port, int):
-                port = fport
-            if not ip:
-                return ip, port, False, 'No IP stored'
-            ok, detail = probe(ip, port)
-            return ip, port, ok, detail
-
-        with concurrent.futures.ThreadPoolExecutor(max_workers=10) as pool:
-            futures = {pool.submit(_task, dev): dev for dev in targets}
-            for future in concurrent.futures.as_completed(futures):
-                ip, port, ok, detail = future.result()
-                cat_results.append({'ip': ip, 'port': port, 'confirmed': ok, 'detail': detail})
-                if ok:
-                    cat_confirmed += 1
-                    print(f"  {Colors.GREEN}[CONFIRMED]{Colors.END} "
-                          f"{Colors.WHITE}{ip}:{port}{Colors.END}  "
-                          f"{Colors.DIM}{detail}{Colors.END}")
-                else:
-                    print(f"  {Colors.DIM}[protected]{Colors.END} "
-                          f"{Colors.WHITE}{ip}:{port}{Colors.END}  "
-                          f"{Colors.DIM}{detail}{Colors.END}")
-
-        verification_results[category] = cat_results
-        grand_probed    += len(targets)
-        grand_confirmed += cat_confirmed
-        print(f"  {Colors.BOLD}→ {Colors.GREEN}{cat_confirmed}{Colors.END}{Colors.BOLD}/{len(targets)} "
-              f"confirmed unauthenticated{Colors.END}")
+    outcome = run_verification(scan_data, max_per_cat)
+    verification_results = outcome['results']
+    grand_probed    = outcome['probed']
+    grand_confirmed = outcome['confirmed']
+    grand_reused    = outcome['reused']
 
     # Attach results to scan_data so exports can include them
     scan_data.verification_results = verification_results
@@ -2572,6 +5948,8 @@ def verify_exposure(scan_data):
     print(f"{Colors.BOLD}{Colors.WHITE}VERIFICATION SUMMARY{Colors.END}")
     print_separator('─', 70, Colors.DIM)
     print(f"  Devices probed      : {Colors.CYAN}{grand_probed}{Colors.END}")
+    print(f"  Unique hosts probed : {Colors.CYAN}{outcome['unique']}{Colors.END}"
+          f"{Colors.DIM}  ({grand_reused} result(s) reused across categories){Colors.END}")
     print(f"  Confirmed open      : {Colors.RED if grand_confirmed else Colors.GREEN}{grand_confirmed}{Colors.END}")
     print(f"  Auth enforced       : {Colors.GREEN}{grand_probed - grand_confirmed}{Colors.END}")
 
@@ -2614,12 +5992,285 @@ def display_mode_menu():
             sys.exit(0)
 
 
+# ╔═══════════════════════════════════════════════════════════════════╗
+# ║                         SCAN JOBS                                 ║
+# ╚═══════════════════════════════════════════════════════════════════╝
+
+SCAN_JOBS_PATH = Path(".moiraguard_cache") / "scan_jobs.json"
+SCAN_POLL_INITIAL = 5.0               # seconds before a new job's first status check
+SCAN_POLL_MIN = 2.0                   # tightest interval, reached while PROCESSING
+SCAN_POLL_MAX = 60.0                  # loosest interval, reached while queued
+SCAN_POLL_BACKOFF = 1.5               # interval growth per poll while SUBMITTING/QUEUE
+SCAN_JOBS_KEEP_DAYS = 7               # finished jobs stay in the state file this long
+SCAN_STATUS_COLORS = {
+    'SUBMITTING': Colors.YELLOW,
+    'QUEUE': Colors.YELLOW,
+    'PROCESSING': Colors.CYAN,
+    'DONE': Colors.GREEN,
+    'FAILED': Colors.RED,
+}
+
+class ScanJob:
+    """One submitted on-demand scan and its polling state. Times are epoch
+    seconds so they stay meaningful across restarts."""
+    FIELDS = ('id', 'targets', 'count', 'submitted', 'status', 'polls', 'interval',
+              'next_poll', 'finished', 'error')
+
+    def __init__(self, id, targets=(), count=0, submitted=None, status='SUBMITTING', polls=0,
+                 interval=SCAN_POLL_INITIAL, next_poll=None, finished=None, error=None):
+        self.id = id
+        self.targets = list(targets)
+        self.count = count
+        self.submitted = submitted if submitted is not None else time.time()
+        self.status = status
+        self.polls = polls
+        self.interval = interval
+        self.next_poll = next_poll if next_poll is not None else self.submitted + interval
+        self.finished = finished
+        self.error = error
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**{field: data[field] for field in cls.FIELDS if field in data})
+
+class ScanJobManager:
+    """Follows any number of on-demand scans at once. Each job is polled on
+    its own adaptive interval — backing off while SUBMITTING/QUEUE,
+    tightening while PROCESSING — and the job list is saved after every
+    change, so polling picks up where it left off after a restart.
+    on_status(job, previous) and on_finished(job) fire from the thread
+    calling poll_due() or wait(). With an AsyncShodanAPI, all jobs due in a round are checked
+    concurrently on the API event loop instead of one after another."""
+    def __init__(self, api, path=SCAN_JOBS_PATH, on_finished=None, on_status=None, async_api=None):
+        self.api = api
+        self.async_api = async_api
+        self.path = Path(path)
+        self.on_finished = on_finished
+        self.on_status = on_status
+        self.jobs = {}
+        self._lock = threading.RLock()
+        self._in_flight = set()           # job IDs with a status check under way
+        self.load()
+
+    def load(self):
+        """Read saved jobs, dropping finished ones older than SCAN_JOBS_KEEP_DAYS"""
+        if not self.path.exists():
+            return
+        try:
+            with open(self.path, 'r') as f:
+                saved = json.load(f).get('jobs', [])
+        except (OSError, ValueError) as e:
+            print_status('warning', f"Ignoring unreadable scan job file {self.path}: {e}")
+            return
+        cutoff = time.time() - SCAN_JOBS_KEEP_DAYS * 86400
+        with self._lock:
+            for data in saved:
+                job = ScanJob.from_dict(data)
+                if job.finished is None or job.finished >= cutoff:
+                    self.jobs[job.id] = job
+
+    def save(self):
+        """Atomically write the job list"""
+        with self._lock:
+            state = {'jobs': [job.to_dict() for job in self.jobs.values()]}
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix('.tmp')
+            with open(tmp, 'w') as f:
+                json.dump(state, f, indent=2)
+            os.replace(tmp, self.path)
+
+    def submit(self, ips, force=False):
+        """Submit a scan and track it; returns (job, api.scan response)"""
+        result = self.api.scan(ips, force=force)
+        job = ScanJob(result.get('id', 'unknown'), ips, result.get('count', 0))
+        self.track(job)
+        return job, result
+
+    def track(self, job):
+        """Follow an already-submitted scan (a ScanJob or a scan ID)"""
+        if not isinstance(job, ScanJob):
+            job = ScanJob(job, next_poll=time.time())
+        with self._lock:
+            self.jobs[job.id] = job
+            self.save()
+        return job
+
+    def pending(self):
+        """Jobs that haven't finished, in submission order"""
+        with self._lock:
+            return [job for job in self.jobs.values() if job.finished is None]
+
+    def seconds_until_next(self):
+        """Time until the next job is due (None when nothing is pending)"""
+        pending = self.pending()
+        if not pending:
+            return None
+        return max(0.0, min(job.next_poll for job in pending) - time.time())
+
+    def _fetch_statuses(self, jobs):
+        """{job id: scan_status response, or the APIError it raised}"""
+        if self.async_api is None:
+            results = {}
+            for job in jobs:
+                try:
+                    results[job.id] = self.api.scan_status(job.id)
+                except shodan.APIError as e:
+                    results[job.id] = e
+            return results
+        async def _gather():
+            return await asyncio.gather(*(self.async_api.scan_status(job.id) for job in jobs),
+                                        return_exceptions=True)
+        responses = run_on_api_loop(_gather()).result()
+        for response in responses:
+            if isinstance(response, BaseException) and not isinstance(response, shodan.APIError):
+                raise response
+        return dict(zip((job.id for job in jobs), responses))
+
+    def _reschedule(self, job, status, now):
+        if status in ('SUBMITTING', 'QUEUE'):
+            job.interval = min(SCAN_POLL_MAX, job.interval * SCAN_POLL_BACKOFF)
+        elif status == 'PROCESSING':
+            job.interval = max(SCAN_POLL_MIN, job.interval / 2)
+        else:
+            job.interval = min(SCAN_POLL_MAX, job.interval * 2)   # unknown status or a failed check
+        job.next_poll = now + job.interval
+
+    def poll_due(self):
+        """Check every job whose poll time has come; returns the jobs that
+        finished in this round. The lock is only held to pick the due jobs
+        and to apply the responses, not during the status checks."""
+        with self._lock:
+            now = time.time()
+            due = [job for job in self.jobs.values()
+                   if job.finished is None and job.next_poll <= now and job.id not in self._in_flight]
+            self._in_flight.update(job.id for job in due)
+        if not due:
+            return []
+        try:
+            responses = self._fetch_statuses(due)
+        finally:
+            with self._lock:
+                self._in_flight.difference_update(job.id for job in due)
+        finished = []
+        with self._lock:
+            for job in due:
+                previous = job.status
+                job.polls += 1
+                response = responses[job.id]
+                if isinstance(response, shodan.APIError):
+                    job.error = str(response)
+                    # Transient errors were already retried below us: keep the last known
+                    # status and back off. Anything else (unknown scan ID, bad key) is final.
+                    if not is_transient_error(response):
+                        job.status = 'FAILED'
+                else:
+                    job.status = response.get('status', 'UNKNOWN')
+                    job.error = None
+                if job.status in ('DONE', 'FAILED'):
+                    job.finished = time.time()
+                    finished.append(job)
+                else:
+                    self._reschedule(job, 'UNKNOWN' if job.error else job.status, time.time())
+                if job.status != previous and self.on_status:
+                    self.on_status(job, previous)
+            self.save()
+        for job in finished:
+            if self.on_finished:
+                self.on_finished(job)
+        return finished
+
+    def wait(self, jobs=None, timeout=None, on_tick=None, tick=1.0):
+        """Poll until the given jobs (default: every job) have finished or
+        timeout passes. Other pending jobs are still polled when due but
+        are not waited for. on_tick(manager) runs at least every tick
+        seconds (for progress output). Returns True when the jobs waited
+        for have all finished."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        waiting = None if jobs is None else {getattr(job, 'id', job) for job in jobs}
+        while True:
+            self.poll_due()
+            delay = self.seconds_until_next()
+            if delay is None or (waiting is not None and
+                                 not any(job.id in waiting for job in self.pending())):
+                return True
+            if on_tick:
+                on_tick(self)
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                delay = min(delay, remaining)
+            time.sleep(min(delay, tick))
+
+_scan_jobs = None
+
+def open_scan_jobs(api):
+    """The process's ScanJobManager for the current backend, with any jobs
+    saved by an earlier session"""
+    global _scan_jobs
+    path = backend_path(SCAN_JOBS_PATH)
+    if _scan_jobs is None or _scan_jobs.path != path:
+        # Status checks go through the async client so due jobs are polled together
+        _scan_jobs = ScanJobManager(api, path, async_api=open_async_api(getattr(api, 'api_key', None)))
+    else:
+        _scan_jobs.api = api
+    return _scan_jobs
+
+def print_scan_job_status(manager, frame=0):
+    """One-line, in-place status of every pending job"""
+    spinner_chars = "⣾⣽⣻⢿⡿⣟⣯⣷"
+    pending = manager.pending()
+    if len(pending) <= 3:
+        parts = [f"{job.id} {SCAN_STATUS_COLORS.get(job.status, Colors.DIM)}{job.status}{Colors.END}" for job in pending]
+    else:
+        counts = defaultdict(int)
+        for job in pending:
+            counts[job.status] += 1
+        parts = [f"{SCAN_STATUS_COLORS.get(status, Colors.DIM)}{status}{Colors.END} ×{count}"
+                 for status, count in counts.items()]
+    sys.stdout.write(f'\r{Colors.CYAN}{spinner_chars[frame % len(spinner_chars)]}{Colors.END} '
+                     f'Scan Status: {" · ".join(parts)}        ')
+    sys.stdout.flush()
+
+def follow_scan_jobs(api):
+    """Headless: poll the scans saved by earlier sessions until each
+    finishes. Returns True when all of them completed."""
+    jobs = open_scan_jobs(api)
+    jobs.on_finished = announce_scan_finished
+    pending = jobs.pending()
+    if not pending:
+        print_status('info', f"No pending scans in {Colors.CYAN}{jobs.path}{Colors.END}")
+        return True
+    print_status('info', f"Following {Colors.CYAN}{len(pending)}{Colors.END} saved scan(s)...")
+    frames = iter(range(1 << 30))
+    try:
+        jobs.wait(on_tick=lambda manager: print_scan_job_status(manager, next(frames)))
+    except KeyboardInterrupt:
+        print()
+        print_status('info', f"Stopped polling - pending scans stay saved in {Colors.CYAN}{jobs.path}{Colors.END}")
+        return False
+    return all(job.status == 'DONE' for job in pending)
+
+def announce_scan_finished(job):
+    """Default on_finished callback: report a finished job on its own line"""
+    sys.stdout.write('\r\033[K')
+    if job.status == 'DONE':
+        print_status('success', f"Scan {Colors.CYAN}{job.id}{Colors.END} completed "
+                                f"({job.count} IPs: {', '.join(job.targets) or 'unknown targets'})")
+    else:
+        print_status('error', f"Scan {Colors.CYAN}{job.id}{Colors.END} failed: {Colors.RED}{job.error}{Colors.END}")
+
 # ╔═══════════════════════════════════════════════════════════════════╗
 # ║                        SCANNER MODE                               ║
 # ╚═══════════════════════════════════════════════════════════════════╝
 
-def scanner_mode(api):
-    """On-demand active scan of IP/CIDR targets using Shodan Scanner API."""
+def scanner_mode(api, targets=None):
+    """On-demand active scan of IP/CIDR targets using Shodan Scanner API.
+    Passing targets runs headless: no protocol listing, prompts or follow-up search."""
+    interactive = targets is None
     print(f"\n{Colors.BOLD}{Colors.CYAN}╔═══════════════════════════════════════════╗{Colors.END}")
     print(f"{Colors.BOLD}{Colors.CYAN}║{Colors.END}          {Colors.WHITE}SCANNER MODE{Colors.END}                    {Colors.BOLD}{Colors.CYAN}║{Colors.END}")
     print(f"{Colors.BOLD}{Colors.CYAN}╚═══════════════════════════════════════════╝{Colors.END}\n")
@@ -2644,15 +6295,18 @@ def scanner_mode(api):
         print_status('error', f"Could not retrieve account info: {Colors.RED}{e}{Colors.END}")
 
     # Step 2: Get targets
-    print_separator('─', 60, Colors.DIM)
-    print_status('info', f"Enter IPs or CIDR ranges to scan, comma-separated.")
-    print(f"  {Colors.DIM}Example: 192.168.1.1, 10.0.0.0/24{Colors.END}")
+    if interactive:
+        print_separator('─', 60, Colors.DIM)
+        print_status('info', f"Enter IPs or CIDR ranges to scan, comma-separated.")
+        print(f"  {Colors.DIM}Example: 192.168.1.1, 10.0.0.0/24{Colors.END}")
 
-    try:
-        raw_input_targets = input(f"\n{Colors.BOLD}Targets: {Colors.END}").strip()
-    except KeyboardInterrupt:
-        print(f"\n{Colors.YELLOW}[!] Cancelled by user{Colors.END}")
-        return
+        try:
+            raw_input_targets = input(f"\n{Colors.BOLD}Targets: {Colors.END}").strip()
+        except KeyboardInterrupt:
+            print(f"\n{Colors.YELLOW}[!] Cancelled by user{Colors.END}")
+            return
+    else:
+        raw_input_targets = targets
 
     if not raw_input_targets:
         print_status('error', "No targets entered. Returning to main menu.")
@@ -2661,99 +6315,88 @@ def scanner_mode(api):
     ips_list = [t.strip() for t in raw_input_targets.split(',') if t.strip()]
     print_status('success', f"Targets queued: {Colors.CYAN}{', '.join(ips_list)}{Colors.END}")
 
-    # Step 3: Show available protocols (paginated)
-    print_separator('─', 60, Colors.DIM)
-    print_status('info', "Fetching available scan protocols from Shodan...")
-    try:
-        loading_animation("Fetching protocols", 1)
-        protocols = api.protocols()
-        proto_items = sorted(protocols.items())
-        page_size = 20
-        total = len(proto_items)
-        start = 0
-
-        while start < total:
-            print(f"\n{Colors.BOLD}{Colors.CYAN}Available Protocols [{start + 1}-{min(start + page_size, total)} of {total}]:{Colors.END}")
-            for name, desc in proto_items[start:start + page_size]:
-                print(f"  {Colors.GREEN}{name:<25}{Colors.END} {Colors.DIM}{desc}{Colors.END}")
-            start += page_size
-            if start < total:
-                try:
-                    more = input(f"\n{Colors.DIM}[Press Enter for more, or 'q' to skip]{Colors.END} ").strip().lower()
-                    if more == 'q':
+    # Steps 3-4 (protocol listing, confirmation) are interactive only
+    if interactive:
+        # Step 3: Show available protocols (paginated)
+        print_separator('─', 60, Colors.DIM)
+        print_status('info', "Fetching available scan protocols from Shodan...")
+        try:
+            loading_animation("Fetching protocols", 1)
+            protocols = api.protocols()
+            proto_items = sorted(protocols.items())
+            page_size = 20
+            total = len(proto_items)
+            start = 0
+
+            while start < total:
+                print(f"\n{Colors.BOLD}{Colors.CYAN}Available Protocols [{start + 1}-{min(start + page_size, total)} of {total}]:{Colors.END}")
+                for name, desc in proto_items[start:start + page_size]:
+                    print(f"  {Colors.GREEN}{name:<25}{Colors.END} {Colors.DIM}{desc}{Colors.END}")
+                start += page_size
+                if start < total:
+                    try:
+                        more = input(f"\n{Colors.DIM}[Press Enter for more, or 'q' to skip]{Colors.END} ").strip().lower()
+                        if more == 'q':
+                            break
+                    except KeyboardInterrupt:
                         break
-                except KeyboardInterrupt:
-                    break
-    except shodan.APIError as e:
-        print_status('warning', f"Could not fetch protocols: {Colors.YELLOW}{e}{Colors.END}")
+        except shodan.APIError as e:
+            print_status('warning', f"Could not fetch protocols: {Colors.YELLOW}{e}{Colors.END}")
 
-    # Step 4: Confirm scan
-    print_separator('─', 60, Colors.DIM)
-    try:
-        confirm = input(f"\n{Colors.BOLD}Submit scan for {Colors.CYAN}{', '.join(ips_list)}{Colors.END}{Colors.BOLD}? [Y/n]: {Colors.END}").strip().lower()
-    except KeyboardInterrupt:
-        print(f"\n{Colors.YELLOW}[!] Cancelled by user{Colors.END}")
-        return
+        # Step 4: Confirm scan
+        print_separator('─', 60, Colors.DIM)
+        try:
+            confirm = input(f"\n{Colors.BOLD}Submit scan for {Colors.CYAN}{', '.join(ips_list)}{Colors.END}{Colors.BOLD}? [Y/n]: {Colors.END}").strip().lower()
+        except KeyboardInterrupt:
+            print(f"\n{Colors.YELLOW}[!] Cancelled by user{Colors.END}")
+            return
 
-    if confirm not in ['', 'y', 'yes']:
-        print_status('info', "Scan cancelled by user.")
-        return
+        if confirm not in ['', 'y', 'yes']:
+            print_status('info', "Scan cancelled by user.")
+            return
 
-    # Step 5: Submit scan
+    # Step 5: Submit scan (tracked alongside any scans still pending from earlier)
+    jobs = open_scan_jobs(api)
+    jobs.on_finished = announce_scan_finished
+    resumed = jobs.pending()
     try:
         print_status('scan', "Submitting scan request to Shodan...")
-        result = api.scan(ips_list)
-        scan_id = result.get('id', 'unknown')
-        count = result.get('count', 0)
+        job, result = jobs.submit(ips_list)
+        scan_id = job.id
         credits_left = result.get('credits_left', '?')
 
         print_status('success', f"Scan submitted — ID: {Colors.CYAN}{scan_id}{Colors.END}  |  "
-                                f"IPs queued: {Colors.GREEN}{count}{Colors.END}  |  "
+                                f"IPs queued: {Colors.GREEN}{job.count}{Colors.END}  |  "
                                 f"Credits remaining: {Colors.YELLOW}{credits_left}{Colors.END}")
     except shodan.APIError as e:
         print_status('error', f"Scan submission failed: {Colors.RED}{e}{Colors.END}")
         return
+    if resumed:
+        print_status('info', f"Also following {Colors.CYAN}{len(resumed)}{Colors.END} unfinished scan(s) "
+                             f"from an earlier session: {', '.join(pending.id for pending in resumed)}")
 
     # Step 6: Poll scan status
     print_separator('─', 60, Colors.DIM)
-    print_status('info', "Polling scan status (Ctrl+C to stop polling)...")
-    spinner_chars = "⣾⣽⣻⢿⡿⣟⣯⣷"
-    i = 0
+    print_status('info', "Polling scan status (Ctrl+C to stop waiting)...")
+    frames = iter(range(1 << 30))
     try:
-        while True:
-            try:
-                status_result = api.scan_status(scan_id)
-                status = status_result.get('status', 'UNKNOWN')
-            except shodan.APIError as e:
-                print_status('warning', f"Status check error: {Colors.YELLOW}{e}{Colors.END}")
-                status = 'UNKNOWN'
-
-            status_color = {
-                'SUBMITTING': Colors.YELLOW,
-                'QUEUE': Colors.YELLOW,
-                'PROCESSING': Colors.CYAN,
-                'DONE': Colors.GREEN,
-            }.get(status, Colors.DIM)
-
-            sys.stdout.write(
-                f'\r{Colors.CYAN}{spinner_chars[i % len(spinner_chars)]}{Colors.END} '
-                f'Scan Status: {status_color}{status}{Colors.END}        '
-            )
-            sys.stdout.flush()
-            i += 1
-
-            if status == 'DONE':
-                print()
-                print_status('success', "Scan completed successfully.")
-                break
-
-            time.sleep(5)
+        # Earlier scans are polled alongside this one, but only this one is waited for
+        jobs.wait([job], on_tick=lambda manager: print_scan_job_status(manager, next(frames)))
     except KeyboardInterrupt:
-        print(f"\n{Colors.YELLOW}[!] Stopped polling. Scan may still be running in the background.{Colors.END}")
-        print_status('info', f"Use scan ID {Colors.CYAN}{scan_id}{Colors.END} to check status later.")
+        print(f"\n{Colors.YELLOW}[!] Stopped polling. Scans keep running on Shodan's side.{Colors.END}")
+        print_status('info', f"Pending scans are saved in {Colors.CYAN}{jobs.path}{Colors.END} - resume with "
+                             f"{Colors.CYAN}--follow-scans{Colors.END} or in the next Scanner Mode session.")
+        return
+    still_pending = jobs.pending()
+    if still_pending:
+        print_status('info', f"{Colors.CYAN}{len(still_pending)}{Colors.END} earlier scan(s) still running, saved in "
+                             f"{Colors.CYAN}{jobs.path}{Colors.END} - follow them with {Colors.CYAN}--follow-scans{Colors.END}")
+    if job.status != 'DONE':
         return
 
     # Step 7: Offer to query results
+    if not interactive:
+        return
     print_separator('─', 60, Colors.DIM)
     try:
         query_now = input(f"\n{Colors.BOLD}Search Shodan for these IPs now? [Y/n]: {Colors.END}").strip().lower()
@@ -2783,6 +6426,31 @@ def scanner_mode(api):
 # ║                        MONITOR MODE                               ║
 # ╚═══════════════════════════════════════════════════════════════════╝
 
+def list_alerts(api):
+    """Print all active Shodan network alerts. Returns False on API error."""
+    print_separator('─', 60, Colors.DIM)
+    print_status('info', "Fetching active alerts...")
+    try:
+        loading_animation("Retrieving alerts", 1)
+        alerts = api.alerts()
+        if not alerts:
+            print_status('info', "No active alerts found.")
+        else:
+            print(f"\n{Colors.BOLD}{Colors.CYAN}{'ID':<30} {'Name':<25} {'IP/Range':<20} {'Created'}{Colors.END}")
+            print_separator('─', 90, Colors.DIM)
+            for alert in alerts:
+                alert_id = alert.get('id', 'N/A')
+                name = alert.get('name', 'N/A')
+                filters = alert.get('filters', {})
+                ip_range = filters.get('ip', 'N/A') if isinstance(filters, dict) else 'N/A'
+                created = alert.get('created', 'N/A')
+                print(f"  {Colors.CYAN}{alert_id:<28}{Colors.END} {name:<25} {Colors.GREEN}{ip_range:<20}{Colors.END} {Colors.DIM}{created}{Colors.END}")
+            print_status('found', f"Total alerts: {Colors.GREEN}{len(alerts)}{Colors.END}")
+        return True
+    except shodan.APIError as e:
+        print_status('error', f"Could not retrieve alerts: {Colors.RED}{e}{Colors.END}")
+        return False
+
 def monitor_mode(api):
     """Persistent network alert management via Shodan Monitor API."""
     while True:
@@ -2807,27 +6475,7 @@ def monitor_mode(api):
             return
 
         elif choice == '1':
-            # List active alerts
-            print_separator('─', 60, Colors.DIM)
-            print_status('info', "Fetching active alerts...")
-            try:
-                loading_animation("Retrieving alerts", 1)
-                alerts = api.alerts()
-                if not alerts:
-                    print_status('info', "No active alerts found.")
-                else:
-                    print(f"\n{Colors.BOLD}{Colors.CYAN}{'ID':<30} {'Name':<25} {'IP/Range':<20} {'Created'}{Colors.END}")
-                    print_separator('─', 90, Colors.DIM)
-                    for alert in alerts:
-                        alert_id = alert.get('id', 'N/A')
-                        name = alert.get('name', 'N/A')
-                        filters = alert.get('filters', {})
-                        ip_range = filters.get('ip', 'N/A') if isinstance(filters, dict) else 'N/A'
-                        created = alert.get('created', 'N/A')
-                        print(f"  {Colors.CYAN}{alert_id:<28}{Colors.END} {name:<25} {Colors.GREEN}{ip_range:<20}{Colors.END} {Colors.DIM}{created}{Colors.END}")
-                    print_status('found', f"Total alerts: {Colors.GREEN}{len(alerts)}{Colors.END}")
-            except shodan.APIError as e:
-                print_status('error', f"Could not retrieve alerts: {Colors.RED}{e}{Colors.END}")
+            list_alerts(api)
 
         elif choice == '2':
             # Create new alert
@@ -3014,36 +6662,341 @@ def show_shodan_intelligence(api):
     print_status('info', "Intelligence view complete. No credits were consumed.")
 
 
+# ╔═══════════════════════════════════════════════════════════════════╗
+# ║                   COMMAND-LINE INTERFACE                          ║
+# ╚═══════════════════════════════════════════════════════════════════╝
+
+# Export format name → exporter(scan_data, verbose)
+EXPORT_FORMATS = {
+    'json':   export_json,
+    'jsonl':  export_jsonl,
+    'parquet': lambda scan_data, verbose=False: export_columnar(scan_data, verbose, 'parquet'),
+    'arrow':  lambda scan_data, verbose=False: export_columnar(scan_data, verbose, 'arrow'),
+    'csv':    export_csv,
+    'hosts':  export_hosts,
+    'html':   export_html_with_charts,
+    'png':    lambda scan_data, verbose=False: export_png_charts(scan_data),
+    'report': export_html_as_png,
+}
+
+def _export_list(value):
+    """argparse type for --export: comma-separated formats or 'all'"""
+    formats = [f.strip().lower() for f in value.split(',') if f.strip()]
+    if formats == ['all']:
+        return list(EXPORT_FORMATS)
+    unknown = [f for f in formats if f not in EXPORT_FORMATS]
+    if unknown:
+        raise argparse.ArgumentTypeError(
+            f"unknown export format(s): {', '.join(unknown)} (choose from {', '.join(EXPORT_FORMATS)}, all)")
+    return formats
+
+def parse_args(argv=None):
+    """Parse command-line options. With no --mode/--profile the tool runs
+    the interactive menus exactly as before."""
+    parser = argparse.ArgumentParser(
+        prog='moiraguard_iot_scanner.py',
+        description='MOIRAGUARD Eye-O-Tea — IoT/IIoT reconnaissance via the Shodan API. '
+                    'Run without arguments for the interactive menus.',
+        epilog='Example: %(prog)s --mode query --country MA --verbose --export json,csv --no-animation')
+    parser.add_argument('--mode', choices=['query', 'scanner', 'monitor', 'intel', 'batch'],
+                        help='run this mode headless (no menus or prompts)')
+    parser.add_argument('--country', metavar='CC',
+                        help="2-letter country code for Query Mode (omit or 'global' for no filter)")
+    parser.add_argument('--verbose', action='store_true',
+                        help='collect device details (uses query credits) instead of metrics only')
+    parser.add_argument('--export', type=_export_list, default=[], metavar='FORMATS',
+                        help=f"comma-separated exports after a headless scan: {', '.join(EXPORT_FORMATS)}, all")
+    parser.add_argument('--pages', type=int, metavar='N',
+                        help='verbose mode: collect up to N result pages (100 devices each) per category')
+    parser.add_argument('--credit-budget', type=int, metavar='N',
+                        help='verbose mode: spend at most N query credits per category while paging')
+    parser.add_argument('--resume', action='store_true',
+                        help='continue an interrupted --pages/--credit-budget collection from its last page')
+    parser.add_argument('--live-export', choices=['csv', 'tsv'],
+                        help='write device rows to CSV/TSV as each category arrives (plus a summary file)')
+    parser.add_argument('--chart-profile', choices=list(CHART_PROFILES),
+                        help='chart size/DPI profile for PNG/HTML exports (default: print); '
+                             'in batch mode also writes per-country charts')
+    parser.add_argument('--chart-format', choices=CHART_FORMATS,
+                        help="override the chart profile's image format")
+    parser.add_argument('--report-engine', choices=REPORT_ENGINES, default='native',
+                        help='long-PNG report renderer: native (Pillow, offline) or browser '
+                             '(html2image + Chromium); default: native')
+    parser.add_argument('--html-css', choices=HTML_CSS_MODES, default='inline',
+                        help='HTML report stylesheet: inline (self-contained, default) or shared '
+                             f'({HTML_CSS_ASSET} written once in the export folder)')
+    parser.add_argument('--trend', nargs='?', const='', metavar='CATEGORY',
+                        help='print exposure trends from the scan history for --country (or global) '
+                             'and exit; name a category to list its individual runs')
+    parser.add_argument('--days', type=int, default=TREND_DAYS, metavar='N',
+                        help=f'--trend window in days (default: {TREND_DAYS}; 0 for all history)')
+    parser.add_argument('--delta', action='store_true',
+                        help='verbose Query Mode with --pages/--credit-budget: diff against the previous run '
+                             'for the same country and export only added/removed/changed devices as a JSONL change feed')
+    parser.add_argument('--no-history', action='store_true',
+                        help=f'do not record this scan in the history database ({HISTORY_PATH})')
+    parser.add_argument('--custom', metavar='KEYS',
+                        help="also scan targets.json custom_queries (comma-separated keys or 'all')")
+    parser.add_argument('--profile', metavar='NAME',
+                        help='targets.json profile for batch mode (implies --mode batch)')
+    parser.add_argument('--concurrency', type=int, default=4, metavar='N',
+                        help='max in-flight Shodan requests in batch mode (default: 4)')
+    parser.add_argument('--targets', metavar='IPS',
+                        help='comma-separated IPs/CIDRs for headless Scanner Mode')
+    parser.add_argument('--follow-scans', action='store_true',
+                        help=f'headless Scanner Mode: poll the scans saved in {SCAN_JOBS_PATH} by earlier '
+                             'sessions until they finish (implies --mode scanner)')
+    parser.add_argument('--offline', action='store_true',
+                        help='serve Query/Batch Mode from the local query cache only')
+    parser.add_argument('--backend', choices=API_BACKENDS, default='shodan',
+                        help='API backend: shodan (default) or fake - a local stand-in serving fixture or '
+                             'synthetic responses (no key, network or credits; separate cache and history)')
+    parser.add_argument('--fixtures', metavar='PATH',
+                        help='fake backend: replay responses from this fixture file (synthetic data for the rest)')
+    parser.add_argument('--record-fixtures', metavar='PATH',
+                        help='shodan backend: save every search/count/info/ports/protocols response to a fixture file')
+    parser.add_argument('--fake-latency', type=float, default=0.0, metavar='SEC',
+                        help='fake backend: delay per API call (default: 0)')
+    parser.add_argument('--fake-rate-limit', type=float, default=0.0, metavar='RPS',
+                        help='fake backend: reject calls faster than RPS requests/second (default: unlimited)')
+    parser.add_argument('--fake-error-rate', type=float, default=0.0, metavar='P',
+                        help='fake backend: fraction of calls failing with a rate-limit error (default: 0)')
+    parser.add_argument('--fake-seed', type=int, default=0, metavar='N',
+                        help='fake backend: seed for synthetic data and simulated errors (default: 0)')
+    parser.add_argument('--trace', metavar='PATH',
+                        help='write every timed span (API calls, categories, exporters, rendering, probes) '
+                             'as a Chrome trace-event JSON file')
+    parser.add_argument('--no-animation', action='store_true',
+                        help='disable banner, spinners, typewriter effects and cosmetic pauses')
+    parser.add_argument('--api-key-file', default='shodan_api.key', metavar='PATH',
+                        help='file containing the Shodan API key (default: shodan_api.key)')
+    args = parser.parse_args(argv)
+
+    if args.profile and args.mode in (None, 'batch'):
+        args.mode = 'batch'
+    if args.mode == 'batch' and not args.profile:
+        parser.error('--mode batch requires --profile NAME')
+    if args.follow_scans and args.mode in (None, 'scanner'):
+        args.mode = 'scanner'
+    if args.mode == 'scanner' and not (args.targets or args.follow_scans):
+        parser.error('--mode scanner requires --targets IPS or --follow-scans')
+    if args.pages is not None and args.pages < 1:
+        parser.error('--pages must be at least 1')
+    if args.credit_budget is not None and args.credit_budget < 0:
+        parser.error('--credit-budget cannot be negative')
+    if args.days < 0:
+        parser.error('--days cannot be negative')
+    if args.backend == 'fake':
+        if args.record_fixtures:
+            parser.error('--record-fixtures records the shodan backend and cannot be used with --backend fake')
+        if args.fake_latency < 0 or args.fake_rate_limit < 0:
+            parser.error('--fake-latency and --fake-rate-limit cannot be negative')
+        if not 0 <= args.fake_error_rate <= 1:
+            parser.error('--fake-error-rate must be between 0 and 1')
+    elif args.fixtures:
+        parser.error('--fixtures replays responses through --backend fake')
+    if args.delta and args.no_history:
+        parser.error('--delta compares against the scan history and cannot be used with --no-history')
+    if args.delta and args.pages is None and args.credit_budget is None:
+        # Without deep collection every category is a one-page sample: nothing can be added or removed
+        parser.error('--delta compares full device sets and needs deep collection: add --pages N or --credit-budget N')
+    if args.country and args.country.lower() == 'global':
+        args.country = None
+    elif args.country and len(args.country) != 2:
+        parser.error('--country must be a 2-letter country code')
+    return args
+
+def open_history(args):
+    """Scan history store for this run (None with --no-history). --offline
+    runs only read it: their results come from the cache and are already
+    recorded."""
+    if args.no_history:
+        return None
+    try:
+        return ScanHistory(backend_path(HISTORY_PATH), record_runs=not args.offline)
+    except sqlite3.Error as e:
+        print_status('warning', f"Scan history unavailable: {e}")
+        return None
+
+def run_trend(args):
+    """--trend: print the history report. Returns an exit code."""
+    path = backend_path(HISTORY_PATH)
+    if not path.exists():
+        print_status('warning', f"No scan history yet ({path}) — run a Query Mode scan first")
+        return 1
+    history = ScanHistory(path)
+    try:
+        return 0 if print_trend_report(history, args.country, args.days, args.trend or None) else 1
+    finally:
+        history.close()
+
+def register_custom_categories(keys):
+    """Register targets.json custom queries ('all' or comma-separated keys)"""
+    if not keys:
+        return []
+    wanted = None if keys.strip().lower() == 'all' else [k.strip() for k in keys.split(',') if k.strip()]
+    categories = load_custom_categories(keys=wanted)
+    for category in categories:
+        register_category(category)
+    if categories:
+        print_status('info', f"Custom categories enabled: {Colors.CYAN}{', '.join(c.name for c in categories)}{Colors.END}")
+    return categories
+
+def run_exports(scan_data, formats, verbose=False):
+    """Run each requested exporter; returns the number that failed"""
+    failed = 0
+    for fmt in formats:
+        if fmt == 'hosts' and not scan_data.host_index():
+            # Metrics-only runs collect no device IPs: nothing to export, not a failure
+            print_status('info', f"Skipping hosts export {Colors.DIM}(no device IPs - needs --verbose){Colors.END}")
+            continue
+        if EXPORT_FORMATS[fmt](scan_data, verbose) is None:
+            failed += 1
+    return failed
+
+def run_query_scan(api, country_code, country_name, verbose, pages=None, credit_budget=None, resume=False,
+                   live_export=None, history=None, delta=False):
+    """Run the Query Mode sweep and print the summary. Returns ScanData.
+    live_export ('csv' or 'tsv') writes device rows while the scan runs;
+    a completed scan is recorded in history (a ScanHistory) if given, after
+    diffing it against the previous run when delta is set."""
+    print(f"\n{Colors.BOLD}{Colors.CYAN}[{datetime.now().strftime('%H:%M:%S')}]{Colors.END} {Colors.GREEN}Initiating MOIRAGUARD reconnaissance sweep...{Colors.END}\n")
+    pause(1)
+
+    # Create scan data object
+    scan_data = ScanData(country_code, country_name)
+    if live_export:
+        base = create_output_directory() / f"moiraguard_scan_{scan_data.timestamp.strftime('%Y%m%d_%H%M%S')}"
+        scan_data.attach_sink(CsvSink(base, delimiter='\t' if live_export == 'tsv' else ','))
+
+    # Run all category queries concurrently, render in fixed order
+    try:
+        stats = run_query_engine(api, country_code, scan_data, verbose, count_only=not verbose,
+                                 pages=pages, credit_budget=credit_budget, resume=resume)
+    finally:
+        # Keep whatever was collected if the scan is interrupted
+        if scan_data.sink is not None:
+            scan_data.sink.close()
+
+    # Print summary with target country context
+    print_summary(stats, api, country_name)
+    if verbose:
+        print_host_summary(scan_data.host_index())
+    if delta:
+        run_scan_delta(history, scan_data, verbose)
+    record_scan_history(history, scan_data, verbose)
+    return scan_data
+
+def run_headless(args):
+    """Execute one mode end to end without prompts. Returns an exit code."""
+    api_key = load_api_key(args.api_key_file)
+    register_custom_categories(args.custom)
+
+    if args.mode == 'batch':
+        chart_profile = get_chart_profile() if (args.chart_profile or args.chart_format) else None
+        return batch_mode(api_key, args.profile, verbose=args.verbose,
+                          offline=args.offline, max_concurrent=args.concurrency,
+                          chart_profile=chart_profile, history=open_history(args))
+
+    try:
+        if args.mode == 'scanner':
+            if not args.targets:
+                return 0 if follow_scan_jobs(open_shodan_api(api_key)) else 1
+            scanner_mode(open_shodan_api(api_key), targets=args.targets)
+            return 0
+        if args.mode == 'monitor':
+            return 0 if list_alerts(open_shodan_api(api_key)) else 1
+        if args.mode == 'intel':
+            show_shodan_intelligence(open_shodan_api(api_key))
+            return 0
+
+        # Query Mode
+        if args.offline:
+            print_status('info', f"Offline mode - {Colors.YELLOW}serving results from the local query cache only{Colors.END}")
+        else:
+            credits_needed = estimate_query_credits(args.verbose, args.pages, args.credit_budget)
+            if not check_requirements(api_key, confirm=False, credits_needed=credits_needed):
+                return 1
+
+        country_code = args.country.upper() if args.country else None
+        if country_code:
+            country_name = country_name_for_code(country_code)
+            if country_name == country_code:
+                country_name = f"Custom ({country_code})"
+        else:
+            country_name = "Global"
+
+        api = open_cached_api(api_key, args.offline)
+        scan_data = run_query_scan(api, country_code, country_name, args.verbose,
+                                   args.pages, args.credit_budget, args.resume, args.live_export,
+                                   history=open_history(args), delta=args.delta)
+        return 1 if run_exports(scan_data, args.export, args.verbose) else 0
+    except shodan.APIError as e:
+        print_status('error', f"Shodan API Error: {Colors.RED}{e}{Colors.END}")
+        return 1
+    except KeyboardInterrupt:
+        print(f"\n{Colors.YELLOW}[!] Interrupted by user{Colors.END}")
+        return 130
+
 # ╔═══════════════════════════════════════════════════════════════════╗
 # ║                         MAIN FUNCTION                             ║
 # ╚═══════════════════════════════════════════════════════════════════╝
 
-def main():
+def main(argv=None):
     """Main execution"""
+    args = parse_args(argv)
+    if args.no_animation or not sys.stdout.isatty():
+        set_animations(False)
+    set_chart_profile(args.chart_profile or 'print', args.chart_format)
+    set_report_engine(args.report_engine)
+    set_html_css(args.html_css)
+    if args.backend == 'fake':
+        set_api_backend('fake', fixtures=args.fixtures, latency=args.fake_latency,
+                        rate_limit=args.fake_rate_limit, error_rate=args.fake_error_rate, seed=args.fake_seed)
+    else:
+        set_api_backend('shodan', record_fixtures=args.record_fixtures)
+    set_trace_path(args.trace)
+    # Exit handlers run last-registered first: backend notes, then the timing table
+    atexit.register(finish_perf_report)
+    atexit.register(finish_api_backend)
+
+    # Trend report: read-only, no API key needed
+    if args.trend is not None:
+        sys.exit(run_trend(args))
+
+    # Headless: run one mode end to end, no banner, menus or prompts
+    if args.mode is not None:
+        sys.exit(run_headless(args))
 
     print_banner()
 
-    api_key = load_api_key()
+    api_key = load_api_key(args.api_key_file)
+    register_custom_categories(args.custom)
 
     # Mode selection
     mode = display_mode_menu()
 
     if mode == 2:
-        api = shodan.Shodan(api_key)
+        api = open_shodan_api(api_key)
         scanner_mode(api)
         return
     elif mode == 3:
-        api = shodan.Shodan(api_key)
+        api = open_shodan_api(api_key)
         monitor_mode(api)
         return
     elif mode == 4:
-        api = shodan.Shodan(api_key)
+        api = open_shodan_api(api_key)
         show_shodan_intelligence(api)
         return
 
     # mode == 1: existing Query Mode flow
+    # --offline serves every query from the local cache (no network, no credits)
+    offline = args.offline
+
     # Check requirements before proceeding
-    if not check_requirements(api_key):
+    if offline:
+        print_status('info', f"Offline mode - {Colors.YELLOW}serving results from the local query cache only{Colors.END}")
+    elif not check_requirements(api_key, credits_needed=estimate_query_credits(True, args.pages, args.credit_budget)):
         print(f"\n{Colors.CYAN}[i] Exiting MOIRAGUARD...{Colors.END}\n")
         sys.exit(0)
 
@@ -3058,7 +7011,7 @@ def main():
 
     # Ask for verbosity level
     print(f"\n{Colors.BOLD}{Colors.CYAN}Scan Verbosity:{Colors.END}")
-    print(f"  {Colors.GREEN}[1]{Colors.END} Metrics Only {Colors.DIM}(Fast - counts and totals only){Colors.END}")
+    print(f"  {Colors.GREEN}[1]{Colors.END} Metrics Only {Colors.DIM}(Fast - server-side counts & distributions, 0 query credits){Colors.END}")
     print(f"  {Colors.GREEN}[2]{Colors.END} Verbose Mode {Colors.DIM}(Detailed - includes IPs and device info){Colors.END}")
 
     while True:
@@ -3076,41 +7029,15 @@ def main():
     if verbose:
         print_status('info', f"Verbose mode enabled - {Colors.YELLOW}will collect detailed device information{Colors.END}")
     else:
-        print_status('info', f"Metrics mode - {Colors.GREEN}collecting counts only{Colors.END}")
+        print_status('info', f"Metrics mode - {Colors.GREEN}collecting server-side counts & facets only (no query credits){Colors.END}")
 
     try:
-        # Initialize API connection (already verified in requirements check)
-        api = shodan.Shodan(api_key)
-
-        print(f"\n{Colors.BOLD}{Colors.CYAN}[{datetime.now().strftime('%H:%M:%S')}]{Colors.END} {Colors.GREEN}Initiating MOIRAGUARD reconnaissance sweep...{Colors.END}\n")
-        time.sleep(1)
-
-        # Create scan data object
-        scan_data = ScanData(country_code, country_name)
-
-        # Run scans with country filter and data collection
-        stats = {}
-
-        stats['Smart Home Devices'] = scan_smart_home_devices(api, country_code, scan_data, verbose)
-        time.sleep(1)
-
-        stats['IoT Cameras'] = scan_iot_cameras(api, country_code, scan_data, verbose)
-        time.sleep(1)
-
-        stats['SCADA/ICS'] = scan_scada_ics(api, country_code, scan_data, verbose)
-        time.sleep(1)
-
-        stats['Building Automation'] = scan_building_automation(api, country_code, scan_data, verbose)
-        time.sleep(1)
-
-        stats['MQTT Brokers'] = scan_iot_mqtt(api, country_code, scan_data, verbose)
-        time.sleep(1)
-
-        stats['Industrial IoT'] = scan_industrial_iot(api, country_code, scan_data, verbose)
-        time.sleep(1)
-
-        # Print summary with target country context
-        print_summary(stats, api, country_name)
+        # Initialize API connection (already verified in requirements check),
+        # with repeated queries served from the on-disk cache
+        api = open_cached_api(api_key, offline)
+        scan_data = run_query_scan(api, country_code, country_name, verbose,
+                                   args.pages, args.credit_budget, args.resume, args.live_export,
+                                   history=open_history(args), delta=args.delta)
 
         # Show post-scan menu
         post_scan_menu(scan_data)
@@ -0,0 +1,370 @@
+"""Offline tests for the scanner's rate limiting, caching, paging, delta and
+scan-job logic. Everything runs against LocalShodanAPI and temp dirs: no
+network, API key or credits."""
+import itertools
+import json
+import time
+
+import pytest
+import shodan
+
+import moiraguard_iot_scanner as scanner
+
+
+def device(ip, port=502, **fields):
+    info = {'ip': ip, 'port': port, 'product': 'Modbus', 'version': '1.0', 'country': 'DE',
+            'city': 'Berlin', 'org': 'Example', 'isp': 'Example', 'timestamp': '2026-01-01T00:00:00'}
+    info.update(fields)
+    return info
+
+
+def scan(devices, count=None, category='Industrial'):
+    data = scanner.ScanData('DE', 'Germany')
+    data.add_category(category, len(devices) if count is None else count)
+    for info in devices:
+        data.add_device(category, info)
+    return data
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Replace time.time with a clock that only moves when told to"""
+    now = [1_000_000.0]
+    monkeypatch.setattr(scanner.time, 'time', lambda: now[0])
+    return now
+
+
+# ── AdaptiveRateLimiter ──
+
+def test_rate_limiter_halves_down_to_floor():
+    limiter = scanner.AdaptiveRateLimiter(rate=4.0)
+    limiter.on_rate_limited()
+    assert limiter.rate == 2.0
+    limiter.on_rate_limited()
+    limiter.on_rate_limited()
+    assert limiter.rate == 4.0 * scanner.RATE_FLOOR
+    assert limiter.throttled == 3
+
+
+def test_rate_limiter_pauses_callers_after_rate_limit():
+    limiter = scanner.AdaptiveRateLimiter(rate=4.0, burst=4)
+    limiter.on_rate_limited()
+    assert limiter._reserve() > 0
+
+
+def test_rate_limiter_recovers_after_successes():
+    limiter = scanner.AdaptiveRateLimiter(rate=4.0)
+    limiter.on_rate_limited()
+    for _ in range(scanner.RATE_INCREASE_AFTER - 1):
+        limiter.on_success()
+    assert limiter.rate == 2.0
+    limiter.on_success()
+    assert limiter.rate == pytest.approx(2.0 + 4.0 * scanner.RATE_INCREASE_STEP)
+    for _ in range(scanner.RATE_INCREASE_AFTER * 100):
+        limiter.on_success()
+    assert limiter.rate == 4.0
+
+
+def test_rate_limiter_failure_resets_success_streak():
+    limiter = scanner.AdaptiveRateLimiter(rate=4.0)
+    limiter.on_rate_limited()
+    for _ in range(scanner.RATE_INCREASE_AFTER - 1):
+        limiter.on_success()
+    limiter.on_rate_limited()
+    limiter.on_success()
+    assert limiter.rate == 1.0
+
+
+def test_unlimited_rate_limiter_never_waits():
+    limiter = scanner.AdaptiveRateLimiter(rate=None)
+    limiter.on_rate_limited()
+    assert limiter.acquire() == 0
+    assert limiter.throttled == 1
+
+
+# ── compute_scan_delta ──
+
+@pytest.fixture
+def history(tmp_path):
+    history = scanner.ScanHistory(tmp_path / 'history.sqlite')
+    yield history
+    history._db.close()
+
+
+def test_delta_without_base_run(history):
+    assert scanner.compute_scan_delta(history, scan([device('10.0.0.1')])) is None
+
+
+def test_delta_added_removed_changed(history):
+    history.record(scan([device('10.0.0.1'), device('10.0.0.2'), device('10.0.0.3')]), verbose=True)
+    current = scan([device('10.0.0.2'), device('10.0.0.3', version='2.0'), device('10.0.0.4')])
+
+    delta = scanner.compute_scan_delta(history, current)
+
+    assert delta.sampled == []
+    assert [info['ip'] for _, info in delta.added] == ['10.0.0.4']
+    assert [info['ip'] for _, info in delta.removed] == ['10.0.0.1']
+    assert [(info['ip'], changes) for _, info, changes in delta.changed] == [
+        ('10.0.0.3', {'version': ['1.0', '2.0']})]
+    assert delta.unchanged == 1
+    assert delta.counts() == {'Industrial': {'added': 1, 'removed': 1, 'changed': 1}}
+
+
+def test_delta_on_sampled_runs_reports_changes_only(history):
+    # The base run stored 2 of 50 matches: absence from it proves nothing
+    history.record(scan([device('10.0.0.1'), device('10.0.0.2')], count=50), verbose=True)
+    current = scan([device('10.0.0.2', org='Other'), device('10.0.0.9')], count=50)
+
+    delta = scanner.compute_scan_delta(history, current)
+
+    assert delta.sampled == ['Industrial']
+    assert delta.added == [] and delta.removed == []
+    assert [info['ip'] for _, info, _ in delta.changed] == ['10.0.0.2']
+
+
+def test_delta_with_sampled_current_run_keeps_additions(history):
+    history.record(scan([device('10.0.0.1'), device('10.0.0.2')]), verbose=True)
+    current = scan([device('10.0.0.3')], count=50)
+
+    delta = scanner.compute_scan_delta(history, current)
+
+    assert delta.sampled == ['Industrial']
+    assert [info['ip'] for _, info in delta.added] == ['10.0.0.3']
+    assert delta.removed == []
+
+
+def test_delta_ignores_metrics_only_runs(history):
+    history.record(scan([device('10.0.0.1')]), verbose=False)
+    assert scanner.compute_scan_delta(history, scan([device('10.0.0.1')])) is None
+
+
+# ── QueryCache ──
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = scanner.QueryCache(tmp_path / 'queries.sqlite', ttl=60)
+    yield cache
+    cache.close()
+
+
+def test_cache_round_trip_and_counters(cache):
+    assert cache.get('search', 'port:502') is None
+    cache.put('search', 'port:502', {'total': 3, 'matches': []}, page=2)
+    assert cache.get('search', 'port:502') is None
+    assert cache.get('search', ' port:502 ', page=2) == {'total': 3, 'matches': []}
+    assert (cache.hits, cache.misses, cache.credits_saved) == (1, 2, 1)
+
+
+def test_cache_entries_expire_after_ttl(cache, clock):
+    cache.put('count', 'port:502', {'total': 7})
+    clock[0] += 59
+    assert cache.contains('count', 'port:502')
+    clock[0] += 2
+    assert not cache.contains('count', 'port:502')
+    assert cache.get('count', 'port:502') is None
+
+
+def test_offline_cache_serves_expired_entries(tmp_path, clock):
+    path = tmp_path / 'queries.sqlite'
+    online = scanner.QueryCache(path, ttl=60)
+    online.put('count', 'port:502', {'total': 7})
+    online.close()
+    clock[0] += 3600
+
+    offline = scanner.QueryCache(path, ttl=60, offline=True)
+    assert offline.get('count', 'port:502') == {'total': 7}
+    api = scanner.CachedShodanAPI(scanner.LocalShodanAPI(), offline)
+    with pytest.raises(shodan.APIError, match='Offline mode'):
+        api.count('port:80')
+    assert api.api.calls == {}
+    offline.close()
+
+
+def test_cache_evicts_least_recently_used(tmp_path, clock):
+    cache = scanner.QueryCache(tmp_path / 'queries.sqlite', ttl=3600)
+    body = {'data': ''.join(f"{i:08x}" for i in range(2000))}
+    cache.put('count', 'a', body)
+    entry = cache._db.execute("SELECT LENGTH(body) FROM responses").fetchone()[0]
+    cache.max_bytes = int(entry * 3.5)
+    clock[0] += 1
+    cache.put('count', 'b', body)
+    clock[0] += 1
+    cache.put('count', 'c', body)
+    clock[0] += 1
+    assert cache.get('count', 'a') == body       # 'b' is now the least recently used
+    clock[0] += 1
+    cache.put('count', 'd', body)
+
+    assert not cache.contains('count', 'b')
+    assert all(cache.contains('count', query) for query in 'acd')
+    cache.close()
+
+
+def test_cached_api_serves_repeats_from_cache(cache):
+    api = scanner.CachedShodanAPI(scanner.LocalShodanAPI(), cache)
+    first = api.count('port:502', facets=scanner.COUNT_FACETS)
+    assert api.count('port:502', facets=scanner.COUNT_FACETS) == first
+    assert api.is_cached('count', 'port:502', facets=scanner.COUNT_FACETS)
+    assert api.api.calls['count'] == 1
+
+
+# ── SearchCursor ──
+
+@pytest.fixture
+def dispatcher(cache):
+    return scanner.QueryDispatcher(scanner.CachedShodanAPI(scanner.LocalShodanAPI(), cache), 4)
+
+
+def test_cursor_stops_at_page_budget(dispatcher):
+    cursor = scanner.SearchCursor(dispatcher, 'port:502', max_pages=3)
+    assert [page for page, _ in cursor] == [1, 2, 3]
+    assert cursor.stop_reason == 'pages'
+    assert cursor.credits_spent == 3
+
+
+def test_cursor_stops_at_credit_budget(dispatcher):
+    cursor = scanner.SearchCursor(dispatcher, 'port:502', credit_budget=2)
+    assert [page for page, _ in cursor] == [1, 2]
+    assert cursor.stop_reason == 'credits'
+    assert cursor.credits_spent == 2
+
+
+def test_cursor_stops_when_results_run_out(dispatcher):
+    total = dispatcher.api.search('port:502')['total']
+    pages = -(-total // scanner.SEARCH_PAGE_SIZE)
+    cursor = scanner.SearchCursor(dispatcher, 'port:502', max_pages=pages + 5)
+    assert [page for page, _ in cursor][-1] == pages
+    assert cursor.stop_reason == 'exhausted'
+
+
+def test_cursor_resume_replays_cached_pages_for_free(dispatcher):
+    first = scanner.SearchCursor(dispatcher, 'port:502', max_pages=3)
+    pages = {page: results for page, results in first}
+    searches = dispatcher.api.api.calls['search']
+
+    resumed = scanner.SearchCursor(dispatcher, 'port:502', max_pages=5, credits_spent=first.credits_spent,
+                                   resume_after=3)
+    replayed = {page: results for page, results in resumed}
+
+    assert list(replayed) == [1, 2, 3, 4, 5]
+    assert all(replayed[page] == pages[page] for page in pages)
+    assert dispatcher.api.api.calls['search'] - searches == 2
+    assert resumed.credits_spent == 5
+    assert resumed.skipped == 0
+
+
+def test_cursor_resume_skips_uncached_pages(tmp_path):
+    cache = scanner.QueryCache(tmp_path / 'empty.sqlite')
+    api = scanner.CachedShodanAPI(scanner.LocalShodanAPI(), cache)
+    cursor = scanner.SearchCursor(scanner.QueryDispatcher(api), 'port:502', start_page=2, max_pages=4,
+                                  credits_spent=3, resume_after=3)
+    assert [page for page, _ in cursor] == [4]
+    assert cursor.skipped == 2
+    assert api.api.calls['search'] == 1
+    cache.close()
+
+
+def test_checkpoint_keeps_only_unfinished_queries(tmp_path, cache):
+    api = scanner.CachedShodanAPI(scanner.LocalShodanAPI(), cache)
+    category = scanner.CATEGORY_REGISTRY[0]
+    query = category.build_query('DE')
+    path = tmp_path / 'checkpoint.json'
+    data = scanner.ScanData('DE', 'Germany')
+    data.add_category(category.name, 0)
+    first_page = api.search(query)
+    dispatcher = scanner.QueryDispatcher(api)
+
+    checkpoint = scanner.CollectionCheckpoint(path)
+    scanner.collect_category_pages(dispatcher, category, 'DE', data, first_page, pages=2, checkpoint=checkpoint)
+    assert json.loads(path.read_text())[scanner.normalize_query(query)]['last_page'] == 2
+
+    resumed = scanner.CollectionCheckpoint(path, resume=True)
+    scanner.collect_category_pages(dispatcher, category, 'DE', data, first_page, checkpoint=resumed)
+    assert json.loads(path.read_text()) == {}
+
+
+# ── ScanJobManager ──
+
+@pytest.fixture
+def local_api():
+    return scanner.LocalShodanAPI(scan_seconds=3600)
+
+
+def test_queued_jobs_back_off(tmp_path, local_api):
+    jobs = scanner.ScanJobManager(local_api, tmp_path / 'jobs.json')
+    job, _ = jobs.submit(['10.0.0.1'])
+    job.next_poll = 0
+    jobs.poll_due()
+    assert job.status == 'SUBMITTING' and job.polls == 1
+    assert job.interval == scanner.SCAN_POLL_INITIAL * scanner.SCAN_POLL_BACKOFF
+    assert job.next_poll == pytest.approx(time.time() + job.interval, abs=1)
+    assert jobs.poll_due() == []                  # not due again yet
+
+
+def test_reschedule_intervals():
+    jobs = scanner.ScanJobManager.__new__(scanner.ScanJobManager)
+    job = scanner.ScanJob('A', interval=8.0)
+    jobs._reschedule(job, 'PROCESSING', 100.0)
+    assert (job.interval, job.next_poll) == (4.0, 104.0)
+    for _ in range(5):
+        jobs._reschedule(job, 'PROCESSING', 100.0)
+    assert job.interval == scanner.SCAN_POLL_MIN
+    for _ in range(20):
+        jobs._reschedule(job, 'QUEUE', 100.0)
+    assert job.interval == scanner.SCAN_POLL_MAX
+
+
+def test_finished_and_failed_jobs(tmp_path):
+    api = scanner.LocalShodanAPI(scan_seconds=0)
+    finished = []
+    jobs = scanner.ScanJobManager(api, tmp_path / 'jobs.json', on_finished=finished.append)
+    done, _ = jobs.submit(['10.0.0.1'])
+    unknown = jobs.track('DOESNOTEXIST')
+    done.next_poll = 0
+    assert {job.id for job in jobs.poll_due()} == {done.id, unknown.id}
+    assert done.status == 'DONE' and unknown.status == 'FAILED'
+    assert unknown.error == 'Scan not found'
+    assert finished == [done, unknown] and jobs.pending() == []
+
+
+def test_jobs_survive_restart(tmp_path, local_api):
+    path = tmp_path / 'jobs.json'
+    jobs = scanner.ScanJobManager(local_api, path)
+    job, _ = jobs.submit(['10.0.0.1', '10.0.0.2'])
+    job.next_poll = 0
+    jobs.poll_due()
+
+    restored = scanner.ScanJobManager(local_api, path)
+    [copy] = restored.pending()
+    assert copy.to_dict() == job.to_dict()
+    assert copy.targets == ['10.0.0.1', '10.0.0.2'] and copy.polls == 1
+
+
+def test_old_finished_jobs_are_dropped_on_load(tmp_path, local_api):
+    path = tmp_path / 'jobs.json'
+    old = scanner.ScanJob('OLD', status='DONE', finished=time.time() - (scanner.SCAN_JOBS_KEEP_DAYS + 1) * 86400)
+    recent = scanner.ScanJob('RECENT', status='DONE', finished=time.time())
+    path.write_text(json.dumps({'jobs': [old.to_dict(), recent.to_dict()]}))
+    assert list(scanner.ScanJobManager(local_api, path).jobs) == ['RECENT']
+
+
+def test_unreadable_job_file_is_ignored(tmp_path, local_api, capsys):
+    path = tmp_path / 'jobs.json'
+    path.write_text('{not json')
+    assert scanner.ScanJobManager(local_api, path).jobs == {}
+    assert 'Ignoring unreadable scan job file' in capsys.readouterr().out
+
+
+def test_wait_only_blocks_on_requested_jobs(tmp_path, local_api, monkeypatch):
+    ticks = itertools.count()
+    monkeypatch.setattr(scanner.time, 'sleep', lambda seconds: next(ticks))
+    jobs = scanner.ScanJobManager(local_api, tmp_path / 'jobs.json')
+    earlier = jobs.track('DOESNOTEXIST')
+    earlier.next_poll = time.time() + 3600
+    local_api.scan_seconds = 0
+    job, _ = jobs.submit(['10.0.0.1'])
+    job.next_poll = 0
+
+    assert jobs.wait([job]) is True
+    assert job.status == 'DONE'
+    assert jobs.pending() == [earlier]